@@ -0,0 +1,217 @@
+"""
+Clause Export
+Writes clause-level analysis rows to a Parquet dataset and answers portfolio
+questions by scanning only the columns a query needs
+
+Usage:
+    python -m analytics.clause_export results/portfolio.jsonl results/clauses/
+"""
+import json
+import os
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from insights.entity_extractor import counterparty as resolve_counterparty
+from insights.financial_risk_detector import financial_risk_detector
+
+# Low-cardinality string columns are dictionary-encoded
+DICTIONARY_COLUMNS = ["category", "risk_level", "contract_type", "counterparty", "portfolio"]
+
+CLAUSE_SCHEMA = pa.schema([
+    ("doc_id", pa.string()),
+    ("source", pa.string()),
+    ("year", pa.int16()),
+    ("contract_type", pa.dictionary(pa.int32(), pa.string())),
+    ("counterparty", pa.dictionary(pa.int32(), pa.string())),
+    ("portfolio", pa.dictionary(pa.int32(), pa.string())),
+    ("clause_index", pa.int32()),
+    ("clause_offset", pa.int32()),
+    ("clause", pa.string()),
+    ("category", pa.dictionary(pa.int32(), pa.string())),
+    ("confidence", pa.float32()),
+    ("risk_level", pa.dictionary(pa.int32(), pa.string())),
+    ("financial_flags", pa.list_(pa.string())),
+])
+
+
+def clause_financial_flags(clause: str) -> List[str]:
+    """Financial keyword groups (see FinancialRiskDetector) that fire on this clause"""
+    clause_lower = clause.lower()
+    return [
+        flag for flag, keywords in financial_risk_detector.financial_keywords.items()
+        if any(keyword in clause_lower for keyword in keywords)
+    ]
+
+
+class ClauseExporter:
+
+    def __init__(self, dataset_dir: str):
+        self.dataset_dir = dataset_dir
+
+    def rows_from_result(self, result: Dict[str, Any], source: str = "",
+                         metadata: Optional[Dict[str, Any]] = None, text: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Flatten one /analyze response into clause rows. `metadata` may carry
+        year, counterparty and portfolio (e.g. "vendor"); a missing year is
+        written as null. Without a counterparty in `metadata` the detected
+        non-own party is used (null when none is known). Clause offsets come from the pipeline's risks; `text`
+        fills them in for results produced without them.
+        """
+        metadata = metadata or {}
+        legal = result.get("legalStructure", {})
+        year = metadata.get("year")
+        counterparty = metadata.get("counterparty") or resolve_counterparty(legal.get("parties", {}))
+
+        rows = []
+        search_from = 0
+        for index, risk in enumerate(result.get("risks", [])):
+            clause = risk.get("clause", "")
+            offset = risk.get("clause_offset", -1)
+            if offset < 0 and text:
+                offset = text.find(clause, search_from)
+                if offset >= 0:
+                    search_from = offset + len(clause)
+            rows.append({
+                "doc_id": result.get("documentId"),
+                "source": source,
+                "year": int(year) if year is not None else None,
+                "contract_type": legal.get("contractType"),
+                "counterparty": counterparty,
+                "portfolio": metadata.get("portfolio"),
+                "clause_index": risk.get("clause_index", index),
+                "clause_offset": offset,
+                "clause": clause,
+                "category": risk.get("category"),
+                "confidence": risk.get("confidence"),
+                "risk_level": risk.get("risk_level"),
+                "financial_flags": clause_financial_flags(clause),
+            })
+        return rows
+
+    def write_rows(self, rows: List[Dict[str, Any]]) -> Optional[str]:
+        """Write one Parquet part file into the dataset directory"""
+        if not rows:
+            return None
+        columns = {field.name: [row.get(field.name) for row in rows] for field in CLAUSE_SCHEMA}
+        arrays = []
+        for field in CLAUSE_SCHEMA:
+            if field.name in DICTIONARY_COLUMNS:
+                arrays.append(pa.array(columns[field.name], type=pa.string()).dictionary_encode())
+            else:
+                arrays.append(pa.array(columns[field.name], type=field.type))
+        table = pa.Table.from_arrays(arrays, schema=CLAUSE_SCHEMA)
+
+        os.makedirs(self.dataset_dir, exist_ok=True)
+        path = os.path.join(self.dataset_dir, f"part-{uuid.uuid4().hex}.parquet")
+        pq.write_table(table, path, compression="zstd")
+        return path
+
+    def export_results(self, results: Iterable[Dict[str, Any]], batch_size: int = 50000) -> List[str]:
+        """
+        Export records shaped like the batch runner output:
+        {"source": ..., "result": {...}, "metadata": {...}}
+        """
+        written, rows = [], []
+        for record in results:
+            rows.extend(self.rows_from_result(record["result"], record.get("source", ""), record.get("metadata")))
+            if len(rows) >= batch_size:
+                written.append(self.write_rows(rows))
+                rows = []
+        if rows:
+            written.append(self.write_rows(rows))
+        return written
+
+    def export_jsonl(self, jsonl_path: str, metadata: Optional[Dict[str, Dict[str, Any]]] = None) -> List[str]:
+        """Export a batch runner JSONL file; `metadata` maps source path -> document metadata"""
+        metadata = metadata or {}
+
+        def records():
+            with open(jsonl_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    record.setdefault("metadata", metadata.get(record["source"], {}))
+                    yield record
+
+        return self.export_results(records())
+
+
+class ClauseQuery:
+
+    def __init__(self, dataset_dir: str):
+        self.dataset = ds.dataset(dataset_dir, format="parquet", schema=CLAUSE_SCHEMA)
+
+    def find(
+        self,
+        category: Optional[str] = None,
+        financial_flag: Optional[str] = None,
+        year: Optional[int] = None,
+        contract_type: Optional[str] = None,
+        counterparty: Optional[str] = None,
+        portfolio: Optional[str] = None,
+        min_confidence: Optional[float] = None,
+        columns: Optional[List[str]] = None
+    ) -> pa.Table:
+        """
+        Portfolio query, e.g. all unlimited-liability clauses in 2025 vendor contracts:
+            find(financial_flag="unlimited_liability", year=2025, portfolio="vendor")
+        Scalar filters are pushed down to the Parquet scan; only requested
+        columns are read.
+        """
+        expression = None
+
+        def add(condition):
+            nonlocal expression
+            expression = condition if expression is None else expression & condition
+
+        if category is not None:
+            add(ds.field("category") == category)
+        if year is not None:
+            add(ds.field("year") == year)
+        if contract_type is not None:
+            add(ds.field("contract_type") == contract_type)
+        if counterparty is not None:
+            add(ds.field("counterparty") == counterparty)
+        if portfolio is not None:
+            add(ds.field("portfolio") == portfolio)
+        if min_confidence is not None:
+            add(ds.field("confidence") >= min_confidence)
+
+        if columns is None:
+            columns = ["doc_id", "source", "clause_index", "clause", "category", "confidence", "risk_level"]
+        scan_columns = list(columns)
+        if financial_flag is not None and "financial_flags" not in scan_columns:
+            scan_columns.append("financial_flags")
+
+        table = self.dataset.to_table(columns=scan_columns, filter=expression)
+        if financial_flag is not None:
+            mask = pc.is_in(pc.list_flatten(table["financial_flags"]), value_set=pa.array([financial_flag]))
+            parents = pc.list_parent_indices(table["financial_flags"])
+            keep = pc.unique(pc.filter(parents, mask))
+            table = table.take(keep)
+        return table.select(columns)
+
+    def count_by(self, column: str, **filters) -> Dict[Any, int]:
+        """Group counts over one column for the filtered rows, e.g. category per counterparty"""
+        table = self.find(columns=[column], **filters)
+        counts = table.group_by(column).aggregate([([], "count_all")])
+        return dict(zip(counts[column].to_pylist(), counts["count_all"].to_pylist()))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export batch runner results to a clause-level Parquet dataset")
+    parser.add_argument("results_jsonl", help="Output of pipeline.batch_runner")
+    parser.add_argument("dataset_dir", help="Directory for Parquet part files")
+    args = parser.parse_args()
+
+    parts = ClauseExporter(args.dataset_dir).export_jsonl(args.results_jsonl)
+    print(f"Wrote {len(parts)} part file(s) to {args.dataset_dir}")
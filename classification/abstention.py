@@ -0,0 +1,214 @@
+"""
+Abstention
+Calibrates classifier confidence into the probability the label is right,
+sends low-probability clauses to a second, more expensive pass (neighbouring
+clauses as context, zero-shot model) and flags whatever is still uncertain
+for human review
+
+Usage:
+    python -m classification.abstention fit --labeled classification/labeled_clauses.jsonl
+"""
+import argparse
+import json
+import os
+import sys
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from scoring.scorer import CalibratedProbabilityPolicy
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CALIBRATION_PATH = os.path.join(ROOT_DIR, "classification", "calibration.json")
+
+
+def fit_isotonic(confidences: Sequence[float], correct: Sequence[bool]) -> List[Tuple[float, float]]:
+    """
+    Isotonic regression (pool adjacent violators) of correctness on raw
+    confidence. Returns sorted (confidence, probability) points in the format
+    CalibratedProbabilityPolicy interpolates.
+    """
+    pairs = sorted(zip(confidences, (1.0 if c else 0.0 for c in correct)))
+    # Each block: [sum of y, count, min x, max x]
+    blocks: List[List[float]] = []
+    for x, y in pairs:
+        blocks.append([y, 1, x, x])
+        while len(blocks) > 1 and blocks[-2][0] / blocks[-2][1] > blocks[-1][0] / blocks[-1][1]:
+            total, count, _, high = blocks.pop()
+            blocks[-1][0] += total
+            blocks[-1][1] += count
+            blocks[-1][3] = high
+    points = []
+    for total, count, low, high in blocks:
+        probability = round(total / count, 4)
+        points.append((round(low, 4), probability))
+        if high != low:
+            points.append((round(high, 4), probability))
+    return points
+
+
+def fit_calibration(results: List[Dict[str, Any]], truth: List[str], min_category_examples: int = 30) -> Dict[str, Any]:
+    """Global isotonic map plus per-category maps where a category has enough examples"""
+    confidences = [r["confidence"] for r in results]
+    correct = [r["category"] == t for r, t in zip(results, truth)]
+    calibration = {"calibration": fit_isotonic(confidences, correct), "category_calibration": {}, "examples": len(truth)}
+    for category in sorted({r["category"] for r in results}):
+        rows = [(c, ok) for r, c, ok in zip(results, confidences, correct) if r["category"] == category]
+        if len(rows) >= min_category_examples:
+            calibration["category_calibration"][category] = fit_isotonic(*zip(*rows))
+    return calibration
+
+
+def load_calibration(path: str = CALIBRATION_PATH) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_calibration(calibration: Dict[str, Any], path: str = CALIBRATION_PATH) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(calibration, f, indent=2)
+
+
+def with_context(clauses: List[str], index: int, neighbours: int = 1) -> str:
+    """A clause with the clauses around it, for the second pass"""
+    start, end = max(0, index - neighbours), min(len(clauses), index + neighbours + 1)
+    return " ".join(clauses[start:end])
+
+
+class Abstention:
+
+    def __init__(self, calibration: Optional[Dict[str, Any]] = None, accept_probability: float = 0.7,
+                 min_margin: float = 0.1, context_neighbours: int = 1, path: Optional[str] = None):
+        # Defaults for whatever a calibration file does not set
+        self.default_accept_probability = accept_probability
+        self.default_min_margin = min_margin
+        # Clauses on each side added as context in the second pass
+        self.context_neighbours = context_neighbours
+        # Calibration file re-read by refresh() when it changes on disk (None: fixed calibration)
+        self.path = path
+        self._file_stamp = self._stamp() if path else None
+        self._configure(calibration)
+
+    def _stamp(self) -> Optional[Tuple[float, int]]:
+        if not os.path.exists(self.path):
+            return None
+        stat = os.stat(self.path)
+        return stat.st_mtime, stat.st_size
+
+    def _configure(self, calibration: Optional[Dict[str, Any]]) -> None:
+        calibration = calibration or {}
+        # The calibration this instance routes with, for fingerprinting its results
+        self.calibration = calibration or None
+        # Raw zero-shot confidence spread over seven labels is mostly below any sensible
+        # accept_probability, so without a fitted calibration nothing is routed
+        self.calibrated = bool(calibration.get("calibration"))
+        self.calibrator = CalibratedProbabilityPolicy(
+            [tuple(p) for p in calibration.get("calibration", [])],
+            {c: [tuple(p) for p in points] for c, points in calibration.get("category_calibration", {}).items()}
+        )
+        # Calibrated probability a label needs to be accepted without a second look
+        self.accept_probability = calibration.get("accept_probability", self.default_accept_probability)
+        # Lead over the runner-up label below which the top label is not trusted either
+        self.min_margin = calibration.get("min_margin", self.default_min_margin)
+
+    @classmethod
+    def from_file(cls, path: str = CALIBRATION_PATH, **kwargs) -> "Abstention":
+        return cls(load_calibration(path), path=path, **kwargs)
+
+    def refresh(self) -> Optional[Dict[str, Any]]:
+        """
+        Reloads the calibration file if it was fitted, replaced or removed
+        since it was last read, so a long-running server routes with the
+        calibration on disk. Returns the calibration now in use.
+        """
+        if self.path is not None:
+            stamp = self._stamp()
+            if stamp != self._file_stamp:
+                self._file_stamp = stamp
+                self._configure(load_calibration(self.path))
+        return self.calibration
+
+    def probability(self, result: Dict[str, Any]) -> float:
+        return round(self.calibrator.probability(result["category"], result["confidence"]), 4)
+
+    def is_uncertain(self, result: Dict[str, Any]) -> bool:
+        return (result["calibrated_probability"] < self.accept_probability
+                or result.get("margin", 1.0) < self.min_margin)
+
+    def route(self, clauses: List[str], results: List[Dict[str, Any]],
+              second_pass: Optional[Callable[[List[str]], List[Dict]]] = None) -> Dict[str, Any]:
+        """
+        Adds `calibrated_probability` to every result not routed before (reused
+        results keep their earlier decision). Uncertain results - below
+        accept_probability or min_margin - are re-classified once with
+        neighbouring clauses as context (when `second_pass` is given); the
+        better-calibrated answer is kept and anything still uncertain gets
+        `needs_review`. Returns counts for the pipeline report.
+        Without a calibration results are left untouched and nothing is routed.
+        """
+        if not self.calibrated:
+            return {"uncertain": 0, "second_pass": 0, "needs_review": 0}
+        uncertain = []
+        for i, result in enumerate(results):
+            if "calibrated_probability" in result:
+                continue
+            result["calibrated_probability"] = self.probability(result)
+            if self.is_uncertain(result):
+                uncertain.append(i)
+
+        second_passed = 0
+        if uncertain and second_pass is not None:
+            contextual = second_pass([with_context(clauses, i, self.context_neighbours) for i in uncertain])
+            for i, retry in zip(uncertain, contextual):
+                retry = dict(retry, clause=clauses[i], second_pass=True)
+                retry["calibrated_probability"] = self.probability(retry)
+                if retry["calibrated_probability"] > results[i]["calibrated_probability"]:
+                    results[i] = retry
+                second_passed += 1
+
+        review = 0
+        for i in uncertain:
+            if self.is_uncertain(results[i]):
+                results[i]["needs_review"] = True
+                review += 1
+        return {"uncertain": len(uncertain), "second_pass": second_passed, "needs_review": review}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Fit confidence calibration for abstention")
+    commands = parser.add_subparsers(dest="command", required=True)
+    fit = commands.add_parser("fit", help="Fit isotonic calibration on labeled clauses (plus resolved reviews)")
+    fit.add_argument("--labeled", default=os.path.join(ROOT_DIR, "classification", "labeled_clauses.jsonl"))
+    fit.add_argument("--no-reviews", action="store_true", help="Ignore labels from resolved review items")
+    fit.add_argument("--accept-probability", type=float, default=0.7)
+    fit.add_argument("--min-margin", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    from classification.early_exit import load_labeled_clauses
+    from classification.risk_classifier import risk_classifier
+
+    labeled = load_labeled_clauses(args.labeled)
+    if not args.no_reviews:
+        from pipeline.review_queue import review_queue
+        labeled += review_queue.labeled_examples()
+
+    results = risk_classifier.classify_clauses([row["clause"] for row in labeled])
+    truth = [row["label"] for row in labeled]
+    calibration = fit_calibration(results, truth)
+    calibration["accept_probability"] = args.accept_probability
+    calibration["min_margin"] = args.min_margin
+    save_calibration(calibration)
+
+    accuracy = sum(r["category"] == t for r, t in zip(results, truth)) / len(truth)
+    print(f"Fitted on {len(truth)} clauses (raw accuracy {accuracy:.3f}) -> {CALIBRATION_PATH}")
+    for confidence, probability in calibration["calibration"]:
+        print(f"  confidence {confidence:.3f} -> P(correct) {probability:.3f}")
+    return 0
+
+
+# Singleton instance
+abstention = Abstention.from_file()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""
+Classifier Settings
+Which classifier backend, inference mode and abstention calibration are
+active, read without importing any model code, so the pipeline can fingerprint
+classifications and the response cache can version them cheaply
+"""
+import os
+from typing import Any, Dict, Tuple
+
+from classification.abstention import load_calibration
+from classification.early_exit import load_bounds
+from pipeline.artifact_store import ROOT_DIR, hash_file
+
+DISTILLED_MODEL_PATH = os.path.join(ROOT_DIR, "classification", "distilled_model.npz")
+
+_model_hashes: Dict[Tuple[str, float, int], str] = {}
+
+
+def distilled_model_path() -> str:
+    return os.environ.get("CLASSIFIER_DISTILLED_MODEL", DISTILLED_MODEL_PATH)
+
+
+def _model_hash(path: str) -> str:
+    """Content hash of a model file, recomputed only when it changes on disk"""
+    stat = os.stat(path)
+    key = (path, stat.st_mtime, stat.st_size)
+    if key not in _model_hashes:
+        _model_hashes[key] = hash_file(path)
+    return _model_hashes[key]
+
+
+def classifier_settings() -> Dict[str, Any]:
+    settings: Dict[str, Any] = {
+        "backend": os.environ.get("CLASSIFIER_BACKEND", "zero_shot"),
+        "mode": os.environ.get("CLASSIFIER_INFERENCE_MODE", "full"),
+        "margin": float(os.environ.get("CLASSIFIER_EARLY_EXIT_MARGIN", 0.5)),
+        "top_k": int(os.environ.get("CLASSIFIER_TOP_K", 1)),
+        # "heading", "previous" or "heading,previous": fold section context into clause scores
+        "context": os.environ.get("CLASSIFIER_CONTEXT", "off"),
+        "heading_weight": float(os.environ.get("CLASSIFIER_HEADING_WEIGHT", 0.5)),
+        "previous_weight": float(os.environ.get("CLASSIFIER_PREVIOUS_WEIGHT", 0.3)),
+        # Zero-shot NLI model for clauses in other languages (e.g. joeddav/xlm-roberta-large-xnli);
+        # without one those clauses skip the classifier and go to review
+        "multilingual_model": os.environ.get("CLASSIFIER_MULTILINGUAL_MODEL") or None,
+        "multilingual_languages": os.environ.get("CLASSIFIER_MULTILINGUAL_LANGUAGES", "hi,hi-Latn,bn,ta,te,gu,pa,kn,ml,ur"),
+        # "context" re-classifies uncertain clauses with their neighbours; "off" only flags them
+        "second_pass": os.environ.get("CLASSIFIER_SECOND_PASS", "context"),
+        "calibration": load_calibration(),
+    }
+    if settings["backend"] == "distilled":
+        path = distilled_model_path()
+        settings["model"] = _model_hash(path) if os.path.exists(path) else None
+    else:
+        settings["bounds"] = load_bounds()
+    return settings
@@ -0,0 +1,99 @@
+"""
+Clause Packing
+Token-length-aware planning for the classifier: merges tiny fragments into the
+following clause, splits overlong clauses into overlapping windows and groups
+work into length buckets so batches carry little padding
+"""
+from typing import Dict, List, Sequence
+
+
+def plan_units(token_lengths: Sequence[int], min_tokens: int = 4,
+               max_tokens: int = 256, stride: int = 64) -> List[Dict]:
+    """
+    Plan classification units from per-clause token counts.
+    Each unit is {"sources": [clause indices], "primary": clause index,
+    "windows": [(start, end), ...]} where windows are token spans over the
+    sources' concatenated tokens. Fragments shorter than `min_tokens` ride
+    along with the next clause (or the previous one at the end of the
+    document), which is the unit's primary clause.
+    """
+    if max_tokens <= stride:
+        raise ValueError("max_tokens must be larger than stride")
+
+    groups: List[List[int]] = []
+    pending: List[int] = []
+    for i, length in enumerate(token_lengths):
+        if length < min_tokens:
+            pending.append(i)
+            continue
+        groups.append(pending + [i])
+        pending = []
+    if pending:
+        if groups:
+            groups[-1].extend(pending)
+        else:
+            groups.append(pending)
+
+    units = []
+    step = max_tokens - stride
+    for sources in groups:
+        total = sum(token_lengths[i] for i in sources)
+        if total <= max_tokens:
+            windows = [(0, total)]
+        else:
+            windows = []
+            for start in range(0, total, step):
+                end = min(start + max_tokens, total)
+                windows.append((start, end))
+                if end == total:
+                    break
+        primary = next((i for i in sources if token_lengths[i] >= min_tokens), sources[0])
+        units.append({"sources": sources, "primary": primary, "windows": windows})
+    return units
+
+
+def bucket_batches(lengths: Sequence[int], batch_size: int) -> List[List[int]]:
+    """Sort items by length and cut into batches so each batch pads to a similar length"""
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+def padding_stats(lengths: Sequence[int], batches: List[List[int]]) -> Dict:
+    """Share of padded positions per batch and overall (tokens actually used vs. padded)"""
+    per_batch = []
+    real_total, padded_total = 0, 0
+    for batch in batches:
+        if not batch:
+            continue
+        batch_lengths = [lengths[i] for i in batch]
+        padded = max(batch_lengths) * len(batch)
+        real = sum(batch_lengths)
+        per_batch.append(round(1 - real / padded, 4) if padded else 0.0)
+        real_total += real
+        padded_total += padded
+    return {
+        "batches": len(per_batch),
+        "padding_waste_per_batch": per_batch,
+        "padding_waste": round(1 - real_total / padded_total, 4) if padded_total else 0.0,
+        "tokens": real_total
+    }
+
+
+def aggregate_window_scores(window_scores: List[Dict[str, float]]) -> Dict[str, float]:
+    """
+    Combine label scores of a split clause: a risk in any window should count,
+    so take the max per label and renormalize.
+    """
+    if len(window_scores) == 1:
+        return window_scores[0]
+    labels = window_scores[0].keys()
+    pooled = {label: max(scores[label] for scores in window_scores) for label in labels}
+    total = sum(pooled.values()) or 1.0
+    return {label: score / total for label, score in pooled.items()}
+
+
+def window_tokens(token_ids: List[List[int]], unit: Dict) -> List[List[int]]:
+    """Token ids of each window of a unit (sources concatenated in order)"""
+    concatenated = [token for i in unit["sources"] for token in token_ids[i]]
+    return [concatenated[start:end] for start, end in unit["windows"]]
+
@@ -0,0 +1,350 @@
+"""
+Distilled Classifier
+Compact clause classifier distilled from bart-large-mnli: a softmax regression
+over hashed word n-grams, trained on the zero-shot model's labels and served
+as an alternative RiskClassifier backend (CLASSIFIER_BACKEND=distilled)
+
+Usage:
+    python -m classification.distilled_classifier label --output results/teacher_labels.jsonl
+    python -m classification.distilled_classifier train results/teacher_labels.jsonl
+    python -m classification.distilled_classifier benchmark results/teacher_labels.jsonl
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from classification.classifier_settings import distilled_model_path
+from classification.risk_classifier import RiskClassifier
+from pipeline.artifact_store import ArtifactStore, artifact_store
+from pipeline.model_manager import process_rss_bytes
+
+_WORD_PATTERN = re.compile(r"[a-z0-9$%]+")
+
+# Label order of the zero-shot classifier
+RISK_LABELS = [
+    "Financial Liability",
+    "Termination and Cancellation",
+    "Payment Terms",
+    "Intellectual Property Ownership",
+    "Confidentiality",
+    "Indemnification",
+    "Safe Clause",
+]
+
+
+def hashed_features(text: str, n_features: int, ngram_range: Tuple[int, int] = (1, 2)) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sparse feature row: hashed word n-gram indices with log-scaled counts,
+    L2-normalized. Returns (indices, values).
+    """
+    words = _WORD_PATTERN.findall(text.lower())
+    counts: Dict[int, float] = {}
+    low, high = ngram_range
+    for n in range(low, high + 1):
+        for i in range(len(words) - n + 1):
+            index = zlib.crc32(" ".join(words[i:i + n]).encode("utf-8")) % n_features
+            counts[index] = counts.get(index, 0.0) + 1.0
+    if not counts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    values = np.log1p(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+    values /= np.linalg.norm(values)
+    return indices, values
+
+
+def _stack(rows: List[Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Concatenate sparse rows into (indices, values, row_ids)"""
+    lengths = [len(indices) for indices, _ in rows]
+    indices = np.concatenate([r[0] for r in rows]) if rows else np.zeros(0, dtype=np.int64)
+    values = np.concatenate([r[1] for r in rows]) if rows else np.zeros(0, dtype=np.float32)
+    return indices, values, np.repeat(np.arange(len(rows)), lengths)
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exps = np.exp(logits)
+    return exps / exps.sum(axis=1, keepdims=True)
+
+
+class DistilledClassifier(RiskClassifier):
+    """
+    Same interface and result format as RiskClassifier; scoring is one sparse
+    dot product per clause, so no transformer is loaded.
+    """
+
+    def __init__(self, weights: np.ndarray, bias: np.ndarray, labels: List[str],
+                 ngram_range: Tuple[int, int] = (1, 2)):
+        self.weights = weights.astype(np.float32)
+        self.bias = bias.astype(np.float32)
+        self.n_features = weights.shape[0]
+        self.ngram_range = tuple(ngram_range)
+        super().__init__()
+        self.candidate_labels = list(labels)
+        self.inference_mode = "distilled"
+        self.top_k = 1
+
+    def _load_model(self, model: str) -> None:
+        # The weights are already in memory; no transformer or torch thread pools
+        pass
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "DistilledClassifier":
+        path = path or distilled_model_path()
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"No distilled model at {path}; run 'python -m classification.distilled_classifier train'"
+            )
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["weights"], data["bias"], [str(label) for label in data["labels"]],
+                       tuple(int(n) for n in data["ngram_range"]))
+
+    def save(self, path: Optional[str] = None) -> str:
+        path = path or distilled_model_path()
+        np.savez_compressed(path, weights=self.weights, bias=self.bias,
+                            labels=np.array(self.candidate_labels), ngram_range=np.array(self.ngram_range))
+        return path
+
+    def predict_proba(self, clauses: List[str]) -> np.ndarray:
+        if not clauses:
+            return np.zeros((0, len(self.candidate_labels)), dtype=np.float32)
+        indices, values, row_ids = _stack([hashed_features(c, self.n_features, self.ngram_range) for c in clauses])
+        logits = np.zeros((len(clauses), len(self.candidate_labels)), dtype=np.float32)
+        np.add.at(logits, row_ids, self.weights[indices] * values[:, None])
+        return _softmax(logits + self.bias)
+
+    def classify_clause(self, clause_text: str):
+        return self.classify_clauses([clause_text])[0]
+
+    def _clause_scores(self, clauses: list, *_: Any, **__: Any) -> tuple:
+        scores = [dict(zip(self.candidate_labels, row.tolist())) for row in self.predict_proba(list(clauses))]
+        return scores, {"clauses": len(clauses), "inference_mode": self.inference_mode}
+
+    def classify_clauses(self, clauses: list, contexts: list = None, **_: Any) -> list:
+        if not clauses:
+            return []
+        clause_scores, stats = self._clause_scores(clauses)
+        self.last_packing_stats = stats
+        return [
+            self._to_result(clause, scores)
+            for clause, scores in zip(clauses, self._with_context(clauses, clause_scores, contexts))
+        ]
+
+    def embed_clauses(self, clauses: list, **_: Any):
+        raise NotImplementedError("The distilled backend has no encoder; similar-clause indexing needs the zero-shot model")
+
+
+def train(
+    clauses: List[str],
+    labels: List[str],
+    label_names: List[str],
+    sample_weights: Optional[List[float]] = None,
+    n_features: int = 1 << 18,
+    ngram_range: Tuple[int, int] = (1, 2),
+    epochs: int = 15,
+    batch_size: int = 256,
+    learning_rate: float = 0.5,
+    l2: float = 1e-6,
+    seed: int = 0
+) -> DistilledClassifier:
+    """
+    Softmax regression on hashed n-grams with AdaGrad mini-batches. Teacher
+    confidences, when given, weight each example.
+    """
+    label_index = {label: i for i, label in enumerate(label_names)}
+    targets = np.array([label_index[label] for label in labels])
+    weights_per_example = np.asarray(sample_weights if sample_weights is not None else np.ones(len(clauses)),
+                                     dtype=np.float32)
+    rows = [hashed_features(c, n_features, ngram_range) for c in clauses]
+
+    n_classes = len(label_names)
+    weights = np.zeros((n_features, n_classes), dtype=np.float32)
+    bias = np.zeros(n_classes, dtype=np.float32)
+    grad_sq_w = np.full((n_features, n_classes), 1e-8, dtype=np.float32)
+    grad_sq_b = np.full(n_classes, 1e-8, dtype=np.float32)
+    rng = np.random.default_rng(seed)
+
+    for _ in range(epochs):
+        order = rng.permutation(len(rows))
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            indices, values, row_ids = _stack([rows[i] for i in batch])
+            logits = np.zeros((len(batch), n_classes), dtype=np.float32)
+            np.add.at(logits, row_ids, weights[indices] * values[:, None])
+            delta = _softmax(logits + bias)
+            delta[np.arange(len(batch)), targets[batch]] -= 1.0
+            delta *= (weights_per_example[batch] / weights_per_example[batch].sum())[:, None]
+
+            touched, inverse = np.unique(indices, return_inverse=True)
+            grad_w = np.zeros((len(touched), n_classes), dtype=np.float32)
+            np.add.at(grad_w, inverse, values[:, None] * delta[row_ids])
+            grad_w += l2 * weights[touched]
+            grad_b = delta.sum(axis=0)
+
+            grad_sq_w[touched] += grad_w ** 2
+            grad_sq_b += grad_b ** 2
+            weights[touched] -= learning_rate * grad_w / np.sqrt(grad_sq_w[touched])
+            bias -= learning_rate * grad_b / np.sqrt(grad_sq_b)
+
+    return DistilledClassifier(weights, bias, label_names, ngram_range)
+
+
+# Offline labeling with the teacher
+
+def _clauses_from_jsonl(path: str) -> Iterator[str]:
+    """Clause text from {"clause": ...} lines (e.g. classification/labeled_clauses.jsonl)"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)["clause"]
+
+
+def iter_stored_labels(store: ArtifactStore) -> Iterator[Dict[str, Any]]:
+    """
+    Teacher labels already persisted by the pipeline's classify stage (no
+    inference needed). Only artifacts classified by the zero-shot backend are
+    read, so the student never trains on its own outputs, and only results
+    carrying one of RISK_LABELS (not e.g. "Unsupported Language").
+    """
+    for doc_id in store.documents():
+        record = store.load(doc_id, "classify")
+        if record is None or record.get("meta", {}).get("backend") != "zero_shot":
+            continue
+        for result in record["data"]:
+            if result["category"] in RISK_LABELS:
+                yield {"clause": result["clause"], "label": result["category"], "confidence": result["confidence"]}
+
+
+def label_corpus(output_path: str, clause_files: Iterable[str] = (), store: Optional[ArtifactStore] = None,
+                 batch_size: int = 64) -> int:
+    """
+    Write teacher-labeled clauses to JSONL: stored classify-stage results
+    first, then clause files classified with the zero-shot RiskClassifier.
+    Duplicate clause texts are written once.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    seen = set()
+    written = 0
+    with open(output_path, "w", encoding="utf-8") as out:
+        def emit(record: Dict[str, Any]) -> None:
+            nonlocal written
+            key = record["clause"].strip().lower()
+            if key and key not in seen:
+                seen.add(key)
+                out.write(json.dumps(record) + "\n")
+                written += 1
+
+        for record in iter_stored_labels(store or artifact_store):
+            emit(record)
+
+        pending = [c for path in clause_files for c in _clauses_from_jsonl(path)]
+        if pending:
+            teacher = RiskClassifier()
+            for start in range(0, len(pending), batch_size):
+                for result in teacher.classify_clauses(pending[start:start + batch_size]):
+                    emit({"clause": result["clause"], "label": result["category"],
+                          "confidence": result["confidence"]})
+    return written
+
+
+def load_teacher_labels(path: str) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def split(records: List[Dict[str, Any]], holdout: float = 0.2, seed: int = 0):
+    order = np.random.default_rng(seed).permutation(len(records))
+    cut = int(len(records) * (1 - holdout))
+    return [records[i] for i in order[:cut]], [records[i] for i in order[cut:]]
+
+
+def benchmark(student: RiskClassifier, teacher: RiskClassifier, records: List[Dict[str, Any]],
+              student_rss: int = 0, teacher_rss: int = 0) -> Dict[str, Any]:
+    """Agreement with the teacher's labels, per-clause latency and model memory, student vs. teacher"""
+    clauses = [r["clause"] for r in records]
+    truth = [r["label"] for r in records]
+    rows = {}
+    for name, model, rss in (("teacher", teacher, teacher_rss), ("student", student, student_rss)):
+        if model is None:
+            continue
+        model.classify_clauses(clauses[:8])  # warm-up
+        start = time.perf_counter()
+        predicted = [r["category"] for r in model.classify_clauses(clauses)]
+        elapsed = time.perf_counter() - start
+        rows[name] = {
+            "agreement": round(sum(p == t for p, t in zip(predicted, truth)) / max(1, len(truth)), 4),
+            "ms_per_clause": round(elapsed / max(1, len(clauses)) * 1000, 3),
+            "model_rss_mb": round(rss / 1024 / 1024, 1)
+        }
+    if "teacher" in rows and rows["student"]["ms_per_clause"] > 0:
+        rows["speedup"] = round(rows["teacher"]["ms_per_clause"] / rows["student"]["ms_per_clause"], 1)
+    return rows
+
+
+def _loaded_with_rss(loader):
+    before = process_rss_bytes()
+    model = loader()
+    return model, max(0, process_rss_bytes() - before)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Distil bart-large-mnli clause labels into a compact classifier")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    label = commands.add_parser("label", help="Collect teacher labels (stored artifacts + clause files)")
+    label.add_argument("clause_files", nargs="*", help="JSONL files with a 'clause' field to label with the teacher")
+    label.add_argument("--output", default="results/teacher_labels.jsonl")
+
+    train_cmd = commands.add_parser("train", help="Train the distilled model on teacher labels")
+    train_cmd.add_argument("labels")
+    train_cmd.add_argument("--output", default=None, help="Model path (default: CLASSIFIER_DISTILLED_MODEL or classification/distilled_model.npz)")
+    train_cmd.add_argument("--features", type=int, default=1 << 18)
+    train_cmd.add_argument("--epochs", type=int, default=15)
+    train_cmd.add_argument("--holdout", type=float, default=0.2)
+
+    bench = commands.add_parser("benchmark", help="Compare the distilled model with the teacher on held-out labels")
+    bench.add_argument("labels")
+    bench.add_argument("--holdout", type=float, default=0.2)
+    bench.add_argument("--no-teacher", action="store_true", help="Skip loading bart-large-mnli (student only)")
+    args = parser.parse_args(argv)
+
+    if args.command == "label":
+        written = label_corpus(args.output, args.clause_files)
+        print(f"Wrote {written} teacher-labeled clauses to {args.output}")
+        return 0
+
+    records = load_teacher_labels(args.labels)
+    train_records, held_out = split(records, args.holdout)
+
+    if args.command == "train":
+        label_names = RISK_LABELS
+        start = time.perf_counter()
+        student = train([r["clause"] for r in train_records], [r["label"] for r in train_records], label_names,
+                        [r.get("confidence", 1.0) for r in train_records], n_features=args.features,
+                        epochs=args.epochs)
+        path = student.save(args.output)
+        held_out_agreement = benchmark(student, None, held_out)["student"]["agreement"] if held_out else None
+        print(f"Trained on {len(train_records)} clauses in {time.perf_counter() - start:.1f}s -> {path}")
+        print(f"Held-out agreement with teacher: {held_out_agreement}")
+        return 0
+
+    student, student_rss = _loaded_with_rss(DistilledClassifier.load)
+    teacher, teacher_rss = (None, 0) if args.no_teacher else _loaded_with_rss(RiskClassifier)
+    results = benchmark(student, teacher, held_out, student_rss, teacher_rss)
+    for name in ("teacher", "student"):
+        if name in results:
+            row = results[name]
+            print(f"{name:<8} agreement={row['agreement']:<7} ms/clause={row['ms_per_clause']:<9} rss={row['model_rss_mb']}MB")
+    if "speedup" in results:
+        print(f"Student is {results['speedup']}x cheaper per clause")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""
+Early-Exit Inference
+Scores zero-shot labels one at a time in risk-prioritized order and stops as
+soon as the leading label(s) cannot be overtaken by any label still unscored
+
+Usage:
+    python -m classification.early_exit --labeled classification/labeled_clauses.jsonl --fit
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BOUNDS_PATH = os.path.join(ROOT_DIR, "classification", "early_exit_bounds.json")
+
+# High-impact categories first: they decide the score, and most clauses exit after a few labels
+RISK_PRIORITY = [
+    "Financial Liability",
+    "Indemnification",
+    "Termination and Cancellation",
+    "Payment Terms",
+    "Intellectual Property Ownership",
+    "Confidentiality",
+    "Safe Clause",
+]
+
+
+def load_labeled_clauses(path: str) -> List[Dict[str, str]]:
+    """{"clause", "label"} records from a JSONL file"""
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def top_k_certain(logits: Dict[str, float], remaining: Sequence[str], ceilings: Dict[str, float],
+                  margin: float = 0.0, k: int = 1) -> bool:
+    """
+    True when the k best scored labels beat every unscored label's logit
+    ceiling by at least `margin`, so scoring the rest cannot change the top-k.
+    """
+    if not remaining:
+        return True
+    if len(logits) < k:
+        return False
+    kth_best = sorted(logits.values(), reverse=True)[k - 1]
+    return kth_best >= max(ceilings.get(label, math.inf) for label in remaining) + margin
+
+
+def estimate_scores(logits: Dict[str, float], unscored: Sequence[str], priors: Dict[str, float]) -> Dict[str, float]:
+    """
+    Softmax over entailment logits, as the zero-shot pipeline does, with each
+    unscored label at its typical (prior) logit.
+    """
+    values = dict(logits)
+    for label in unscored:
+        values[label] = priors.get(label, min(logits.values()) if logits else 0.0)
+    peak = max(values.values())
+    exps = {label: math.exp(value - peak) for label, value in values.items()}
+    total = sum(exps.values())
+    return {label: value / total for label, value in exps.items()}
+
+
+def fit_bounds(full_logits: List[Dict[str, float]], quantile: float = 0.9) -> Dict[str, Any]:
+    """
+    Per-label logit ceiling (the `quantile` of that label's entailment logit
+    over a corpus) and prior (its median), from fully scored clauses.
+    """
+    labels = full_logits[0].keys() if full_logits else []
+    ceilings, priors = {}, {}
+    for label in labels:
+        values = sorted(row[label] for row in full_logits)
+        ceilings[label] = values[min(len(values) - 1, int(quantile * len(values)))]
+        priors[label] = values[len(values) // 2]
+    return {"quantile": quantile, "ceilings": ceilings, "priors": priors, "clauses": len(full_logits)}
+
+
+def save_bounds(bounds: Dict[str, Any], path: str = BOUNDS_PATH) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(bounds, f, indent=2)
+
+
+def load_bounds(path: str = BOUNDS_PATH) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def benchmark(classifier, labeled: List[Dict[str, str]], margins: Sequence[float] = (0.0, 0.5, 1.0),
+              batch_size: int = 16) -> List[Dict[str, Any]]:
+    """
+    Accuracy and latency of the full pipeline vs. early exit at each margin
+    on a labeled clause set; agreement is with the full pipeline's top label.
+    """
+    clauses = [row["clause"] for row in labeled]
+    truth = [row["label"] for row in labeled]
+
+    def run(mode: str, margin: float = 0.0) -> Dict[str, Any]:
+        previous = classifier.inference_mode, classifier.early_exit_margin
+        classifier.inference_mode, classifier.early_exit_margin = mode, margin
+        try:
+            start = time.perf_counter()
+            results = classifier.classify_clauses(clauses, batch_size=batch_size)
+            elapsed = time.perf_counter() - start
+        finally:
+            classifier.inference_mode, classifier.early_exit_margin = previous
+        return {
+            "mode": mode,
+            "margin": margin if mode == "early_exit" else None,
+            "predicted": [r["category"] for r in results],
+            "labels_scored": classifier.last_packing_stats.get("labels_scored_mean", len(classifier.candidate_labels)),
+            "ms_per_clause": round(elapsed / len(clauses) * 1000, 2)
+        }
+
+    full = run("full")
+    rows = [full] + [run("early_exit", margin) for margin in margins]
+    full_predicted = full["predicted"]
+    for row in rows:
+        predicted = row.pop("predicted")
+        row["accuracy"] = round(sum(p == t for p, t in zip(predicted, truth)) / len(truth), 4)
+        row["agreement_with_full"] = round(sum(p == f for p, f in zip(predicted, full_predicted)) / len(truth), 4)
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Early-exit zero-shot classification: fit bounds and benchmark")
+    parser.add_argument("--labeled", default=os.path.join(ROOT_DIR, "classification", "labeled_clauses.jsonl"))
+    parser.add_argument("--fit", action="store_true", help="Fit logit ceilings/priors on the clause set first")
+    parser.add_argument("--corpus", default=None, help="Unlabeled clause JSONL to fit bounds on (default: --labeled)")
+    parser.add_argument("--quantile", type=float, default=0.9,
+                        help="Ceiling quantile: lower exits earlier at some accuracy cost")
+    parser.add_argument("--margins", nargs="*", type=float, default=[0.0, 0.5, 1.0])
+    args = parser.parse_args(argv)
+
+    from classification.risk_classifier import model_manager
+    # The loaded instance itself (not the managed proxy), so mode switches stick
+    risk_classifier = model_manager.get("classifier")
+    labeled = load_labeled_clauses(args.labeled)
+
+    if args.fit:
+        corpus = [row["clause"] for row in load_labeled_clauses(args.corpus or args.labeled)]
+        logits = risk_classifier.entailment_logits(corpus)
+        bounds = fit_bounds(logits, args.quantile)
+        save_bounds(bounds)
+        risk_classifier.early_exit_bounds = bounds
+        print(f"Fitted bounds on {len(corpus)} clauses -> {BOUNDS_PATH}")
+
+    print(f"{'mode':<11} {'margin':>6} {'accuracy':>9} {'agree':>7} {'labels':>7} {'ms/clause':>10}")
+    for row in benchmark(risk_classifier, labeled, args.margins):
+        margin = "" if row["margin"] is None else row["margin"]
+        print(f"{row['mode']:<11} {margin:>6} {row['accuracy']:>9} {row['agreement_with_full']:>7} "
+              f"{row['labels_scored']:>7} {row['ms_per_clause']:>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
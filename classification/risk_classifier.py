@@ -1,11 +1,16 @@
-from transformers import pipeline
+import numpy as np
+
+from classification.clause_packing import (
+    plan_units, bucket_batches, padding_stats, aggregate_window_scores, window_tokens
+)
+from classification.classifier_settings import classifier_settings
+from classification.early_exit import RISK_PRIORITY, estimate_scores, top_k_certain
+from classification.section_context import ContextCache, apply_context, clause_contexts
+from pipeline.model_manager import model_manager, ManagedModel
+from pipeline.torch_threads import configure_torch_threads
 
 class RiskClassifier:
-    def __init__(self):
-        print("Loading Zero-Shot Classification Model... This may take a while.")
-        # Using a smaller model for development if memory is tight, but plan specified huge one.
-        # We'll stick to 'facebook/bart-large-mnli' as per plan, but warn user about download size on first run.
-        self.classifier = pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
+    def __init__(self, model: str = "facebook/bart-large-mnli"):
         self.candidate_labels = [
             "Financial Liability",
             "Termination and Cancellation",
@@ -15,6 +20,42 @@ class RiskClassifier:
             "Indemnification",
             "Safe Clause" 
         ]
+        self.hypothesis_template = "This example is {}."
+        # "full" scores every label; "early_exit" scores labels in risk order and stops
+        # once the top_k labels are settled (see classification/early_exit.py)
+        settings = classifier_settings()
+        self.inference_mode = settings["mode"]
+        self.early_exit_margin = settings["margin"]
+        self.top_k = settings["top_k"]
+        self.early_exit_bounds = settings.get("bounds")
+        self.configure_context(settings)
+        self.last_packing_stats = {}
+        self._load_model(model)
+
+    def _load_model(self, model: str) -> None:
+        # Share cores with the other workers on this node before torch spins up its pools
+        self.thread_settings = configure_torch_threads()
+        print("Loading Zero-Shot Classification Model... This may take a while.")
+        # Using a smaller model for development if memory is tight, but plan specified huge one.
+        # We'll stick to 'facebook/bart-large-mnli' as per plan, but warn user about download size on first run.
+        from transformers import pipeline
+        self.classifier = pipeline("zero-shot-classification", model=model)
+
+    def configure_context(self, settings: dict) -> None:
+        """Section heading / previous clause priors (see classification/section_context.py)"""
+        modes = {m.strip() for m in settings["context"].split(",")}
+        self.heading_weight = settings["heading_weight"] if "heading" in modes else 0.0
+        self.previous_weight = settings["previous_weight"] if "previous" in modes else 0.0
+        # Scores of headings and recent clauses, shared by every clause in a section
+        self.context_cache = ContextCache()
+
+    def _with_context(self, clauses: list, clause_scores: list, contexts: list = None) -> list:
+        if not (self.heading_weight or self.previous_weight):
+            return clause_scores
+        return apply_context(
+            clauses, clause_scores, contexts or clause_contexts(clauses), self.context_cache,
+            lambda texts: self._clause_scores(texts)[0], self.heading_weight, self.previous_weight
+        )
 
     def classify_clause(self, clause_text: str):
         """
@@ -23,10 +64,15 @@ class RiskClassifier:
         """
         # Run classification
         result = self.classifier(clause_text, self.candidate_labels)
-        
+        return self._to_result(clause_text, dict(zip(result['labels'], result['scores'])))
+
+    def _to_result(self, clause_text: str, label_scores: dict) -> dict:
+        """Builds the clause result from a {label: score} mapping"""
         # Get top prediction
-        top_label = result['labels'][0]
-        top_score = result['scores'][0]
+        ranked = sorted(label_scores, key=label_scores.get, reverse=True)
+        top_label = ranked[0]
+        top_score = label_scores[top_label]
+        runner_up = label_scores[ranked[1]] if len(ranked) > 1 else 0.0
 
         # Basic logic: If "Safe Clause" is top pick but confidence is low, it might still be risky.
         # But for now, we trust the model's top pick.
@@ -35,12 +81,229 @@ class RiskClassifier:
         if top_label == "Safe Clause":
             risk_level = "Safe"
 
-        return {
+        result = {
             "clause": clause_text,
             "category": top_label,
             "confidence": round(top_score, 4),
+            # Lead over the runner-up label; small margins are routed to the second pass
+            "margin": round(top_score - runner_up, 4),
             "risk_level": risk_level
         }
+        if self.top_k > 1:
+            result["top_labels"] = ranked[:self.top_k]
+        return result
+
+    def entailment_logits(self, texts: list, labels: list = None, batch_size: int = 16) -> list:
+        """
+        Raw NLI entailment logit of every (text, label) hypothesis, as
+        [{label: logit}] per text. The pipeline's single-label scores are the
+        softmax of these over the labels.
+        """
+        import torch
+
+        labels = labels or self.candidate_labels
+        model = self.classifier.model
+        tokenizer = self.classifier.tokenizer
+        entailment_id = self.classifier.entailment_id
+
+        rows = []
+        with torch.no_grad():
+            for start in range(0, len(texts), batch_size):
+                chunk = texts[start:start + batch_size]
+                batch = tokenizer(
+                    [text for text in chunk for _ in labels],
+                    [self.hypothesis_template.format(label) for _ in chunk for label in labels],
+                    padding=True, truncation="only_first", return_tensors="pt"
+                ).to(model.device)
+                logits = model(**batch).logits[:, entailment_id].reshape(len(chunk), len(labels))
+                rows.extend(dict(zip(labels, row)) for row in logits.float().cpu().tolist())
+        return rows
+
+    def _score_early_exit(self, texts: list) -> tuple:
+        """
+        Scores one label at a time (risk-prioritized) for every text still
+        undecided; a text drops out once its top_k labels beat the fitted
+        ceilings of all unscored labels. Without fitted bounds every label is scored.
+        """
+        bounds = self.early_exit_bounds or {}
+        ceilings, priors = bounds.get("ceilings", {}), bounds.get("priors", {})
+        order = [label for label in RISK_PRIORITY if label in self.candidate_labels]
+        order += [label for label in self.candidate_labels if label not in order]
+
+        logits = [{} for _ in texts]
+        active = list(range(len(texts)))
+        for position, label in enumerate(order):
+            if not active:
+                break
+            values = self.entailment_logits([texts[i] for i in active], [label], batch_size=len(active))
+            for i, value in zip(active, values):
+                logits[i][label] = value[label]
+            remaining = order[position + 1:]
+            active = [i for i in active
+                      if not top_k_certain(logits[i], remaining, ceilings, self.early_exit_margin, self.top_k)]
+
+        scores = [estimate_scores(row, [label for label in order if label not in row], priors) for row in logits]
+        return scores, [len(row) for row in logits]
+
+    def _score_texts(self, texts: list) -> tuple:
+        """Label scores per text and how many labels were scored for each"""
+        if self.inference_mode == "early_exit":
+            return self._score_early_exit(texts)
+        # One forward pass per batch: the pipeline batches (premise, hypothesis) pairs
+        outputs = self.classifier(texts, self.candidate_labels, batch_size=len(texts) * len(self.candidate_labels))
+        if isinstance(outputs, dict):
+            outputs = [outputs]
+        scores = [dict(zip(output['labels'], output['scores'])) for output in outputs]
+        return scores, [len(self.candidate_labels)] * len(texts)
+
+    def classify_clauses(self, clauses: list, batch_size: int = 8, min_tokens: int = 4,
+                         max_tokens: int = 256, stride: int = 64, contexts: list = None) -> list:
+        """
+        Classifies many clauses with token-length-aware packing: fragments under
+        `min_tokens` are merged into the next clause, clauses over `max_tokens`
+        are split into overlapping windows whose scores are max-pooled, and
+        windows are batched by length to minimise padding.
+        With a context mode set, heading/previous-clause priors are folded in;
+        `contexts` (from section_context.clause_contexts over the whole
+        document) is needed when `clauses` is only part of it.
+        Returns one result per input clause; merged fragments carry the label
+        of the clause they were scored with and are marked `merged_fragment`,
+        so the unit counts as one risk. Padding stats for the call are kept in
+        `self.last_packing_stats`.
+        """
+        if not clauses:
+            return []
+        clause_scores, stats = self._clause_scores(clauses, batch_size, min_tokens, max_tokens, stride)
+        fragments = set(stats.pop("fragment_indices", ()))
+        lookups = self.context_cache.misses
+        clause_scores = self._with_context(clauses, clause_scores, contexts)
+        stats["context_texts_scored"] = self.context_cache.misses - lookups
+        self.last_packing_stats = stats
+        results = [self._to_result(clause, scores) for clause, scores in zip(clauses, clause_scores)]
+        for i in fragments:
+            results[i]["merged_fragment"] = True
+        return results
+
+    def _clause_scores(self, clauses: list, batch_size: int = 8, min_tokens: int = 4,
+                       max_tokens: int = 256, stride: int = 64) -> tuple:
+        """Pooled {label: score} per clause and the packing stats"""
+
+        tokenizer = self.classifier.tokenizer
+        token_ids = tokenizer(list(clauses), add_special_tokens=False)["input_ids"]
+        units = plan_units([len(ids) for ids in token_ids], min_tokens, max_tokens, stride)
+
+        texts, owners, lengths = [], [], []
+        for u, unit in enumerate(units):
+            if len(unit["windows"]) == 1:
+                texts.append(" ".join(clauses[i] for i in unit["sources"]))
+                lengths.append(unit["windows"][0][1])
+                owners.append(u)
+            else:
+                for ids in window_tokens(token_ids, unit):
+                    texts.append(tokenizer.decode(ids))
+                    lengths.append(len(ids))
+                    owners.append(u)
+
+        batches = bucket_batches(lengths, batch_size)
+        window_scores = [None] * len(texts)
+        labels_scored = 0
+        for batch in batches:
+            scores, scored = self._score_texts([texts[i] for i in batch])
+            labels_scored += sum(scored)
+            for i, label_scores in zip(batch, scores):
+                window_scores[i] = label_scores
+
+        unit_windows = [[] for _ in units]
+        for i, u in enumerate(owners):
+            unit_windows[u].append(window_scores[i])
+
+        clause_scores = [None] * len(clauses)
+        for unit, scores in zip(units, unit_windows):
+            pooled = aggregate_window_scores(scores)
+            for i in unit["sources"]:
+                clause_scores[i] = pooled
+
+        stats = padding_stats(lengths, batches)
+        stats.update({
+            "clauses": len(clauses),
+            "units": len(units),
+            "merged_fragments": sum(len(unit["sources"]) - 1 for unit in units),
+            "fragment_indices": [i for unit in units for i in unit["sources"] if i != unit["primary"]],
+            "split_clauses": sum(1 for unit in units if len(unit["windows"]) > 1),
+            "windows": len(texts),
+            "inference_mode": self.inference_mode,
+            "labels_scored_mean": round(labels_scored / len(texts), 2)
+        })
+        return clause_scores, stats
+
+    def embed_clauses(self, clauses: list, batch_size: int = 16, max_length: int = 256) -> np.ndarray:
+        """
+        Clause embeddings from the encoder of the already-loaded NLI model:
+        attention-masked mean pooling, L2-normalized, float32 (n, hidden_size).
+        """
+        import torch
+
+        model = self.classifier.model
+        tokenizer = self.classifier.tokenizer
+        encoder = model.get_encoder() if hasattr(model, "get_encoder") else model.model.get_encoder()
+
+        vectors = []
+        with torch.no_grad():
+            for start in range(0, len(clauses), batch_size):
+                batch = tokenizer(
+                    clauses[start:start + batch_size], padding=True, truncation=True,
+                    max_length=max_length, return_tensors="pt"
+                ).to(model.device)
+                hidden = encoder(input_ids=batch["input_ids"], attention_mask=batch["attention_mask"]).last_hidden_state
+                mask = batch["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+                pooled = torch.nn.functional.normalize(pooled, dim=-1)
+                vectors.append(pooled.float().cpu().numpy())
+
+        if not vectors:
+            return np.zeros((0, model.config.hidden_size), dtype=np.float32)
+        return np.concatenate(vectors)
+
+def load_classifier():
+    """Zero-shot model by default; CLASSIFIER_BACKEND=distilled serves the compact distilled model"""
+    if classifier_settings()["backend"] == "distilled":
+        from classification.distilled_classifier import DistilledClassifier
+        return DistilledClassifier.load()
+    return RiskClassifier()
+
+
+def second_pass_classifier():
+    """
+    Model for the abstention second pass: the zero-shot model when the
+    distilled backend serves first-pass traffic, otherwise the same model
+    (run on wider context) so it is never loaded twice
+    """
+    if classifier_settings()["backend"] == "distilled":
+        return ManagedModel(model_manager, "zero_shot")
+    return risk_classifier
+
+
+def load_multilingual_classifier():
+    return RiskClassifier(model=classifier_settings()["multilingual_model"])
+
+
+def classifier_for_language(language: str) -> tuple:
+    """
+    (route, model) for clauses in `language`: the main classifier for English
+    and any Latin text without a clearer profile (too short to tell, or terse
+    clauses light on function words), the multilingual model when one is
+    configured for the language, otherwise ("skipped", None)
+    """
+    if language in ("en", "und", "unknown"):
+        return "classifier", risk_classifier
+    settings = classifier_settings()
+    if settings["multilingual_model"] and language in settings["multilingual_languages"].split(","):
+        return "multilingual", ManagedModel(model_manager, "multilingual")
+    return "skipped", None
+
 
-# Singleton instance to avoid reloading model
-risk_classifier = RiskClassifier()
+# Singleton instance: the model manager loads it on first use and unloads it when idle
+model_manager.register("classifier", load_classifier)
+model_manager.register("zero_shot", RiskClassifier)
+model_manager.register("multilingual", load_multilingual_classifier)
+risk_classifier = ManagedModel(model_manager, "classifier")
@@ -0,0 +1,115 @@
+"""
+Section Context
+Document-level context for clause classification: finds the section heading
+each clause sits under and its previous clause, and folds their label scores
+into the clause's own as a prior. Context scores are cached by text, so a
+heading is scored once for every clause in its section and a previous clause
+usually comes free from the same batch
+"""
+import math
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from segmentation.headings import is_heading
+
+
+def split_heading(clause: str) -> Tuple[Optional[str], str]:
+    """(heading, body) when the clause opens with a heading line (OCR keeps line breaks)"""
+    first, newline, rest = clause.partition("\n")
+    if newline and rest.strip() and is_heading(first):
+        return first.strip().rstrip(":"), rest.strip()
+    return None, clause
+
+
+def clause_contexts(clauses: Sequence[str]) -> List[Dict[str, Optional[str]]]:
+    """
+    Per clause: the enclosing section heading (carried forward until the next
+    one) and the previous clause when it is in the same section
+    """
+    contexts = []
+    heading, previous = None, None
+    for clause in clauses:
+        opening, _ = split_heading(clause)
+        if opening is not None:
+            heading, previous = opening, None
+        contexts.append({"heading": heading, "previous": previous})
+        previous = clause
+    return contexts
+
+
+def combine_scores(scores: Dict[str, float], priors: List[Dict[str, float]],
+                   weights: List[float]) -> Dict[str, float]:
+    """Log-linear pooling: p(label) ∝ p_clause(label) * Π prior(label) ** weight"""
+    combined = {}
+    for label, value in scores.items():
+        log_p = math.log(max(value, 1e-9))
+        for prior, weight in zip(priors, weights):
+            log_p += weight * math.log(max(prior.get(label, 1e-9), 1e-9))
+        combined[label] = log_p
+    peak = max(combined.values())
+    exps = {label: math.exp(value - peak) for label, value in combined.items()}
+    total = sum(exps.values())
+    return {label: value / total for label, value in exps.items()}
+
+
+class ContextCache:
+    """Label scores of context texts (headings, clauses), least recently used evicted"""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._scores: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, text: str, scores: Dict[str, float]) -> None:
+        self._scores[text] = scores
+        self._scores.move_to_end(text)
+        while len(self._scores) > self.max_entries:
+            self._scores.popitem(last=False)
+
+    def get_many(self, texts: Sequence[str],
+                 score: Callable[[List[str]], List[Dict[str, float]]]) -> Dict[str, Dict[str, float]]:
+        """Scores for every text; uncached ones are scored together in one call"""
+        missing = [t for t in dict.fromkeys(texts) if t not in self._scores]
+        self.hits += len(set(texts)) - len(missing)
+        self.misses += len(missing)
+        found = dict(zip(missing, score(missing))) if missing else {}
+        for text in texts:
+            if text not in found:
+                self._scores.move_to_end(text)
+                found[text] = self._scores[text]
+        for text, scores in found.items():
+            self.put(text, scores)
+        return found
+
+
+def apply_context(clauses: Sequence[str], clause_scores: List[Dict[str, float]],
+                  contexts: Sequence[Dict[str, Optional[str]]], cache: ContextCache,
+                  score: Callable[[List[str]], List[Dict[str, float]]],
+                  heading_weight: float = 0.5, previous_weight: float = 0.3) -> List[Dict[str, float]]:
+    """
+    Clause scores with their heading and previous-clause scores folded in.
+    The previous clause contributes its own (context-free) scores, so context
+    does not snowball down a section.
+    """
+    for clause, scores in zip(clauses, clause_scores):
+        cache.put(clause, scores)
+    needed = []
+    for context in contexts:
+        if heading_weight > 0 and context["heading"]:
+            needed.append(context["heading"])
+        if previous_weight > 0 and context["previous"]:
+            needed.append(context["previous"])
+    found = cache.get_many(needed, score) if needed else {}
+
+    combined = []
+    for scores, context in zip(clause_scores, contexts):
+        priors, weights = [], []
+        if heading_weight > 0 and context["heading"]:
+            priors.append(found[context["heading"]])
+            weights.append(heading_weight)
+        if previous_weight > 0 and context["previous"]:
+            priors.append(found[context["previous"]])
+            weights.append(previous_weight)
+        combined.append(combine_scores(scores, priors, weights) if priors else scores)
+    return combined
@@ -1,11 +1,11 @@
 const analyzeContractWithAI = require("../services/aiService")
 const fs = require("fs");
 async function analyzeContract(req,res){
-    try {
-      if (!req.file) {
-        return res.status(400).json({ error: "No file uploaded" });
-      }
+    if (!req.file) {
+      return res.status(400).json({ error: "No file uploaded" });
+    }
 
+    try {
       const result = await analyzeContractWithAI(req.file.path);
 
       res.json({
@@ -13,15 +13,17 @@ async function analyzeContract(req,res){
         filename: req.file.originalname,
         ...result
       });
-      //Temporary file deleted
-      fs.unlink(req.file.path, (err) => {
-        if (err) console.error("File cleanup failed:", err);
-      });
     } 
     catch (error) {
       console.error(error);
       res.status(500).json({ error: "Internal server error" });
     }
+    finally {
+      //Temporary file deleted, also when analysis failed
+      fs.unlink(req.file.path, (err) => {
+        if (err) console.error("File cleanup failed:", err);
+      });
+    }
 }
 
-module.exports=analyzeContract;
\ No newline at end of file
+module.exports=analyzeContract;
@@ -2,11 +2,16 @@
 Economic Impact Model
 Quantifies the economic impact of contract risks
 """
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+
+import numpy as np
 
 class EconomicImpactModel:
     
     def __init__(self):
+        # Currency of the estimates below; stated amounts in other currencies are not used
+        self.currency = "USD"
+
         # Base cost estimates for different risk types (in USD)
         self.risk_cost_estimates = {
             "Extended Payment Terms": {
@@ -27,15 +32,28 @@ class EconomicImpactModel:
             "Medium": 1.5,
             "Low": 1.0
         }
+
+        # Lognormal spread (sigma of log-cost) per severity for exposure simulation;
+        # more severe risks have fatter tails
+        self.severity_volatility = {
+            "Critical": 1.0,
+            "High": 0.75,
+            "Medium": 0.5,
+            "Low": 0.35
+        }
     
     def calculate_economic_impact(
         self, 
         financial_risks: List[Dict],
-        contract_value: float = 10000  # Default contract value
+        contract_value: float = 10000,  # Default contract value
+        simulate: bool = False,
+        trials: int = 100000,
+        seed: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Calculates the economic impact of identified risks
         Returns financial projections and cost breakdowns
+        With simulate=True, also returns Monte Carlo P50/P90/P99 exposure
         """
         
         # Calculate direct costs
@@ -52,7 +70,7 @@ class EconomicImpactModel:
         # Generate recommendations
         recommendations = self._generate_recommendations(financial_risks, total_risk_cost)
         
-        return {
+        result = {
             "contract_value": contract_value,
             "estimated_direct_costs": round(direct_costs, 2),
             "estimated_opportunity_costs": round(opportunity_costs, 2),
@@ -62,46 +80,109 @@ class EconomicImpactModel:
             "economic_viability": self._assess_viability(risk_percentage),
             "recommendations": recommendations
         }
-    
+
+        if simulate:
+            result["exposure_simulation"] = self.simulate_exposure(
+                financial_risks, contract_value, trials=trials, seed=seed
+            )
+
+        return result
+
+    def _risk_direct_cost(self, risk: Dict) -> float:
+        """Severity-adjusted direct cost of a single risk"""
+        risk_type = risk.get('type', '')
+        severity = risk.get('severity', 'Low')
+
+        # An amount stated in the contract is the cost itself; severity only scales the fixed estimates
+        amount = risk.get('amount')
+        if isinstance(amount, (int, float)) and amount > 0 and risk.get('currency', self.currency) == self.currency:
+            return float(amount)
+
+        # Get base cost estimate
+        base_cost = self.risk_cost_estimates.get(risk_type, 1000)
+
+        # Handle nested dictionaries (like Extended Payment Terms)
+        if isinstance(base_cost, dict):
+            if risk.get('days', 0) >= 90:
+                base_cost = base_cost["Net-90"]  # Period known from the extracted entities
+            else:
+                base_cost = list(base_cost.values())[0]  # Take first value
+
+        # Apply severity multiplier
+        multiplier = self.severity_multipliers.get(severity, 1.0)
+        return base_cost * multiplier
+
+    def _risk_opportunity_cost(self, risk: Dict) -> float:
+        """Opportunity cost of a single risk"""
+        risk_type = risk.get('type', '')
+        opportunity_cost = 0
+
+        # Opportunity costs for specific risk types
+        if 'Non-Compete' in risk_type:
+            opportunity_cost += 3000  # Lost business opportunities
+
+        if 'Extended Payment' in risk_type:
+            opportunity_cost += 300  # Cash flow impact
+
+        if 'Termination' in risk_type:
+            opportunity_cost += 1500  # Contract uncertainty
+
+        return opportunity_cost
+
     def _calculate_direct_costs(self, financial_risks: List[Dict]) -> float:
         """Calculate direct financial costs of risks"""
-        total_cost = 0
-        
-        for risk in financial_risks:
-            risk_type = risk.get('type', '')
-            severity = risk.get('severity', 'Low')
-            
-            # Get base cost estimate
-            base_cost = self.risk_cost_estimates.get(risk_type, 1000)
-            
-            # Handle nested dictionaries (like Extended Payment Terms)
-            if isinstance(base_cost, dict):
-                base_cost = list(base_cost.values())[0]  # Take first value
-            
-            # Apply severity multiplier
-            multiplier = self.severity_multipliers.get(severity, 1.0)
-            total_cost += base_cost * multiplier
-        
-        return total_cost
-    
+        return sum(self._risk_direct_cost(risk) for risk in financial_risks)
+
     def _calculate_opportunity_costs(self, financial_risks: List[Dict]) -> float:
         """Calculate opportunity costs (time, resources, alternatives)"""
-        opportunity_cost = 0
-        
-        for risk in financial_risks:
-            risk_type = risk.get('type', '')
-            
-            # Opportunity costs for specific risk types
-            if 'Non-Compete' in risk_type:
-                opportunity_cost += 3000  # Lost business opportunities
-            
-            if 'Extended Payment' in risk_type:
-                opportunity_cost += 300  # Cash flow impact
-            
-            if 'Termination' in risk_type:
-                opportunity_cost += 1500  # Contract uncertainty
-        
-        return opportunity_cost
+        return sum(self._risk_opportunity_cost(risk) for risk in financial_risks)
+
+    def simulate_exposure(
+        self,
+        financial_risks: List[Dict],
+        contract_value: float = 10000,
+        trials: int = 100000,
+        seed: Optional[int] = None,
+        chunk_elements: int = 4_000_000
+    ) -> Dict[str, Any]:
+        """
+        Monte Carlo exposure: each risk's cost is lognormal with its median at
+        the point estimate used above and a severity-dependent spread.
+        Trials are drawn in chunks so memory stays flat for many risks.
+        """
+        if not financial_risks or trials <= 0:
+            return {"trials": 0, "mean": 0.0, "p50": 0.0, "p90": 0.0, "p99": 0.0,
+                    "probability_exceeds_contract_value": 0.0}
+
+        medians = np.array([
+            self._risk_direct_cost(r) + self._risk_opportunity_cost(r) for r in financial_risks
+        ], dtype=np.float64)
+        sigmas = np.array([
+            self.severity_volatility.get(r.get('severity', 'Low'), 0.5) for r in financial_risks
+        ], dtype=np.float64)
+        log_medians = np.log(np.maximum(medians, 1e-9))
+
+        rng = np.random.default_rng(seed)
+        totals = np.empty(trials, dtype=np.float64)
+        rows_per_chunk = max(1, chunk_elements // len(medians))
+        for start in range(0, trials, rows_per_chunk):
+            stop = min(trials, start + rows_per_chunk)
+            draws = rng.standard_normal((stop - start, len(medians)))
+            draws *= sigmas
+            draws += log_medians
+            np.exp(draws, out=draws)
+            totals[start:stop] = draws.sum(axis=1)
+
+        p50, p90, p99 = np.percentile(totals, [50, 90, 99])
+        exceeds = float((totals > contract_value).mean()) if contract_value > 0 else 1.0
+        return {
+            "trials": trials,
+            "mean": round(float(totals.mean()), 2),
+            "p50": round(float(p50), 2),
+            "p90": round(float(p90), 2),
+            "p99": round(float(p99), 2),
+            "probability_exceeds_contract_value": round(exceeds, 4)
+        }
     
     def _assess_viability(self, risk_percentage: float) -> str:
         """Assess economic viability based on risk percentage"""
@@ -0,0 +1,213 @@
+"""
+Entity Extractor
+Single-pass extraction of typed, offset-anchored entities (monetary amounts,
+percentages, dates, durations, party names) with the cue words of their
+sentence, so the structure, financial and economic stages read amounts and
+periods instead of re-matching the text
+"""
+import re
+from collections import Counter
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9,
+    "ten": 10, "eleven": 11, "twelve": 12, "fifteen": 15, "twenty": 20, "thirty": 30, "forty": 40,
+    "forty-five": 45, "sixty": 60, "ninety": 90, "hundred": 100,
+}
+MONTHS = ["january", "february", "march", "april", "may", "june", "july", "august", "september",
+          "october", "november", "december"]
+PARTY_ROLES = [
+    "Service Provider", "Company", "Contractor", "Consultant", "Employer", "Employee", "Client", "Customer",
+    "Vendor", "Supplier", "Buyer", "Seller", "Purchaser", "Borrower", "Lender", "Bank", "Licensor",
+    "Licensee", "Landlord", "Tenant", "Lessor", "Lessee", "Guarantor", "Hypothecator", "Distributor", "Partner",
+]
+# Roles of the side a contract is reviewed for (the one buying, hiring or renting); any other role is the counterparty
+OWN_ROLES = {"company", "client", "customer", "employer", "buyer", "purchaser", "licensee", "tenant", "lessee",
+             "borrower"}
+# Stand-in names the legal structure analyzer uses when no party was found
+PLACEHOLDER_PARTIES = {"First Party", "Second Party"}
+CURRENCIES = {"$": "USD", "us$": "USD", "usd": "USD", "dollars": "USD", "₹": "INR", "rs": "INR", "rs.": "INR",
+              "inr": "INR", "rupees": "INR", "€": "EUR", "eur": "EUR", "euros": "EUR", "£": "GBP", "gbp": "GBP",
+              "pounds": "GBP"}
+SCALES = {"thousand": 1e3, "k": 1e3, "lakh": 1e5, "lakhs": 1e5, "million": 1e6, "m": 1e6, "crore": 1e7,
+          "crores": 1e7, "billion": 1e9}
+UNIT_DAYS = {"day": 1, "business_day": 7 / 5, "week": 7, "month": 30, "year": 365}
+
+# Cue words in an entity's sentence that say what it is about
+TAG_CUES = {
+    "penalty": ["penalty", "penalties", "fine", "liquidated damages", "forfeit"],
+    "liability_cap": ["not exceed", "limited to", "cap", "maximum liability", "aggregate liability"],
+    "late_payment": ["late fee", "late payment", "overdue", "interest"],
+    "payment": ["pay", "payment", "invoice", "fee", "salary", "compensation", "remuneration", "net"],
+    "notice": ["notice"],
+    "term": ["term", "period of", "duration", "valid for", "remain in effect", "tenure"],
+}
+
+_NUM = r"\d{1,3}(?:,\d{2,3})+(?:\.\d+)?|\d+(?:\.\d+)?"
+_MONTH = "|".join(MONTHS) + r"|jan|feb|mar|apr|jun|jul|aug|sep|sept|oct|nov|dec"
+_WORDS = "|".join(sorted(NUMBER_WORDS, key=len, reverse=True))
+_ROLES = "|".join(PARTY_ROLES)
+# "per day", "/week", "for each day": the amount is a rate, not a one-off sum
+_RATE = r"\s*(?:/|(?:per|an?|each|every|for\s+each|for\s+every)\s+)(?P<{}>hour|day|week|month|year)s?\b"
+# "within 30 days of invoice", "payable within 45 days", "net 60": a payment period
+_WITHIN_BEFORE = re.compile(r"\bwithin\s*$", re.IGNORECASE)
+_PAYMENT_AFTER = re.compile(
+    r"^\s*(?:of|from|after)\s+(?:the\s+)?(?:receipt\s+of\s+|date\s+of\s+)?(?:the\s+|an?\s+|each\s+|its\s+)?"
+    r"(?:invoices?|invoicing|billing|payment|bill)\b",
+    re.IGNORECASE
+)
+_PAYABLE_BEFORE = re.compile(r"\b(?:paid|payable|due)\s+within\s*$", re.IGNORECASE)
+# Capitalized words on one line, case-sensitive inside the otherwise case-insensitive pattern
+_NAME = r"(?-i:(?:[A-Z][\w&.'-]*,?[ \t]+(?:(?:of|and|&)[ \t]+)?){0,6}[A-Z][\w&.'-]*)"
+
+# One alternation, scanned once; earlier alternatives win at the same position
+ENTITY_PATTERN = re.compile(
+    rf"(?P<date_num>\b(?P<d1>\d{{1,2}})[/.-](?P<d2>\d{{1,2}})[/.-](?P<d3>\d{{4}}|\d{{2}})\b)"
+    rf"|(?P<date_md>\b(?P<md_month>{_MONTH})\.?\s+(?P<md_day>\d{{1,2}})(?:st|nd|rd|th)?,?\s+(?P<md_year>\d{{4}})\b)"
+    rf"|(?P<date_dm>\b(?P<dm_day>\d{{1,2}})(?:st|nd|rd|th)?\s+(?:day\s+of\s+)?(?P<dm_month>{_MONTH})\.?,?\s+(?P<dm_year>\d{{4}})\b)"
+    rf"|(?P<money_pre>(?P<cur_pre>US\$|\$|₹|€|£|\b(?:USD|INR|EUR|GBP|Rs\.?)(?=\s|\d))\s*(?P<amt_pre>{_NUM})"
+    rf"(?:\s*(?P<scale_pre>thousand|lakhs?|million|crores?|billion|k\b|m\b))?(?:/-)?(?:{_RATE.format('rate_pre')})?)"
+    rf"|(?P<money_post>\b(?P<amt_post>{_NUM})\s*(?P<scale_post>thousand|lakhs?|million|crores?|billion)?\s*"
+    rf"(?P<cur_post>dollars|rupees|euros|pounds|USD|INR|EUR|GBP)\b(?:{_RATE.format('rate_post')})?)"
+    rf"|(?P<percent>\b(?P<pct>\d+(?:\.\d+)?)\s*(?:%|percent\b|per\s+cent\b))"
+    rf"|(?P<duration>\b(?P<dur_num>\d+|{_WORDS})(?:\s*\(\s*(?P<dur_paren>\d+)\s*\))?\s*-?\s*"
+    rf"(?P<dur_unit>business\s+days?|calendar\s+days?|working\s+days?|days?|weeks?|months?|years?)\b)"
+    rf"|(?P<net>\bnet[\s-]?(?P<net_days>\d{{1,3}})\b)"
+    rf"|(?P<party_defined>(?P<party_name>{_NAME})\s*\(\s*(?:hereinafter\s+(?:(?:referred\s+to\s+as|called)\s+)?)?"
+    rf"[\"“']?(?:the\s+)?[\"“']?(?P<party_role>{_ROLES})[\"”']?\s*\))"
+    rf"|(?P<party_labeled>\b(?P<label_role>{_ROLES})\s*:\s*(?P<label_name>{_NAME}))",
+    re.IGNORECASE
+)
+_ROLE_LOOKUP = {role.lower(): role for role in PARTY_ROLES}
+
+
+def _number(text: str) -> float:
+    return float(text.replace(",", ""))
+
+
+def _month(name: str) -> int:
+    name = name.lower()
+    return next(i for i, month in enumerate(MONTHS, 1) if month.startswith(name[:3]))
+
+
+class EntityExtractor:
+
+    def __init__(self, day_first: bool = True, cue_window: int = 200):
+        # Ambiguous numeric dates (03/04/2025) read day first, as in Indian and UK contracts
+        self.day_first = day_first
+        # Characters around an entity searched for cue words (clipped to its sentence)
+        self.cue_window = cue_window
+
+    def _date(self, year: int, month: int, day: int) -> Optional[str]:
+        if year < 100:
+            year += 2000
+        try:
+            return date(year, month, day).isoformat()
+        except ValueError:
+            return None
+
+    def _tags(self, text: str, start: int, end: int) -> List[str]:
+        """Cue tags from the entity's sentence"""
+        left = max(text.rfind(". ", 0, start), text.rfind("; ", 0, start), text.rfind("\n", 0, start),
+                   start - self.cue_window)
+        right_candidates = [i for i in (text.find(". ", end), text.find("; ", end), text.find("\n", end)) if i >= 0]
+        right = min(right_candidates + [end + self.cue_window, len(text)])
+        window = text[max(0, left):right].lower()
+        return [tag for tag, cues in TAG_CUES.items()
+                if any(re.search(rf"\b{re.escape(cue)}\b", window) for cue in cues)]
+
+    def _is_payment_period(self, text: str, start: int, end: int) -> bool:
+        """A duration read as payment terms: "within N days of invoice" or "payable within N days" """
+        before = text[max(0, start - 40):start]
+        if not _WITHIN_BEFORE.search(before):
+            return False
+        return bool(_PAYABLE_BEFORE.search(before) or _PAYMENT_AFTER.match(text[end:end + 60]))
+
+    def _entity(self, match: re.Match) -> Optional[Dict[str, Any]]:
+        g = match.groupdict()
+        if g["date_num"]:
+            first, second = int(g["d1"]), int(g["d2"])
+            day, month = (first, second) if (self.day_first and second <= 12) or first > 12 else (second, first)
+            value = self._date(int(g["d3"]), month, day)
+            return {"type": "date", "value": value} if value else None
+        if g["date_md"]:
+            value = self._date(int(g["md_year"]), _month(g["md_month"]), int(g["md_day"]))
+            return {"type": "date", "value": value} if value else None
+        if g["date_dm"]:
+            value = self._date(int(g["dm_year"]), _month(g["dm_month"]), int(g["dm_day"]))
+            return {"type": "date", "value": value} if value else None
+        if g["money_pre"] or g["money_post"]:
+            amount = _number(g["amt_pre"] or g["amt_post"])
+            scale = (g["scale_pre"] or g["scale_post"] or "").lower()
+            currency = CURRENCIES.get((g["cur_pre"] or g["cur_post"]).lower(), "USD")
+            rate = g["rate_pre"] or g["rate_post"]
+            return {"type": "money", "value": amount * SCALES.get(scale, 1), "currency": currency,
+                    "per": rate.lower() if rate else None}
+        if g["percent"]:
+            return {"type": "percentage", "value": float(g["pct"])}
+        if g["duration"]:
+            raw = g["dur_paren"] or g["dur_num"]
+            number = int(raw) if raw.isdigit() else NUMBER_WORDS[raw.lower()]
+            unit = g["dur_unit"].lower().rstrip("s").split()
+            unit = "business_day" if unit[0] in ("business", "working") else unit[-1]
+            return {"type": "duration", "value": number, "unit": unit, "days": round(number * UNIT_DAYS[unit])}
+        if g["net"]:
+            days = int(g["net_days"])
+            return {"type": "duration", "value": days, "unit": "day", "days": days, "net_terms": True,
+                    "payment_terms": True}
+        if g["party_defined"] or g["party_labeled"]:
+            name = (g["party_name"] or g["label_name"]).strip(" ,")
+            role = _ROLE_LOOKUP[(g["party_role"] or g["label_role"]).lower()]
+            return {"type": "party", "value": name, "role": role}
+        return None
+
+    def extract(self, text: str) -> List[Dict[str, Any]]:
+        """Entities in document order: {"type", "text", "start", "end", "value", "tags", ...}"""
+        entities = []
+        for match in ENTITY_PATTERN.finditer(text):
+            entity = self._entity(match)
+            if entity is None:
+                continue
+            entity.update(text=match.group(0), start=match.start(), end=match.end(),
+                          tags=self._tags(text, match.start(), match.end()))
+            if entity.get("net_terms"):
+                entity["tags"] = sorted(set(entity["tags"]) | {"payment"})
+            elif entity["type"] == "duration":
+                entity["payment_terms"] = self._is_payment_period(text, match.start(), match.end())
+            entities.append(entity)
+        return entities
+
+
+def counterparty(parties: Dict[str, str]) -> Optional[str]:
+    """
+    The other side of a contract from its role -> name parties (legalStructure
+    "parties"): the first named party outside OWN_ROLES. None when only
+    placeholders or own-side roles were found.
+    """
+    return next((name for role, name in parties.items()
+                 if name and name not in PLACEHOLDER_PARTIES and role not in OWN_ROLES), None)
+
+
+class DocumentEntities:
+    """Query helpers over one document's extracted entities"""
+
+    def __init__(self, entities: List[Dict[str, Any]]):
+        self.entities = entities
+
+    def of_type(self, entity_type: str, tag: Optional[str] = None) -> List[Dict[str, Any]]:
+        return [e for e in self.entities if e["type"] == entity_type and (tag is None or tag in e["tags"])]
+
+    def parties(self) -> Dict[str, str]:
+        """Role (lowercase, first mention wins) -> party name"""
+        parties: Dict[str, str] = {}
+        for entity in self.of_type("party"):
+            parties.setdefault(entity["role"].lower(), entity["value"])
+        return parties
+
+    def counts(self) -> Dict[str, int]:
+        return dict(Counter(e["type"] for e in self.entities))
+
+
+# Singleton instance
+entity_extractor = EntityExtractor()
@@ -3,7 +3,9 @@ Financial Risk Detector
 Identifies and quantifies financial risks in contracts
 """
 import re
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+
+from insights.entity_extractor import DocumentEntities
 
 class FinancialRiskDetector:
     
@@ -16,17 +18,24 @@ class FinancialRiskDetector:
             'late_payment': ['interest', 'late fee', 'overdue'],
             'price_changes': ['adjust pricing', 'price increase', 'cost escalation']
         }
+        # Currency of the economic model's cost estimates; stated amounts in it are summed
+        self.exposure_currency = "USD"
     
-    def detect_financial_risks(self, clauses: List[Dict], full_text: str) -> Dict[str, Any]:
+    def detect_financial_risks(self, clauses: List[Dict], full_text: str,
+                               entities: Optional[List[Dict]] = None) -> Dict[str, Any]:
         """
         Detects financial risks across the contract
         Returns categorized financial risks with severity
+        With the document's extracted `entities` (see insights/entity_extractor.py),
+        payment terms come from the actual payment periods and penalty risks
+        carry the stated amounts
         """
         
         financial_risks = []
+        index = DocumentEntities(entities) if entities is not None else None
         
         # Analyze payment terms
-        payment_risks = self._analyze_payment_terms(full_text, clauses)
+        payment_risks = self._analyze_payment_terms(full_text, clauses, index)
         financial_risks.extend(payment_risks)
         
         # Detect liability exposures
@@ -34,7 +43,7 @@ class FinancialRiskDetector:
         financial_risks.extend(liability_risks)
         
         # Find penalty clauses
-        penalty_risks = self._find_penalties(full_text)
+        penalty_risks = self._find_penalties(full_text, index)
         financial_risks.extend(penalty_risks)
         
         # Calculate total financial exposure
@@ -47,27 +56,50 @@ class FinancialRiskDetector:
             "severity": self._determine_severity(len(financial_risks), total_exposure)
         }
     
-    def _analyze_payment_terms(self, text: str, clauses: List[Dict]) -> List[Dict]:
+    def _analyze_payment_terms(self, text: str, clauses: List[Dict],
+                               index: Optional[DocumentEntities] = None) -> List[Dict]:
         """Analyze payment-related risks"""
         risks = []
         text_lower = text.lower()
         
         # Check for extended payment terms (Net-60, Net-90)
-        if any(term in text_lower for term in ['net-60', 'net 60', '60 days', 'sixty days']):
-            risks.append({
-                "type": "Extended Payment Terms",
-                "description": "Net-60 payment terms create cash flow risk",
-                "severity": "Medium",
-                "financial_impact": "moderate"
-            })
-        
-        if any(term in text_lower for term in ['net-90', 'net 90', '90 days', 'ninety days']):
-            risks.append({
-                "type": "Extended Payment Terms",
-                "description": "Net-90 payment terms create significant cash flow risk",
-                "severity": "High",
-                "financial_impact": "high"
-            })
+        if index is not None:
+            # Only net terms and "within N days of invoice" periods; a notice period never counts
+            periods = [e["days"] for e in index.of_type("duration")
+                       if e.get("payment_terms") and "notice" not in e["tags"]]
+            days = max(periods, default=0)
+            if days >= 90:
+                risks.append({
+                    "type": "Extended Payment Terms",
+                    "description": f"Net-{days} payment terms create significant cash flow risk",
+                    "severity": "High",
+                    "financial_impact": "high",
+                    "days": days
+                })
+            elif days >= 60:
+                risks.append({
+                    "type": "Extended Payment Terms",
+                    "description": f"Net-{days} payment terms create cash flow risk",
+                    "severity": "Medium",
+                    "financial_impact": "moderate",
+                    "days": days
+                })
+        else:
+            if any(term in text_lower for term in ['net-60', 'net 60', '60 days', 'sixty days']):
+                risks.append({
+                    "type": "Extended Payment Terms",
+                    "description": "Net-60 payment terms create cash flow risk",
+                    "severity": "Medium",
+                    "financial_impact": "moderate"
+                })
+
+            if any(term in text_lower for term in ['net-90', 'net 90', '90 days', 'ninety days']):
+                risks.append({
+                    "type": "Extended Payment Terms",
+                    "description": "Net-90 payment terms create significant cash flow risk",
+                    "severity": "High",
+                    "financial_impact": "high"
+                })
         
         # Check for conditional payment
         if 'subject to approval' in text_lower or 'may withhold' in text_lower:
@@ -108,23 +140,43 @@ class FinancialRiskDetector:
         
         return risks
     
-    def _find_penalties(self, text: str) -> List[Dict]:
+    def _find_penalties(self, text: str, index: Optional[DocumentEntities] = None) -> List[Dict]:
         """Find penalty and fine clauses"""
         risks = []
         text_lower = text.lower()
         
-        # Look for penalty amounts
-        penalty_pattern = r'\$\s*([0-9,]+(?:\.\d{2})?)\s*(?:penalty|fine|liquidated damages)'
-        matches = re.findall(penalty_pattern, text_lower)
-        
-        if matches:
-            risks.append({
-                "type": "Penalty Clause",
-                "description": f"Contract includes penalty provisions",
-                "severity": "Medium",
-                "financial_impact": "moderate"
-            })
-        
+        if index is not None:
+            # Amounts stated in a penalty sentence, kept so the economic model can use them
+            matches = index.of_type("money", "penalty")
+            if matches:
+                amounts = [{"value": e["value"], "currency": e["currency"], "per": e.get("per")} for e in matches]
+                # Only one-off sums in the economic model's currency add up to a cost; rates
+                # ("$500 per day") and other currencies are reported but not summed
+                totals = [a["value"] for a in amounts
+                          if a["per"] is None and a["currency"] == self.exposure_currency]
+                risk = {
+                    "type": "Penalty Clause",
+                    "description": f"Contract includes {len(amounts)} stated penalty amount(s)",
+                    "severity": "Medium",
+                    "financial_impact": "moderate",
+                    "amounts": amounts
+                }
+                if totals:
+                    risk.update(amount=sum(totals), currency=self.exposure_currency)
+                risks.append(risk)
+        else:
+            # Look for penalty amounts
+            penalty_pattern = r'\$\s*([0-9,]+(?:\.\d{2})?)\s*(?:penalty|fine|liquidated damages)'
+            matches = re.findall(penalty_pattern, text_lower)
+
+            if matches:
+                risks.append({
+                    "type": "Penalty Clause",
+                    "description": f"Contract includes penalty provisions",
+                    "severity": "Medium",
+                    "financial_impact": "moderate"
+                })
+
         # General penalty language
         if any(word in text_lower for word in ['penalty', 'liquidated damages', 'forfeit']):
             if not matches:  # Don't duplicate if already found above
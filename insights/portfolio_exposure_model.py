@@ -0,0 +1,217 @@
+"""
+Portfolio Exposure Model
+Aggregates economic exposure across thousands of contracts from columnar risk
+data, with correlated Monte Carlo draws for contracts sharing a counterparty
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from insights.economic_impact_model import economic_impact_model as default_model
+from insights.entity_extractor import counterparty as resolve_counterparty
+
+
+def _column(data: Any, name: str) -> np.ndarray:
+    """Read one column from a dict of sequences, a pandas DataFrame or a pyarrow Table"""
+    if hasattr(data, "column") and hasattr(data, "num_rows"):
+        return data.column(name).to_numpy(zero_copy_only=False)
+    return np.asarray(data[name])
+
+
+def _has_column(data: Any, name: str) -> bool:
+    if hasattr(data, "column_names"):
+        return name in data.column_names
+    return name in data
+
+
+class PortfolioExposureModel:
+
+    def __init__(self, economic_model=None, counterparty_correlation: float = 0.5):
+        self.economic_model = economic_model or default_model
+        # Share of log-cost variance driven by a common per-counterparty factor
+        self.counterparty_correlation = counterparty_correlation
+
+    def _risk_costs(self, risk_types: np.ndarray, severities: np.ndarray, amounts: Optional[np.ndarray] = None,
+                    currencies: Optional[np.ndarray] = None, days: Optional[np.ndarray] = None):
+        """
+        Point cost and volatility per risk row, evaluated once per unique (type, severity).
+        Rows with a stated amount or payment period are costed one by one, as the
+        per-contract economic model does, so portfolio and contract totals agree.
+        """
+        model = self.economic_model
+        types_u, type_idx = np.unique(risk_types, return_inverse=True)
+        sev_u, sev_idx = np.unique(severities, return_inverse=True)
+
+        cost_table = np.array([
+            [model._risk_direct_cost({"type": t, "severity": s}) + model._risk_opportunity_cost({"type": t})
+             for s in sev_u]
+            for t in types_u
+        ], dtype=np.float64)
+        sigma_table = np.array([model.severity_volatility.get(s, 0.5) for s in sev_u], dtype=np.float64)
+        costs = cost_table[type_idx, sev_idx]
+
+        stated = np.zeros(len(risk_types), dtype=bool)
+        if amounts is not None:
+            stated |= np.nan_to_num(amounts, nan=0.0) > 0
+        if days is not None:
+            stated |= days > 0
+        for i in np.flatnonzero(stated):
+            risk = {"type": risk_types[i], "severity": severities[i]}
+            if amounts is not None and amounts[i] > 0:
+                risk["amount"] = float(amounts[i])
+                if currencies is not None and currencies[i]:
+                    risk["currency"] = str(currencies[i])
+            if days is not None and days[i] > 0:
+                risk["days"] = int(days[i])
+            costs[i] = model._risk_direct_cost(risk) + model._risk_opportunity_cost(risk)
+
+        return costs, sigma_table[sev_idx]
+
+    def aggregate(
+        self,
+        risks: Any,
+        simulate: bool = True,
+        trials: int = 10000,
+        seed: Optional[int] = None,
+        top_counterparties: int = 20,
+        chunk_elements: int = 8_000_000
+    ) -> Dict[str, Any]:
+        """
+        `risks` is columnar with one row per detected financial risk:
+            contract_id, counterparty, type, severity[, contract_value, amount, currency, days]
+        (amount is NaN and days 0 where the contract states none)
+        Returns portfolio and per-counterparty exposure; with simulate=True
+        also P50/P90/P99 portfolio exposure and per-counterparty P99.
+        """
+        contract_ids = _column(risks, "contract_id").astype(str)
+        counterparties = _column(risks, "counterparty").astype(str)
+        risk_types = _column(risks, "type").astype(str)
+        severities = _column(risks, "severity").astype(str)
+
+        if len(contract_ids) == 0:
+            return {"total_risk_cost": 0.0, "contracts": 0, "counterparties": {}, "simulation": None}
+
+        costs, sigmas = self._risk_costs(
+            risk_types, severities,
+            amounts=_column(risks, "amount").astype(np.float64) if _has_column(risks, "amount") else None,
+            currencies=_column(risks, "currency").astype(str) if _has_column(risks, "currency") else None,
+            days=_column(risks, "days").astype(np.int64) if _has_column(risks, "days") else None
+        )
+
+        # Vectorized group-bys
+        contract_u, contract_idx = np.unique(contract_ids, return_inverse=True)
+        cp_u, cp_idx = np.unique(counterparties, return_inverse=True)
+        per_contract = np.bincount(contract_idx, weights=costs, minlength=len(contract_u))
+        per_counterparty = np.bincount(cp_idx, weights=costs, minlength=len(cp_u))
+        contracts_per_cp = np.bincount(
+            np.unique(np.stack([cp_idx, contract_idx]), axis=1)[0], minlength=len(cp_u)
+        )
+
+        result: Dict[str, Any] = {
+            "contracts": int(len(contract_u)),
+            "risk_rows": int(len(costs)),
+            "total_risk_cost": round(float(costs.sum()), 2),
+            "mean_risk_cost_per_contract": round(float(per_contract.mean()), 2),
+        }
+
+        if _has_column(risks, "contract_value"):
+            values = _column(risks, "contract_value").astype(np.float64)
+            contract_values = np.zeros(len(contract_u))
+            contract_values[contract_idx] = values  # one value per contract; last row wins
+            total_value = contract_values.sum()
+            result["total_contract_value"] = round(float(total_value), 2)
+            result["risk_percentage"] = round(float(costs.sum() / total_value * 100), 2) if total_value > 0 else 0.0
+
+        order = np.argsort(per_counterparty)[::-1][:top_counterparties]
+        result["counterparties"] = {
+            str(cp_u[i]): {
+                "risk_cost": round(float(per_counterparty[i]), 2),
+                "contracts": int(contracts_per_cp[i])
+            }
+            for i in order
+        }
+
+        result["simulation"] = (
+            self._simulate(costs, sigmas, cp_idx, len(cp_u), trials, seed, chunk_elements, cp_u, order)
+            if simulate else None
+        )
+        return result
+
+    def _simulate(self, costs, sigmas, cp_idx, n_counterparties, trials, seed, chunk_elements, cp_u, order):
+        """
+        log cost = log median + sigma * (sqrt(rho) * Z_counterparty + sqrt(1 - rho) * Z_risk)
+        Risks are sorted by counterparty so per-counterparty totals are a reduceat.
+        """
+        rho = self.counterparty_correlation
+        sort = np.argsort(cp_idx, kind="stable")
+        log_medians = np.log(np.maximum(costs[sort], 1e-9))
+        sigmas = sigmas[sort]
+        cp_sorted = cp_idx[sort]
+        group_starts = np.flatnonzero(np.r_[True, cp_sorted[1:] != cp_sorted[:-1]])
+
+        rng = np.random.default_rng(seed)
+        n = len(costs)
+        portfolio_totals = np.empty(trials)
+        # Only the reported counterparties are kept per trial, so memory does not scale with portfolio size
+        top_totals = np.empty((trials, len(order)))
+        rows_per_chunk = max(1, chunk_elements // n)
+
+        for start in range(0, trials, rows_per_chunk):
+            stop = min(trials, start + rows_per_chunk)
+            shared = rng.standard_normal((stop - start, n_counterparties))
+            draws = rng.standard_normal((stop - start, n))
+            draws *= np.sqrt(1 - rho)
+            draws += np.sqrt(rho) * shared[:, cp_sorted]
+            draws *= sigmas
+            draws += log_medians
+            np.exp(draws, out=draws)
+            chunk_cp_totals = np.add.reduceat(draws, group_starts, axis=1)
+            top_totals[start:stop] = chunk_cp_totals[:, order]
+            portfolio_totals[start:stop] = chunk_cp_totals.sum(axis=1)
+
+        p50, p90, p99 = np.percentile(portfolio_totals, [50, 90, 99])
+        cp_p99 = np.percentile(top_totals, 99, axis=0)
+        return {
+            "trials": trials,
+            "counterparty_correlation": rho,
+            "mean": round(float(portfolio_totals.mean()), 2),
+            "p50": round(float(p50), 2),
+            "p90": round(float(p90), 2),
+            "p99": round(float(p99), 2),
+            "counterparty_p99": {str(cp_u[i]): round(float(v), 2) for i, v in zip(order, cp_p99)}
+        }
+
+
+def risks_from_results(records: Iterable[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """
+    Columnar risk rows from batch runner records ({"source", "result", "metadata"}).
+    The counterparty comes from metadata, else the detected non-own party under any
+    role; contracts with neither get their own "unknown:<contract_id>" group, so
+    they share no counterparty factor with unrelated contracts.
+    """
+    columns: Dict[str, List[Any]] = {"contract_id": [], "counterparty": [], "type": [], "severity": [], "contract_value": [],
+                                     "amount": [], "currency": [], "days": []}
+    for record in records:
+        result = record["result"]
+        metadata = record.get("metadata") or {}
+        parties = result.get("legalStructure", {}).get("parties", {})
+        contract_id = result.get("documentId") or record.get("source")
+        counterparty = (metadata.get("counterparty") or resolve_counterparty(parties)
+                        or f"unknown:{contract_id}")
+        contract_value = result.get("economicImpact", {}).get("contractValue", 0)
+        for risk in result.get("financialRisks", {}).get("risks", []):
+            columns["contract_id"].append(contract_id)
+            columns["counterparty"].append(counterparty)
+            columns["type"].append(risk.get("type", ""))
+            columns["severity"].append(risk.get("severity", "Low"))
+            columns["contract_value"].append(contract_value)
+            # Stated penalty amount and payment period, which the economic model prices directly
+            amount = risk.get("amount")
+            columns["amount"].append(float(amount) if isinstance(amount, (int, float)) else float("nan"))
+            columns["currency"].append(risk.get("currency") or "")
+            columns["days"].append(int(risk.get("days") or 0))
+    return columns
+
+
+# Singleton instance
+portfolio_exposure_model = PortfolioExposureModel()
@@ -1,17 +1,326 @@
-from fastapi import FastAPI, UploadFile, File
+import hashlib
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
 
-app = FastAPI()
+from fastapi import FastAPI, UploadFile, File, Form, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
-@app.post("/analyze")
-async def analyze_contract(file: UploadFile = File(...)):
-    return {
-        "riskScore": 68,
-        "risks": [
-            {
-                "clause": "The company may terminate the agreement at any time.",
-                "category": "Unilateral Termination Risk",
-                "confidence": 0.91,
-                "explanation": "Allows termination without compensation."
-            }
-        ]
+from pipeline.artifact_store import hash_file
+from pipeline.contract_pipeline import contract_pipeline
+from pipeline.job_scheduler import job_scheduler, estimate_file_cost, estimate_text_cost
+from pipeline.model_manager import model_manager
+from pipeline.response_cache import response_cache, pipeline_version, etag_matches
+from pipeline.review_queue import review_queue
+from retrieval.clause_index import clause_index
+from segmentation.language_detector import language_detector
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Register both models with the manager; MODEL_PRELOAD=ocr,classifier keeps them warm from boot
+    import ocr  # noqa: F401
+    import classification.risk_classifier  # noqa: F401
+    await run_in_threadpool(model_manager.preload)
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Directory the Node gateway writes uploads to; /analyze/path only reads files inside it
+SHARED_UPLOAD_DIR = os.path.realpath(
+    os.environ.get("SHARED_UPLOAD_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "uploads"))
+)
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+async def _spool(chunks: AsyncIterator[bytes], suffix: str) -> tuple:
+    """Write a body to a temp file (doctr needs a path), hashing it on the way"""
+    digest = hashlib.sha256()
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        async for chunk in chunks:
+            digest.update(chunk)
+            tmp.write(chunk)
+    return tmp.name, digest.hexdigest()
+
+
+async def _upload_chunks(file: UploadFile) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await file.read(1024 * 1024)
+        if not chunk:
+            break
+        yield chunk
+
+
+def _shared_upload_path(path: str) -> str:
+    """Resolve a gateway-provided path, refusing anything outside SHARED_UPLOAD_DIR"""
+    resolved = os.path.realpath(path)
+    if os.path.commonpath([resolved, SHARED_UPLOAD_DIR]) != SHARED_UPLOAD_DIR:
+        raise HTTPException(status_code=403, detail="Path is outside the shared upload directory")
+    if not os.path.isfile(resolved):
+        raise HTTPException(status_code=404, detail="File not found")
+    return resolved
+
+
+def _cached_analysis(doc_id: str, contract_value: Optional[float], previous_doc_id: Optional[str] = None):
+    # A previous revision adds a revision delta, so it is part of the key when given
+    params = {"previous_doc_id": previous_doc_id} if previous_doc_id else {}
+    key = response_cache.cache_key(doc_id, pipeline_version(), contract_value=contract_value, **params)
+    return key, response_cache.get_analysis(key)
+
+
+async def _scheduled(tenant: Optional[str], cost: dict, fn, *args) -> tuple:
+    """
+    Run a pipeline call as a scheduled job; returns (analysis, scheduling headers).
+    Tenant admission is awaited before a threadpool thread is taken.
+    """
+    tenant = tenant or "default"
+    async with job_scheduler.admission(tenant) as submitted_at:
+        analysis, job = await run_in_threadpool(job_scheduler.run, tenant, cost, fn, *args, submitted_at=submitted_at)
+    return analysis, {
+        "X-Scheduling-Lane": job["lane"],
+        "X-Estimated-Cost": str(job["estimatedCost"]),
+        "X-Queue-Wait-Seconds": str(job["queueWaitSeconds"])
     }
+
+
+async def _analyze_path(file_path: str, doc_id: str, contract_value: Optional[float],
+                        if_none_match: Optional[str], tenant: Optional[str] = None,
+                        previous_doc_id: Optional[str] = None) -> Response:
+    """Cached or fresh analysis of a file already on local disk"""
+    key, analysis = _cached_analysis(doc_id, contract_value, previous_doc_id)
+    etag = response_cache.etag(key)
+    if analysis is not None and etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+    headers = {"ETag": etag}
+    if analysis is None:
+        cost = await run_in_threadpool(estimate_file_cost, file_path)
+        analysis, scheduling = await _scheduled(
+            tenant, cost, contract_pipeline.analyze_file, file_path, contract_value, previous_doc_id, doc_id
+        )
+        headers.update(scheduling)
+        response_cache.put_analysis(key, analysis)
+    return JSONResponse(analysis, headers=headers)
+
+
+@app.post("/analyze")
+async def analyze_contract(
+    file: Optional[UploadFile] = File(None),
+    text: Optional[str] = Form(None),
+    contract_value: Optional[float] = Form(None),
+    previous_doc_id: Optional[str] = Form(None),
+    if_none_match: Optional[str] = Header(None),
+    x_tenant_id: Optional[str] = Header(None)
+):
+    """
+    Analyze an uploaded file or pasted text. `previous_doc_id` (the
+    documentId of the prior revision) reclassifies only changed clauses and
+    adds a revisionDelta.
+    """
+    if file is None and not text:
+        raise HTTPException(status_code=400, detail="Provide a contract file or text")
+
+    if file is None:
+        doc_id = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        key, analysis = _cached_analysis(doc_id, contract_value, previous_doc_id)
+        etag = response_cache.etag(key)
+        if analysis is not None and etag_matches(if_none_match, etag):
+            return _not_modified(etag)
+        headers = {"ETag": etag}
+        if analysis is None:
+            analysis, scheduling = await _scheduled(
+                x_tenant_id, estimate_text_cost(text), contract_pipeline.analyze_text, text, contract_value,
+                previous_doc_id
+            )
+            headers.update(scheduling)
+            response_cache.put_analysis(key, analysis)
+        return JSONResponse(analysis, headers=headers)
+
+    suffix = os.path.splitext(file.filename or "")[1] or ".pdf"
+    tmp_path, doc_id = await _spool(_upload_chunks(file), suffix)
+    try:
+        return await _analyze_path(tmp_path, doc_id, contract_value, if_none_match, x_tenant_id, previous_doc_id)
+    finally:
+        os.unlink(tmp_path)
+
+
+STREAM_SUFFIXES = {"application/pdf": ".pdf", "image/png": ".png", "image/jpeg": ".jpg"}
+
+
+class SharedFileRequest(BaseModel):
+    path: str
+    contract_value: Optional[float] = None
+    # documentId of the prior revision, for incremental reclassification and a revision delta
+    previous_doc_id: Optional[str] = None
+
+
+@app.post("/analyze/path")
+async def analyze_shared_file(
+    request: SharedFileRequest,
+    if_none_match: Optional[str] = Header(None),
+    x_tenant_id: Optional[str] = Header(None)
+):
+    """
+    Analyze a file the gateway already wrote to the shared upload directory,
+    reading it in place instead of receiving another copy over HTTP
+    """
+    file_path = _shared_upload_path(request.path)
+    doc_id = await run_in_threadpool(hash_file, file_path)
+    return await _analyze_path(file_path, doc_id, request.contract_value, if_none_match, x_tenant_id,
+                               request.previous_doc_id)
+
+
+@app.post("/analyze/stream")
+async def analyze_stream(
+    request: Request,
+    contract_value: Optional[float] = None,
+    previous_doc_id: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    x_tenant_id: Optional[str] = Header(None)
+):
+    """
+    Analyze a raw (non-multipart) request body, e.g. application/pdf.
+    The body is written once to a temp file as it arrives.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    suffix = STREAM_SUFFIXES.get(content_type, ".pdf")
+    tmp_path, doc_id = await _spool(request.stream(), suffix)
+    try:
+        if os.path.getsize(tmp_path) == 0:
+            raise HTTPException(status_code=400, detail="Empty request body")
+        return await _analyze_path(tmp_path, doc_id, contract_value, if_none_match, x_tenant_id, previous_doc_id)
+    finally:
+        os.unlink(tmp_path)
+
+
+@app.get("/analysis/{document_id}")
+async def get_analysis(
+    document_id: str,
+    contract_value: Optional[float] = None,
+    if_none_match: Optional[str] = Header(None)
+):
+    key, analysis = _cached_analysis(document_id, contract_value)
+    etag = response_cache.etag(key)
+    if analysis is not None and etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+
+    if analysis is None:
+        # Pipeline version changed since the last view: rebuild from stored stage artifacts
+        analysis = await run_in_threadpool(contract_pipeline.reanalyze, document_id, contract_value)
+        if analysis is None:
+            raise HTTPException(status_code=404, detail="Unknown document")
+        response_cache.put_analysis(key, analysis)
+
+    return JSONResponse(analysis, headers={"ETag": etag})
+
+
+@app.get("/report/{document_id}")
+async def get_report(
+    document_id: str,
+    contract_value: Optional[float] = None,
+    if_none_match: Optional[str] = Header(None)
+):
+    key, analysis = _cached_analysis(document_id, contract_value)
+    etag = response_cache.etag(response_cache.report_key(key), kind="report")
+    if etag_matches(if_none_match, etag) and response_cache.get_report(key) is not None:
+        return _not_modified(etag)
+
+    pdf_bytes = response_cache.get_report(key)
+    if pdf_bytes is None:
+        if analysis is None:
+            analysis = await run_in_threadpool(contract_pipeline.reanalyze, document_id, contract_value)
+            if analysis is None:
+                raise HTTPException(status_code=404, detail="Unknown document")
+            response_cache.put_analysis(key, analysis)
+
+        from reporting.intelligence_report_generator import intelligence_report_generator
+        pdf_bytes = await run_in_threadpool(
+            lambda: b"".join(intelligence_report_generator.stream_report(analysis))
+        )
+        response_cache.put_report(key, pdf_bytes)
+
+    return Response(
+        pdf_bytes,
+        media_type="application/pdf",
+        headers={
+            "ETag": etag,
+            "Content-Disposition": f'inline; filename="contract-report-{document_id[:12]}.pdf"'
+        }
+    )
+
+
+@app.get("/clauses/similar")
+async def similar_clauses(
+    text: str,
+    k: int = 10,
+    n_probe: int = 8,
+    exclude_document_id: Optional[str] = None
+):
+    """Top-k most similar indexed clauses (with document ids) to the given clause text"""
+    if not text.strip():
+        raise HTTPException(status_code=400, detail="Provide clause text")
+
+    def search():
+        from classification.risk_classifier import risk_classifier
+        query = risk_classifier.embed_clauses([text])[0]
+        return clause_index.search(query, k=min(k, 100), n_probe=n_probe, exclude_doc=exclude_document_id)
+
+    return {"query": text, "results": await run_in_threadpool(search)}
+
+
+@app.get("/entities/{document_id}")
+async def document_entities(document_id: str, type: Optional[str] = None, tag: Optional[str] = None):
+    """Extracted entities of an analyzed document, optionally of one type and/or carrying a cue tag"""
+    record = await run_in_threadpool(contract_pipeline.store.load, document_id, "entities")
+    if record is None:
+        raise HTTPException(status_code=404, detail="Unknown document")
+    entities = [e for e in record["data"]
+                if (type is None or e["type"] == type) and (tag is None or tag in e["tags"])]
+    return {"documentId": document_id, "entities": entities}
+
+
+class ReviewLabel(BaseModel):
+    label: str
+    reviewer: Optional[str] = None
+
+
+@app.get("/review")
+async def pending_reviews(limit: int = 50):
+    """Clauses the classifier abstained on, least certain first"""
+    return {"stats": review_queue.stats(), "items": review_queue.pending(limit=min(limit, 500))}
+
+
+@app.post("/review/{document_id}/{clause_index}")
+async def resolve_review(document_id: str, clause_index: int, request: ReviewLabel):
+    """Record the reviewer's label; resolved labels are used the next time calibration is fitted"""
+    from classification.early_exit import RISK_PRIORITY
+    if request.label not in RISK_PRIORITY:
+        raise HTTPException(status_code=400, detail=f"Label must be one of: {', '.join(RISK_PRIORITY)}")
+    resolution = review_queue.resolve(document_id, clause_index, request.label, request.reviewer)
+    if resolution is None:
+        raise HTTPException(status_code=404, detail="Clause is not in the review queue")
+    return resolution
+
+
+@app.get("/metrics/models")
+async def model_metrics():
+    """Loaded models, resident memory and recent load/unload events"""
+    return model_manager.metrics()
+
+
+@app.get("/metrics/languages")
+async def language_metrics():
+    """Clauses, characters and classification throughput per detected language and route"""
+    return language_detector.metrics()
+
+
+@app.get("/metrics/scheduler")
+async def scheduler_metrics():
+    """Free model slots, queued chunks per lane, running jobs per tenant and recent job waits"""
+    return job_scheduler.metrics()
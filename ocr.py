@@ -1,22 +1,172 @@
-from doctr.io import DocumentFile
-from doctr.models import ocr_predictor
+import os
 
-ocr_model = ocr_predictor(
-    det_arch="db_resnet50",
-    reco_arch="crnn_vgg16_bn",
-    pretrained=True
-)
+from pipeline.model_manager import model_manager, ManagedModel
+from pipeline.torch_threads import configure_torch_threads
+from segmentation.ocr_cleanup import ocr_cleanup
 
-def extract_text(file_path: str) -> str:
-    doc = DocumentFile.from_pdf(file_path)
-    result = ocr_model(doc)
+# Words the fast recognizer reads below this confidence are re-read by the strong recognizer
+LOW_CONFIDENCE = float(os.environ.get("OCR_LOW_CONFIDENCE", 0.6))
+# Render scale for re-reading PDF regions (doctr renders pages at scale 2)
+HIRES_SCALE = float(os.environ.get("OCR_HIRES_SCALE", 4))
+
+
+def load_ocr_model():
+    # Thread settings must be in place before doctr imports torch and builds the predictor
+    configure_torch_threads()
+    from doctr.models import ocr_predictor
+    return ocr_predictor(
+        det_arch="db_resnet50",
+        reco_arch="crnn_vgg16_bn",
+        pretrained=True
+    )
+
+
+def load_strong_recognizer():
+    """Slower, more accurate word recognizer, only used on low-confidence words"""
+    configure_torch_threads()
+    from doctr.models import recognition_predictor
+    return recognition_predictor("parseq", pretrained=True)
+
+
+# Loaded on first use and unloaded when idle (see pipeline/model_manager.py)
+model_manager.register("ocr", load_ocr_model)
+model_manager.register("ocr_strong", load_strong_recognizer)
+ocr_model = ManagedModel(model_manager, "ocr")
+strong_recognizer = ManagedModel(model_manager, "ocr_strong")
+
+
+def is_image(file_path: str) -> bool:
+    """Image uploads are recognized by suffix; anything else is read as a PDF"""
+    return file_path.lower().endswith((".png", ".jpg", ".jpeg"))
+
+
+def load_pages(file_path: str) -> list:
+    """Decoded page images of a PDF (or a single image file)"""
+    from doctr.io import DocumentFile
+    if is_image(file_path):
+        return DocumentFile.from_images(file_path)
+    return DocumentFile.from_pdf(file_path)
+
+
+def render_pages(file_path: str, indices: list, scale: float = HIRES_SCALE) -> dict:
+    """Selected PDF pages re-rendered at a higher scale, {page index: RGB array}"""
+    import pypdfium2 as pdfium
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        return {i: pdf[i].render(scale=scale, rev_byteorder=True).to_numpy() for i in indices}
+    finally:
+        pdf.close()
+
+
+def _line_record(words: list, geometry) -> dict:
+    return {
+        "text": " ".join(word["value"] for word in words),
+        "geometry": geometry,
+        # Character-weighted, so a misread long word counts more than a misread "a"
+        "confidence": round(
+            sum(w["confidence"] * len(w["value"]) for w in words) / max(1, sum(len(w["value"]) for w in words)), 4
+        ),
+        "words": words
+    }
 
-    lines = []
+
+def ocr_page_lines(pages: list) -> list:
+    """
+    Per page, its lines in reading order as {"text", "geometry", "confidence",
+    "words"} (geometry in page fractions; words carry their own value,
+    confidence and geometry)
+    """
+    result = ocr_model(pages)
+
+    page_lines = []
 
     for page in result.pages:
+        lines = []
         for block in page.blocks:
             for line in block.lines:
-                text = " ".join(word.value for word in line.words)
-                lines.append(text)
+                words = [
+                    {
+                        "value": word.value,
+                        "confidence": round(float(word.confidence), 4),
+                        "geometry": tuple(tuple(point) for point in word.geometry)
+                    }
+                    for word in line.words
+                ]
+                lines.append(_line_record(words, tuple(tuple(point) for point in line.geometry)))
+        page_lines.append(lines)
+
+    return page_lines
+
+
+def _crop(image, geometry, pad: float = 0.002):
+    height, width = image.shape[:2]
+    (x0, y0), (x1, y1) = geometry
+    top, bottom = max(0, int((y0 - pad) * height)), min(height, int((y1 + pad) * height) + 1)
+    left, right = max(0, int((x0 - pad) * width)), min(width, int((x1 + pad) * width) + 1)
+    return image[top:bottom, left:right]
+
+
+def rerecognize(file_path: str, pages: list, page_lines: list, first_page: int = 0,
+                threshold: float = LOW_CONFIDENCE) -> int:
+    """
+    Re-read words below `threshold` with the strong recognizer, from PDF pages
+    re-rendered at HIRES_SCALE when possible. A new reading replaces the old
+    one only when it is more confident. Updates `page_lines` in place and
+    returns the number of words re-read.
+    """
+    targets = [
+        (p, l, w)
+        for p, lines in enumerate(page_lines)
+        for l, line in enumerate(lines)
+        for w, word in enumerate(line["words"])
+        if word["confidence"] < threshold
+    ]
+    if not targets:
+        return 0
 
-    return "\n".join(lines)
+    images = {}
+    if not is_image(file_path):
+        try:
+            rendered = render_pages(file_path, sorted({first_page + p for p, _, _ in targets}))
+            images = {index - first_page: image for index, image in rendered.items()}
+        except (ImportError, OSError, RuntimeError):
+            images = {}
+
+    crops = [
+        _crop(images.get(p, pages[p]), page_lines[p][l]["words"][w]["geometry"])
+        for p, l, w in targets
+    ]
+    readings = strong_recognizer(crops)
+
+    changed_lines = set()
+    for (p, l, w), (value, confidence) in zip(targets, readings):
+        word = page_lines[p][l]["words"][w]
+        word["rerecognized"] = True
+        if value and confidence > word["confidence"]:
+            word["value"], word["confidence"] = value, round(float(confidence), 4)
+            changed_lines.add((p, l))
+    for p, l in changed_lines:
+        line = page_lines[p][l]
+        page_lines[p][l] = _line_record(line["words"], line["geometry"])
+    return len(targets)
+
+
+def page_quality(lines: list, threshold: float = LOW_CONFIDENCE) -> dict:
+    """Character-weighted mean word confidence of a page, after re-recognition"""
+    words = [word for line in lines for word in line["words"]]
+    chars = sum(len(word["value"]) for word in words)
+    return {
+        "quality": round(sum(w["confidence"] * len(w["value"]) for w in words) / chars, 4) if chars else None,
+        "words": len(words),
+        "low_confidence_words": sum(1 for w in words if w["confidence"] < threshold),
+        "rerecognized_words": sum(1 for w in words if w.get("rerecognized"))
+    }
+
+
+def extract_text(file_path: str) -> str:
+    """Cleaned text: no running headers/footers or page numbers, wrapped lines merged"""
+    pages = load_pages(file_path)
+    page_lines = ocr_page_lines(pages)
+    rerecognize(file_path, pages, page_lines)
+    text, _ = ocr_cleanup.clean(page_lines)
+    return text
@@ -0,0 +1,113 @@
+"""
+Artifact Store
+Persists the output of each pipeline stage per document version
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def hash_bytes(data: bytes) -> str:
+    """Content hash used as the document version id"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Hash a file in chunks so large scans are never fully buffered"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+_source_hash_cache: Dict[str, str] = {}
+
+
+def source_hash(relative_path: str) -> str:
+    """Hash of a module's source file, so editing stage logic invalidates its artifacts"""
+    if relative_path not in _source_hash_cache:
+        with open(os.path.join(ROOT_DIR, relative_path), "rb") as f:
+            _source_hash_cache[relative_path] = hash_bytes(f.read())
+    return _source_hash_cache[relative_path]
+
+
+def fingerprint(*parts: Any) -> str:
+    """Stable hash over code hashes, config and upstream fingerprints"""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class ArtifactStore:
+
+    def __init__(self, root: str = os.path.join(ROOT_DIR, "artifacts")):
+        self.root = root
+
+    def _path(self, doc_id: str, stage: str) -> str:
+        return os.path.join(self.root, doc_id, f"{stage}.json")
+
+    def get(self, doc_id: str, stage: str, stage_fingerprint: str) -> Optional[Any]:
+        """
+        Returns the stored stage output, or None when it is missing or was
+        produced under a different fingerprint
+        """
+        record = self.load(doc_id, stage)
+        if record is None or record.get("fingerprint") != stage_fingerprint:
+            return None
+        return record.get("data")
+
+    def load(self, doc_id: str, stage: str) -> Optional[Dict[str, Any]]:
+        """Returns the full stored record (fingerprint, meta, data) regardless of fingerprint"""
+        path = self._path(doc_id, stage)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, doc_id: str, stage: str, stage_fingerprint: str, data: Any,
+            meta: Optional[Dict[str, Any]] = None) -> None:
+        path = self._path(doc_id, stage)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        record = {
+            "stage": stage,
+            "fingerprint": stage_fingerprint,
+            "created_at": datetime.now().isoformat(),
+            "meta": meta or {},
+            "data": data
+        }
+        # Write to a temp file first so a crash never leaves a half-written artifact
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f)
+        os.replace(tmp_path, path)
+
+    def documents(self) -> Iterator[str]:
+        """Ids of every stored document"""
+        if not os.path.isdir(self.root):
+            return
+        for name in sorted(os.listdir(self.root)):
+            if os.path.isdir(os.path.join(self.root, name)):
+                yield name
+
+    def stages(self, doc_id: str) -> Dict[str, str]:
+        """Lists stored stages and their fingerprints for a document version"""
+        doc_dir = os.path.join(self.root, doc_id)
+        if not os.path.isdir(doc_dir):
+            return {}
+        stored = {}
+        for name in sorted(os.listdir(doc_dir)):
+            if name.endswith(".json"):
+                with open(os.path.join(doc_dir, name), "r", encoding="utf-8") as f:
+                    stored[name[:-5]] = json.load(f).get("fingerprint")
+        return stored
+
+
+# Singleton instance
+artifact_store = ArtifactStore()
@@ -0,0 +1,223 @@
+"""
+Batch Runner
+Analyzes a whole directory of contracts across a process pool, writing JSONL
+results that double as a resume checkpoint
+
+Usage:
+    python -m pipeline.batch_runner uploads/ --output results/portfolio.jsonl --workers 4
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, Iterator, Optional, Set, Tuple
+
+SUPPORTED_EXTENSIONS = {".pdf", ".png", ".jpg", ".jpeg", ".txt"}
+
+_worker_pipeline = None
+
+
+def detect_kind(file_path: str) -> Optional[str]:
+    """Classify a file as 'pdf', 'image' or 'text' (multer uploads have no extension)"""
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == ".txt":
+        return "text"
+    if ext in (".png", ".jpg", ".jpeg"):
+        return "image"
+    if ext == ".pdf":
+        return "pdf"
+    if ext == "":
+        with open(file_path, "rb") as f:
+            if f.read(5) == b"%PDF-":
+                return "pdf"
+    return None
+
+
+def iter_contracts(input_dir: str) -> Iterator[str]:
+    """Walk the input directory in a stable order"""
+    for dirpath, dirnames, filenames in os.walk(input_dir):
+        dirnames.sort()
+        for name in sorted(filenames):
+            yield os.path.join(dirpath, name)
+
+
+def load_checkpoint(output_path: str) -> Set[str]:
+    """Sources already written to the output JSONL; a torn last line is ignored"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)["source"])
+            except (ValueError, KeyError):
+                continue
+    return done
+
+
+def _open_for_append(path: str):
+    """Append handle that starts on a fresh line even if the last run crashed mid-write"""
+    needs_newline = False
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+    handle = open(path, "a", encoding="utf-8")
+    if needs_newline:
+        handle.write("\n")
+    return handle
+
+
+def _init_worker(inference_slots, torch_threads: Optional[int], workers: int,
+                 pipeline_factory: Optional[Callable[..., Any]] = None) -> None:
+    global _worker_pipeline
+    from pipeline.torch_threads import configure_torch_threads
+    configure_torch_threads(intra_op=torch_threads, workers=workers)
+    if pipeline_factory is None:
+        from pipeline.contract_pipeline import ContractPipeline
+        pipeline_factory = ContractPipeline
+    _worker_pipeline = pipeline_factory(inference_slots=inference_slots)
+
+
+def _analyze_one(file_path: str) -> Tuple[str, Optional[Dict[str, Any]], Optional[str]]:
+    kind = detect_kind(file_path)
+    if kind is None:
+        return file_path, None, "unsupported file type"
+    try:
+        if kind == "text":
+            with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+                result = _worker_pipeline.analyze_text(f.read())
+        else:
+            result = _worker_pipeline.analyze_file(file_path)
+        return file_path, result, None
+    except Exception as e:
+        return file_path, None, f"{type(e).__name__}: {e}"
+
+
+def write_parquet(jsonl_path: str, parquet_path: str, row_group_rows: int = 10000) -> int:
+    """
+    Document-level Parquet copy of the JSONL results (requires pyarrow).
+    Rows are written one row group at a time, so memory stays bounded by
+    `row_group_rows` documents however large the portfolio. Returns rows written.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet output requires pyarrow: pip install pyarrow")
+
+    schema = pa.schema([
+        ("source", pa.string()),
+        ("document_id", pa.string()),
+        ("risk_score", pa.float64()),
+        ("total_clauses", pa.int64()),
+        ("risk_count", pa.int64()),
+        ("contract_type", pa.string()),
+        ("financial_severity", pa.string()),
+        ("result_json", pa.string()),
+    ])
+    columns = {name: [] for name in schema.names}
+    written = 0
+    with open(jsonl_path, "r", encoding="utf-8") as f, pq.ParquetWriter(parquet_path, schema) as writer:
+        def flush() -> None:
+            writer.write_table(pa.table(columns, schema=schema))
+            for values in columns.values():
+                values.clear()
+
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            result = record["result"]
+            columns["source"].append(record["source"])
+            columns["document_id"].append(result.get("documentId"))
+            columns["risk_score"].append(result.get("riskScore"))
+            columns["total_clauses"].append(result.get("total_clauses_analyzed"))
+            columns["risk_count"].append(len(result.get("risks", [])))
+            columns["contract_type"].append(result.get("legalStructure", {}).get("contractType"))
+            columns["financial_severity"].append(result.get("financialRisks", {}).get("severity"))
+            columns["result_json"].append(json.dumps(result))
+            written += 1
+            if len(columns["source"]) >= row_group_rows:
+                flush()
+        if columns["source"] or written == 0:
+            flush()
+    return written
+
+
+def run_batch(
+    input_dir: str,
+    output_path: str,
+    workers: int = 2,
+    inference_slots: Optional[int] = None,
+    torch_threads: Optional[int] = None,
+    progress_every: int = 10,
+    pipeline_factory: Optional[Callable[..., Any]] = None
+) -> Dict[str, Any]:
+    """
+    Analyze every supported contract under `input_dir`, skipping sources
+    already present in `output_path`. Failures go to `<output>.errors.jsonl`
+    and are retried on the next run. Each worker builds its pipeline with
+    `pipeline_factory(inference_slots=...)` (default: ContractPipeline).
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    done = load_checkpoint(output_path)
+    pending = [p for p in iter_contracts(input_dir) if p not in done]
+
+    slots = multiprocessing.BoundedSemaphore(inference_slots) if inference_slots else None
+
+    stats = {"skipped": len(done), "processed": 0, "failed": 0}
+    start = time.perf_counter()
+
+    with _open_for_append(output_path) as out, \
+            _open_for_append(output_path + ".errors.jsonl") as errors, \
+            multiprocessing.Pool(workers, initializer=_init_worker,
+                                 initargs=(slots, torch_threads, workers, pipeline_factory)) as pool:
+        for file_path, result, error in pool.imap_unordered(_analyze_one, pending):
+            if error is None:
+                out.write(json.dumps({"source": file_path, "result": result}) + "\n")
+                out.flush()
+                stats["processed"] += 1
+            else:
+                errors.write(json.dumps({"source": file_path, "error": error}) + "\n")
+                errors.flush()
+                stats["failed"] += 1
+
+            completed = stats["processed"] + stats["failed"]
+            if completed % progress_every == 0:
+                elapsed = time.perf_counter() - start
+                print(f"[{completed}/{len(pending)}] {completed / elapsed:.2f} docs/sec", flush=True)
+
+    elapsed = time.perf_counter() - start
+    stats["elapsed_seconds"] = round(elapsed, 2)
+    stats["docs_per_second"] = round(stats["processed"] / elapsed, 3) if elapsed > 0 else 0.0
+    return stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk contract portfolio analysis")
+    parser.add_argument("input_dir", help="Directory of contracts to analyze (e.g. uploads/)")
+    parser.add_argument("--output", default="results/portfolio.jsonl", help="JSONL results file (also the resume checkpoint)")
+    parser.add_argument("--workers", type=int, default=2, help="Worker processes")
+    parser.add_argument("--inference-slots", type=int, default=None,
+                        help="Max concurrent OCR/classifier calls across all workers")
+    parser.add_argument("--torch-threads", type=int, default=None, help="Torch threads per worker (default: cores / workers)")
+    parser.add_argument("--parquet", default=None, help="Also write document-level results to this Parquet file")
+    args = parser.parse_args(argv)
+
+    stats = run_batch(args.input_dir, args.output, workers=args.workers,
+                      inference_slots=args.inference_slots, torch_threads=args.torch_threads)
+    print(f"Processed: {stats['processed']}  Failed: {stats['failed']}  Skipped (already done): {stats['skipped']}")
+    print(f"Throughput: {stats['docs_per_second']} docs/sec over {stats['elapsed_seconds']}s")
+
+    if args.parquet:
+        write_parquet(args.output, args.parquet)
+        print(f"Parquet written to {args.parquet}")
+    return 0 if stats["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
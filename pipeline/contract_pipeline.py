@@ -0,0 +1,447 @@
+"""
+Contract Pipeline
+Runs OCR -> segmentation -> classification -> entities -> structure ->
+financial risks -> economic impact -> scoring, persisting each stage so re-runs only recompute
+stages whose inputs or logic changed
+"""
+import time
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, Optional
+
+from classification.abstention import abstention
+from classification.classifier_settings import classifier_settings
+from classification.section_context import clause_contexts
+from insights.entity_extractor import DocumentEntities
+from pipeline.artifact_store import ArtifactStore, artifact_store, fingerprint, hash_bytes, hash_file, source_hash
+from pipeline.job_scheduler import job_scheduler
+from pipeline.review_queue import review_queue
+from segmentation.language_detector import language_detector
+from segmentation.ocr_cleanup import clause_pages, ocr_cleanup
+from pipeline.revision_differ import revision_differ
+from retrieval.clause_index import clause_index
+from retrieval.near_duplicate_index import near_duplicate_index, reuse_matching_clauses
+
+
+class ContractPipeline:
+
+    def __init__(self, store: Optional[ArtifactStore] = None, scorer=None, contract_value: float = 10000,
+                 inference_slots=None, exposure_trials: int = 100000, clause_index=None,
+                 duplicate_index=None, scheduler=None, abstention=None, review_queue=None):
+        self.store = store or artifact_store
+        self._scorer = scorer
+        self.contract_value = contract_value
+        # Monte Carlo trials for tail exposure in the economic stage (0 disables)
+        self.exposure_trials = exposure_trials
+        # Optional retrieval.clause_index.ClauseIndex that receives clause embeddings
+        self.clause_index = clause_index
+        # Optional retrieval.near_duplicate_index.NearDuplicateIndex for template reuse
+        self.duplicate_index = duplicate_index
+        # Optional semaphore shared between processes so only N model calls run at once
+        self.inference_slots = inference_slots or nullcontext()
+        # Optional pipeline.job_scheduler.JobScheduler: model work runs in chunks that
+        # wait for a scheduler slot, so large documents interleave with small ones
+        self.scheduler = scheduler
+        # Optional classification.abstention.Abstention: calibrates confidences, re-runs
+        # uncertain clauses with context and flags the rest `needs_review` (only once a
+        # calibration has been fitted, see classification/abstention.py fit)
+        self.abstention = abstention
+        # Optional pipeline.review_queue.ReviewQueue that receives flagged clauses
+        self.review_queue = review_queue
+
+    def _model_slot(self):
+        return self.scheduler.slot() if self.scheduler is not None else nullcontext()
+
+    def _chunks(self, items: List[Any], size: Optional[int]):
+        size = size or len(items) or 1
+        for start in range(0, len(items), size):
+            yield items[start:start + size]
+
+    # Heavy stages import lazily so cached documents never load doctr or the transformer
+    def _ocr(self, file_path: str) -> Dict[str, Any]:
+        """Cleaned text plus per-page OCR quality; only low-confidence words get the strong recognizer"""
+        from ocr import load_pages, ocr_page_lines, page_quality, rerecognize
+        pages = load_pages(file_path)
+        page_lines: List[List[Dict]] = []
+        for chunk in self._chunks(pages, self.scheduler and self.scheduler.chunk_pages):
+            with self.inference_slots, self._model_slot():
+                chunk_lines = ocr_page_lines(chunk)
+                rerecognize(file_path, chunk, chunk_lines, first_page=len(page_lines))
+            page_lines.extend(chunk_lines)
+        # Headers/footers are found across all pages, so cleanup runs once the document is read
+        text, stats = ocr_cleanup.clean(page_lines)
+        return {
+            "text": text,
+            "pages": [dict(page_quality(lines), page=index + 1) for index, lines in enumerate(page_lines)],
+            "page_offsets": stats["page_offsets"]
+        }
+
+    def _classify(self, clauses: List[str], contexts: Optional[List[Dict]] = None) -> List[Dict]:
+        """Classify clauses with the model for their language; unsupported languages skip the transformer"""
+        from classification.risk_classifier import classifier_for_language
+        languages = language_detector.detect_clauses(clauses)
+        routes: Dict[str, List[int]] = {}
+        models = {}
+        for i, language in enumerate(languages):
+            route, model = classifier_for_language(language)
+            routes.setdefault(route, []).append(i)
+            models[route] = model
+
+        results: List[Any] = [None] * len(clauses)
+        size = self.scheduler and self.scheduler.chunk_clauses
+        for route, indices in routes.items():
+            start = time.perf_counter()
+            if models[route] is None:
+                for i in indices:
+                    results[i] = unclassified_result(clauses[i], languages[i])
+            else:
+                for chunk in self._chunks(indices, size):
+                    kwargs = {"contexts": [contexts[i] for i in chunk]} if contexts is not None else {}
+                    with self.inference_slots, self._model_slot():
+                        classified = models[route].classify_clauses([clauses[i] for i in chunk], **kwargs)
+                    for i, result in zip(chunk, classified):
+                        results[i] = dict(result, language=languages[i])
+            self._record_languages(route, [(clauses[i], languages[i]) for i in indices], time.perf_counter() - start)
+        return results
+
+    def _record_languages(self, route: str, clauses: List[tuple], seconds: float) -> None:
+        """Per-language throughput; a mixed-language call's time is split by characters"""
+        by_language: Dict[str, List[str]] = {}
+        for clause, language in clauses:
+            by_language.setdefault(language, []).append(clause)
+        total_chars = sum(len(clause) for clause, _ in clauses) or 1
+        for language, texts in by_language.items():
+            language_detector.record(language, route, texts, seconds * sum(len(t) for t in texts) / total_chars)
+
+    def _second_pass(self, texts: List[str]) -> List[Dict]:
+        from classification.risk_classifier import second_pass_classifier
+        classifier = second_pass_classifier()
+        results: List[Dict] = []
+        for chunk in self._chunks(texts, self.scheduler and self.scheduler.chunk_clauses):
+            # The neighbouring clauses are already in each text, so no section priors on top
+            no_context = [{"heading": None, "previous": None}] * len(chunk)
+            with self.inference_slots, self._model_slot():
+                results.extend(classifier.classify_clauses(chunk, contexts=no_context))
+        return results
+
+    def _embed(self, clauses: List[str]):
+        from classification.risk_classifier import risk_classifier
+        with self.inference_slots, self._model_slot():
+            return risk_classifier.embed_clauses(clauses)
+
+    @property
+    def scorer(self):
+        if self._scorer is None:
+            from scoring.scorer import risk_scorer
+            self._scorer = risk_scorer
+        return self._scorer
+
+    def _run_stage(self, doc_id: str, stage: str, stage_fingerprint: str,
+                   compute: Callable[[], Any], report: Dict[str, str],
+                   meta: Optional[Dict[str, Any]] = None) -> Any:
+        cached = self.store.get(doc_id, stage, stage_fingerprint)
+        if cached is not None:
+            report[stage] = "cached"
+            return cached
+        data = compute()
+        self.store.put(doc_id, stage, stage_fingerprint, data, meta=meta)
+        report[stage] = "computed"
+        return data
+
+    def _load_previous(self, previous_doc_id: Optional[str], classifier_hash: str) -> Optional[Dict[str, Any]]:
+        """Stored clauses/classifications of the previous revision, if still compatible"""
+        if not previous_doc_id:
+            return None
+        segment = self.store.load(previous_doc_id, "segment")
+        classify = self.store.load(previous_doc_id, "classify")
+        if segment is None or classify is None:
+            return None
+        # Classifications made by a different classifier version cannot be reused
+        if classify.get("meta", {}).get("classifier") != classifier_hash:
+            return None
+        score = self.store.load(previous_doc_id, "score")
+        return {
+            "doc_id": previous_doc_id,
+            "clauses": segment["data"],
+            "classifications": classify["data"],
+            "score": score["data"]["total_score"] if score else None
+        }
+
+    def analyze_file(self, file_path: str, contract_value: Optional[float] = None,
+                     previous_doc_id: Optional[str] = None, doc_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Full analysis of an uploaded contract file (PDF/image).
+        Pass `previous_doc_id` (the documentId of the prior revision) to only
+        reclassify clauses that changed and get a revision delta.
+        Pass `doc_id` (the file's sha256) when the caller already hashed it.
+        """
+        doc_id = doc_id or hash_file(file_path)
+        report: Dict[str, str] = {}
+        ocr_fp = fingerprint("ocr", source_hash("ocr.py"), source_hash("segmentation/ocr_cleanup.py"),
+                             source_hash("segmentation/headings.py"), vars(ocr_cleanup), doc_id)
+        ocr = self._run_stage(doc_id, "ocr", ocr_fp, lambda: self._ocr(file_path), report)
+        return self._analyze(doc_id, ocr_text(ocr), ocr_fp, report, contract_value, previous_doc_id, ocr)
+
+    def analyze_text(self, text: str, contract_value: Optional[float] = None,
+                     previous_doc_id: Optional[str] = None) -> Dict[str, Any]:
+        """Full analysis of already-extracted contract text"""
+        doc_id = hash_bytes(text.encode("utf-8"))
+        text_fp = fingerprint("text", doc_id)
+        report: Dict[str, str] = {}
+        # Stored under the OCR stage so the document can be re-analyzed by id later
+        self._run_stage(doc_id, "ocr", text_fp, lambda: text, report)
+        report.pop("ocr")
+        return self._analyze(doc_id, text, text_fp, report, contract_value, previous_doc_id)
+
+    def reanalyze(self, doc_id: str, contract_value: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Re-run analysis for a previously seen document from its stored text,
+        without the original upload. Returns None for unknown documents.
+        """
+        record = self.store.load(doc_id, "ocr")
+        if record is None:
+            return None
+        return self._analyze(doc_id, ocr_text(record["data"]), record["fingerprint"], {"ocr": "cached"},
+                             contract_value, ocr=record["data"])
+
+    def _analyze(self, doc_id: str, text: str, text_fp: str, report: Dict[str, str],
+                 contract_value: Optional[float], previous_doc_id: Optional[str] = None,
+                 ocr: Any = None) -> Dict[str, Any]:
+        from segmentation.segmenter import clause_offsets, segment_text
+        from reasoning.legal_structure_analyzer import legal_structure_analyzer
+        from insights.financial_risk_detector import financial_risk_detector
+        from insights.economic_impact_model import economic_impact_model
+        from insights.entity_extractor import entity_extractor
+
+        if contract_value is None:
+            contract_value = self.contract_value
+
+        segment_fp = fingerprint("segment", source_hash("segmentation/segmenter.py"), text_fp)
+        clauses = self._run_stage(doc_id, "segment", segment_fp, lambda: segment_text(text), report)
+
+        # Backend, early-exit, top-k and calibration settings change classifications just like the classifier source does
+        settings = classifier_settings()
+        if self.abstention is not None:
+            # Fingerprint the calibration the abstention routes with, reloaded if the file changed
+            settings["calibration"] = self.abstention.refresh()
+        # Routed and template-reusing pipelines (the API) must not share artifacts with plain ones (batch runs)
+        routed = self.abstention is not None and self.abstention.calibrated
+        classifier_hash = fingerprint(source_hash("classification/risk_classifier.py"),
+                                      source_hash("classification/abstention.py"),
+                                      source_hash("segmentation/language_detector.py"),
+                                      source_hash("classification/section_context.py"),
+                                      source_hash("segmentation/headings.py"), settings,
+                                      {"routed": routed, "duplicates": self.duplicate_index is not None})
+        previous = self._load_previous(previous_doc_id, classifier_hash)
+
+        # Near-duplicate (templated) contracts reuse classifications of matching clauses
+        template, near_duplicate = None, None
+        signature = None
+        if self.duplicate_index is not None:
+            signature = self.duplicate_index.signature(clauses)
+            if previous is None:
+                for match_id, similarity in self.duplicate_index.query(clauses, exclude=doc_id, signature=signature):
+                    template = self._load_previous(match_id, classifier_hash)
+                    if template is not None:
+                        near_duplicate = {"documentId": match_id, "similarity": similarity, "reusedClauses": 0}
+                        break
+
+        routing: Dict[str, int] = {}
+        # Headings and previous clauses come from the whole document, also when only some clauses are reclassified
+        contexts = clause_contexts(clauses) if settings["context"] != "off" else None
+
+        def classify_subset(indices: List[int]) -> List[Dict]:
+            # By position: repeated boilerplate clauses sit under different headings
+            subset = [clauses[i] for i in indices]
+            if contexts is None:
+                return self._classify(subset)
+            return self._classify(subset, [contexts[i] for i in indices])
+
+        def classify() -> List[Dict]:
+            results = classify_clauses()
+            if routed:
+                second_pass = self._second_pass if settings["second_pass"] != "off" else None
+                routing.update(self.abstention.route(clauses, results, second_pass))
+            return results
+
+        def classify_clauses() -> List[Dict]:
+            if previous is not None:
+                reused, _ = revision_differ.reuse_classifications(
+                    previous["clauses"], previous["classifications"], clauses, classify_subset
+                )
+                return reused
+            if template is not None:
+                reused, reused_count = reuse_matching_clauses(
+                    template["clauses"], template["classifications"], clauses, classify_subset
+                )
+                near_duplicate["reusedClauses"] = reused_count
+                return reused
+            return self._classify(clauses, contexts) if contexts is not None else self._classify(clauses)
+
+        classify_fp = fingerprint("classify", classifier_hash, segment_fp)
+        classifications = self._run_stage(doc_id, "classify", classify_fp, classify, report,
+                                          meta={"classifier": classifier_hash, "backend": settings["backend"]})
+        if self.review_queue is not None:
+            self.review_queue.add(doc_id, classifications)
+
+        if self.duplicate_index is not None:
+            self.duplicate_index.add(doc_id, clauses, signature=signature)
+
+        if self.clause_index is not None and clauses and not self.clause_index.has_document(doc_id):
+            try:
+                self.clause_index.add(doc_id, clauses, self._embed(clauses))
+                report["embed"] = "computed"
+            except NotImplementedError:
+                # Classifier backend without an encoder (distilled model)
+                report["embed"] = "unsupported"
+
+        # Per-document entity index (amounts, percentages, dates, durations, parties), read by the stages below
+        entities_fp = fingerprint("entities", source_hash("insights/entity_extractor.py"),
+                                  vars(entity_extractor), text_fp)
+        entities = self._run_stage(doc_id, "entities", entities_fp, lambda: entity_extractor.extract(text), report)
+
+        languages = language_detector.profile(language_detector.detect_clauses(clauses))
+        structure_fp = fingerprint("structure", source_hash("reasoning/legal_structure_analyzer.py"),
+                                   source_hash("segmentation/language_detector.py"),
+                                   vars(legal_structure_analyzer), text_fp, segment_fp, entities_fp)
+        structure = self._run_stage(
+            doc_id, "structure", structure_fp,
+            lambda: legal_structure_analyzer.analyze_structure(text, clauses, list(languages), entities), report
+        )
+
+        financial_fp = fingerprint("financial", source_hash("insights/financial_risk_detector.py"),
+                                   vars(financial_risk_detector), text_fp, classify_fp, entities_fp)
+        financial = self._run_stage(
+            doc_id, "financial", financial_fp,
+            lambda: financial_risk_detector.detect_financial_risks(classifications, text, entities), report
+        )
+
+        economic_fp = fingerprint("economic", source_hash("insights/economic_impact_model.py"),
+                                  vars(economic_impact_model), contract_value, self.exposure_trials, financial_fp)
+        economic = self._run_stage(
+            doc_id, "economic", economic_fp,
+            lambda: economic_impact_model.calculate_economic_impact(
+                financial["financial_risks"], contract_value,
+                simulate=self.exposure_trials > 0, trials=self.exposure_trials,
+                seed=int(doc_id[:8], 16)  # reproducible per document so cached results stay stable
+            ),
+            report
+        )
+
+        # Scanned documents: quality of the page each clause came from, for downstream weighting
+        ocr_quality = None
+        if isinstance(ocr, dict):
+            pages = clause_pages(text, clauses, ocr["page_offsets"])
+            ocr_quality = [ocr["pages"][page]["quality"] if page < len(ocr["pages"]) else None for page in pages]
+
+        # Character offset of each clause in the analyzed text, for clause-level exports
+        offsets = clause_offsets(text, clauses)
+        risks = [
+            dict(c, clause_index=index, clause_offset=offsets[index],
+                 **({"ocr_quality": ocr_quality[index]} if ocr_quality else {}))
+            for index, c in enumerate(classifications)
+            # A merged fragment shares its unit's label; the unit is counted once, on its primary clause
+            if c.get("category") not in ("Safe Clause", UNCLASSIFIED) and not c.get("merged_fragment")
+        ]
+        scorer = self.scorer
+        score_fp = fingerprint("score", source_hash("scoring/scorer.py"), scorer.penalties,
+                               type(scorer.policy).__name__, vars(scorer.policy), classify_fp)
+        score = self._run_stage(doc_id, "score", score_fp, lambda: scorer.calculate_score(risks), report)
+
+        response = build_response(doc_id, clauses, risks, score, structure, financial, economic, report)
+        response["languages"] = languages
+        response["entities"] = {"counts": DocumentEntities(entities).counts(), "items": entities}
+        if isinstance(ocr, dict):
+            response["ocrQuality"] = ocr_summary(ocr["pages"])
+        # Clauses flagged for human review; routing counts only when classification ran now
+        response["review"] = dict(
+            routing, pendingClauses=[index for index, c in enumerate(classifications) if c.get("needs_review")]
+        )
+        if previous is not None:
+            opcodes = revision_differ.align(previous["clauses"], clauses)
+            delta = revision_differ.risk_delta(
+                previous["classifications"], classifications, opcodes,
+                old_score=previous["score"], new_score=score["total_score"]
+            )
+            delta["previousDocumentId"] = previous["doc_id"]
+            response["revisionDelta"] = delta
+        if near_duplicate is not None and report.get("classify") == "computed":
+            response["nearDuplicate"] = near_duplicate
+        return response
+
+
+UNCLASSIFIED = "Unsupported Language"
+
+
+def ocr_text(ocr: Any) -> str:
+    """Text of an OCR stage artifact (plain text for uploaded text and older artifacts)"""
+    return ocr["text"] if isinstance(ocr, dict) else ocr
+
+
+def ocr_summary(pages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Per-page OCR quality plus a word-weighted document score"""
+    scored = [p for p in pages if p["quality"] is not None]
+    words = sum(p["words"] for p in scored)
+    return {
+        "overall": round(sum(p["quality"] * p["words"] for p in scored) / words, 4) if words else None,
+        "rerecognizedWords": sum(p["rerecognized_words"] for p in pages),
+        "pages": pages
+    }
+
+
+def unclassified_result(clause: str, language: str) -> Dict[str, Any]:
+    """Clause in a language no configured model handles: no label, straight to human review"""
+    return {
+        "clause": clause,
+        "category": UNCLASSIFIED,
+        "confidence": 0.0,
+        "margin": 0.0,
+        "risk_level": "Unknown",
+        "language": language,
+        # Set so abstention leaves it alone: a second pass cannot read it either
+        "calibrated_probability": None,
+        "needs_review": True
+    }
+
+
+def build_response(doc_id: str, clauses: List[str], risks: List[Dict], score: Dict, structure: Dict,
+                   financial: Dict, economic: Dict, report: Dict[str, str]) -> Dict[str, Any]:
+    """Shape stage outputs into the /analyze response expected by the frontend"""
+    return {
+        "documentId": doc_id,
+        "riskScore": score["total_score"],
+        "total_score": score["total_score"],
+        "scoreBreakdown": score["breakdown"],
+        "total_clauses_analyzed": len(clauses),
+        "risks": risks,
+        "legalStructure": {
+            "contractType": structure["contract_type"],
+            "parties": structure["parties"],
+            "keySections": structure["key_sections"],
+            "term": structure["term"],
+            "totalObligations": structure["total_obligations"],
+            "structureQuality": structure["structure_quality"]
+        },
+        "financialRisks": {
+            "risks": financial["financial_risks"],
+            "totalRiskCount": financial["total_risk_count"],
+            "estimatedExposure": financial["estimated_exposure"],
+            "severity": financial["severity"]
+        },
+        "economicImpact": {
+            "contractValue": economic["contract_value"],
+            "estimatedDirectCosts": economic["estimated_direct_costs"],
+            "estimatedOpportunityCosts": economic["estimated_opportunity_costs"],
+            "totalRiskCost": economic["total_risk_cost"],
+            "riskAdjustedValue": economic["risk_adjusted_value"],
+            "riskPercentage": economic["risk_percentage"],
+            "economicViability": economic["economic_viability"],
+            "recommendations": economic["recommendations"],
+            "exposureSimulation": economic.get("exposure_simulation")
+        },
+        "pipelineStages": report
+    }
+
+
+# Singleton instance
+contract_pipeline = ContractPipeline(clause_index=clause_index, duplicate_index=near_duplicate_index,
+                                     scheduler=job_scheduler, abstention=abstention, review_queue=review_queue)
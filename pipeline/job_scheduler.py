@@ -0,0 +1,228 @@
+"""
+Job Scheduler
+Priority and fairness scheduling for analysis requests: estimates each job's
+cost up front, lets small jobs jump ahead in a fast lane, interleaves the
+page/clause chunks of large jobs and caps concurrent jobs per tenant
+"""
+import asyncio
+import itertools
+import os
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+
+_PAGE_PATTERN = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+_COUNT_PATTERN = re.compile(rb"/Type\s*/Pages\b[^>]*?/Count\s+(\d+)|/Count\s+(\d+)[^>]*?/Type\s*/Pages\b")
+_IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg"}
+SCANNED_BYTES_PER_PAGE = 150 * 1024
+
+_current_job: ContextVar[Optional["Job"]] = ContextVar("current_job", default=None)
+
+
+def estimate_file_cost(file_path: str, chunk_size: int = 1024 * 1024) -> Dict[str, Any]:
+    """
+    Cheap cost estimate from the raw PDF bytes, without parsing or rendering:
+    page objects give the page count; a document with images and either no
+    fonts or a scan-sized byte count per page (scanner apps add an invisible
+    OCR text layer) is treated as scanned. Cost is in scanned-page units.
+    """
+    size = os.path.getsize(file_path)
+    if os.path.splitext(file_path)[1].lower() in _IMAGE_SUFFIXES:
+        return {"pages": 1, "scanned": True, "bytes": size, "cost": 1.0}
+
+    pages, page_count, has_fonts, has_images = 0, 0, False, False
+    tail = b""
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            window = tail + chunk
+            # Matches lying wholly in the carried-over tail were counted with the previous chunk
+            pages += sum(1 for match in _PAGE_PATTERN.finditer(window) if match.end() > len(tail))
+            for match in _COUNT_PATTERN.finditer(window):
+                page_count = max(page_count, int(match.group(1) or match.group(2)))
+            has_fonts = has_fonts or b"/Font" in window
+            has_images = has_images or re.search(rb"/Subtype\s*/Image", window) is not None
+            tail = window[-64:]
+
+    # Compressed object streams hide page objects; fall back to /Count, then size (~100KB per scanned page)
+    pages = pages or page_count or max(1, size // (100 * 1024))
+    scanned = has_images and (not has_fonts or size / pages > SCANNED_BYTES_PER_PAGE)
+    return {
+        "pages": pages,
+        "scanned": scanned,
+        "bytes": size,
+        "cost": round(pages * (1.0 if scanned else 0.6), 2)
+    }
+
+
+def estimate_text_cost(text: str, chars_per_unit: int = 20000) -> Dict[str, Any]:
+    """Already-extracted text skips OCR; cost is classification work only"""
+    return {"pages": 0, "scanned": False, "bytes": len(text), "cost": round(len(text) / chars_per_unit, 2)}
+
+
+class Job:
+
+    def __init__(self, tenant: str, cost: Dict[str, Any], lane: str, submitted_at: Optional[float] = None):
+        self.tenant = tenant
+        self.cost = cost
+        self.lane = lane
+        self.submitted_at = submitted_at if submitted_at is not None else time.monotonic()
+        self.admitted_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.slot_wait = 0.0
+        self.chunks = 0
+
+    def report(self) -> Dict[str, Any]:
+        admission_wait = (self.admitted_at or self.submitted_at) - self.submitted_at
+        return {
+            "tenant": self.tenant,
+            "lane": self.lane,
+            "estimatedCost": self.cost["cost"],
+            "pages": self.cost["pages"],
+            "scanned": self.cost["scanned"],
+            "chunks": self.chunks,
+            "admissionWaitSeconds": round(admission_wait, 3),
+            "queueWaitSeconds": round(admission_wait + self.slot_wait, 3),
+            "totalSeconds": round((self.finished_at or time.monotonic()) - self.submitted_at, 3)
+        }
+
+
+class _Ticket:
+    __slots__ = ("job", "seq", "requested_at")
+
+    def __init__(self, job: Job, seq: int):
+        self.job = job
+        self.seq = seq
+        self.requested_at = time.monotonic()
+
+
+class JobScheduler:
+
+    def __init__(self, slots: int = 1, fast_lane_cost: float = 5.0, tenant_limit: int = 2,
+                 chunk_pages: int = 4, chunk_clauses: int = 32, max_slot_wait: float = 30.0):
+        # Model calls (OCR page chunks, classifier clause chunks) that may run at once
+        self.slots = slots
+        # Jobs at or below this cost go to the fast lane
+        self.fast_lane_cost = fast_lane_cost
+        # Concurrent jobs per tenant; further jobs wait for admission
+        self.tenant_limit = tenant_limit
+        self.chunk_pages = chunk_pages
+        self.chunk_clauses = chunk_clauses
+        # Bulk chunks waiting longer than this are served like fast-lane work (no starvation)
+        self.max_slot_wait = max_slot_wait
+        self._cond = threading.Condition()
+        self._free = slots
+        self._waiting = []
+        self._seq = itertools.count()
+        self._tenant_jobs: Dict[str, int] = defaultdict(int)
+        self._tenant_slots: Dict[str, int] = defaultdict(int)
+        # Per-tenant admission for async callers, so waiting requests hold no threadpool thread
+        self._admission: Dict[str, asyncio.Semaphore] = {}
+        self._recent = deque(maxlen=100)
+
+    def lane_for(self, cost: Dict[str, Any]) -> str:
+        return "fast" if cost["cost"] <= self.fast_lane_cost else "bulk"
+
+    @asynccontextmanager
+    async def admission(self, tenant: str) -> AsyncIterator[float]:
+        """
+        Per-tenant admission on the event loop: a request over its tenant's
+        limit waits here instead of blocking a threadpool thread in job(), so
+        one tenant's backlog cannot starve the others of threads. Yields the
+        arrival time, to pass to run() as `submitted_at`.
+        """
+        submitted_at = time.monotonic()
+        semaphore = self._admission.get(tenant)
+        if semaphore is None:
+            semaphore = self._admission[tenant] = asyncio.Semaphore(self.tenant_limit)
+        async with semaphore:
+            yield submitted_at
+
+    @contextmanager
+    def job(self, tenant: str, cost: Dict[str, Any], submitted_at: Optional[float] = None) -> Iterator[Job]:
+        """Admit a job (per-tenant limit) and make it current for slot() calls in this thread"""
+        job = Job(tenant, cost, self.lane_for(cost), submitted_at)
+        with self._cond:
+            while self._tenant_jobs[tenant] >= self.tenant_limit:
+                self._cond.wait()
+            self._tenant_jobs[tenant] += 1
+        job.admitted_at = time.monotonic()
+        token = _current_job.set(job)
+        try:
+            yield job
+        finally:
+            _current_job.reset(token)
+            job.finished_at = time.monotonic()
+            with self._cond:
+                self._tenant_jobs[tenant] -= 1
+                self._recent.append(job.report())
+                self._cond.notify_all()
+
+    def run(self, tenant: str, cost: Dict[str, Any], fn: Callable, *args: Any,
+            submitted_at: Optional[float] = None) -> tuple:
+        """Run fn(*args) as a scheduled job in the calling thread; returns (result, job report)"""
+        with self.job(tenant, cost, submitted_at) as job:
+            result = fn(*args)
+        return result, job.report()
+
+    def _priority(self, ticket: _Ticket, now: float) -> tuple:
+        job = ticket.job
+        fast = job.lane == "fast" or now - ticket.requested_at >= self.max_slot_wait
+        # Fast lane first, then the tenant holding fewest slots, then the job that has run fewest chunks
+        return (0 if fast else 1, self._tenant_slots[job.tenant], job.chunks, ticket.seq)
+
+    def _is_next(self, ticket: _Ticket) -> bool:
+        if self._free <= 0:
+            return False
+        now = time.monotonic()
+        return min(self._waiting, key=lambda t: self._priority(t, now)) is ticket
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """
+        One chunk of model work for the current job. Outside a job (batch
+        runs, tests) this does not wait.
+        """
+        job = _current_job.get()
+        if job is None:
+            yield
+            return
+        ticket = _Ticket(job, next(self._seq))
+        with self._cond:
+            self._waiting.append(ticket)
+            while not self._is_next(ticket):
+                # Timed wait so aged bulk chunks get re-prioritized even without a release
+                self._cond.wait(timeout=1.0)
+            self._waiting.remove(ticket)
+            self._free -= 1
+            self._tenant_slots[job.tenant] += 1
+            job.slot_wait += time.monotonic() - ticket.requested_at
+            job.chunks += 1
+            self._cond.notify_all()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._free += 1
+                self._tenant_slots[job.tenant] -= 1
+                self._cond.notify_all()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            waiting = defaultdict(int)
+            for ticket in self._waiting:
+                waiting[ticket.job.lane] += 1
+            return {
+                "slots": self.slots,
+                "free_slots": self._free,
+                "waiting_chunks": dict(waiting),
+                "running_jobs_per_tenant": {t: n for t, n in self._tenant_jobs.items() if n},
+                "recent_jobs": list(self._recent)
+            }
+
+
+# Singleton instance
+job_scheduler = JobScheduler()
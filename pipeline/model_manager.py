@@ -0,0 +1,253 @@
+"""
+Model Manager
+Owns the heavy models (doctr OCR predictor, zero-shot risk classifier): loads
+them on first use, keeps them warm while traffic continues and unloads them
+after an idle period or when the node runs low on memory
+"""
+import gc
+import inspect
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+IDLE_SECONDS_ENV = "MODEL_IDLE_SECONDS"
+MIN_AVAILABLE_MB_ENV = "MODEL_MIN_AVAILABLE_MB"
+PRELOAD_ENV = "MODEL_PRELOAD"
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def process_rss_bytes() -> int:
+    """Resident set size of this process (Linux /proc; peak RSS elsewhere)"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def available_memory_bytes() -> Optional[int]:
+    """MemAvailable from /proc/meminfo; None when unknown"""
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _release_memory() -> None:
+    """Collect the dropped model and hand freed memory back to the OS"""
+    gc.collect()
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+    try:
+        import ctypes
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+class ModelManager:
+
+    def __init__(self, idle_seconds: Optional[float] = None, min_available_mb: Optional[float] = None,
+                 check_interval: float = 30.0, max_events: int = 200):
+        # Unload a model this long after its last use (0 keeps models resident)
+        self.idle_seconds = idle_seconds if idle_seconds is not None else _env_float(IDLE_SECONDS_ENV, 600)
+        # Below this much available memory, idle models are unloaded early (least recently used first)
+        self.min_available_mb = (min_available_mb if min_available_mb is not None
+                                 else _env_float(MIN_AVAILABLE_MB_ENV, 0))
+        self.check_interval = check_interval
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._models: Dict[str, Any] = {}
+        self._in_use: Dict[str, int] = {}
+        self._last_used: Dict[str, float] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._events = deque(maxlen=max_events)
+        self._reaper: Optional[threading.Thread] = None
+
+    def register(self, name: str, loader: Callable[[], Any]) -> None:
+        with self._lock:
+            self._loaders[name] = loader
+            self._in_use.setdefault(name, 0)
+            self._load_locks.setdefault(name, threading.Lock())
+            self._stats.setdefault(name, {"loads": 0, "unloads": 0, "load_seconds": 0.0, "resident_bytes": 0})
+
+    def _event(self, name: str, event: str, **details: Any) -> None:
+        self._events.append(dict({"time": round(time.time(), 3), "model": name, "event": event}, **details))
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def _load(self, name: str) -> Any:
+        with self._load_locks[name]:
+            model = self._models.get(name)
+            if model is not None:
+                return model
+            if self._memory_low():
+                self.unload_idle(force=True, exclude=name)
+            rss_before = process_rss_bytes()
+            start = time.perf_counter()
+            model = self._loaders[name]()
+            seconds = time.perf_counter() - start
+            with self._lock:
+                self._models[name] = model
+                self._last_used[name] = time.monotonic()
+                stats = self._stats[name]
+                stats["loads"] += 1
+                stats["load_seconds"] = round(stats["load_seconds"] + seconds, 3)
+                # RSS growth during the load approximates what the model keeps resident
+                stats["resident_bytes"] = max(0, process_rss_bytes() - rss_before)
+            self._event(name, "load", seconds=round(seconds, 3), resident_bytes=stats["resident_bytes"])
+            self._start_reaper()
+            return model
+
+    @contextmanager
+    def use(self, name: str) -> Iterator[Any]:
+        """Model for the duration of one call; it cannot be unloaded meanwhile"""
+        if name not in self._loaders:
+            raise KeyError(f"Unknown model: {name}")
+        with self._lock:
+            self._in_use[name] += 1
+        try:
+            model = self._models.get(name)
+            yield model if model is not None else self._load(name)
+        finally:
+            with self._lock:
+                self._in_use[name] -= 1
+                self._last_used[name] = time.monotonic()
+
+    def get(self, name: str) -> Any:
+        """Loaded model without pinning it (for attribute reads)"""
+        with self.use(name) as model:
+            return model
+
+    def preload(self, names: Optional[List[str]] = None) -> None:
+        """Warm the given models (default: MODEL_PRELOAD, comma separated)"""
+        if names is None:
+            names = [n.strip() for n in os.environ.get(PRELOAD_ENV, "").split(",") if n.strip()]
+        for name in names:
+            self.get(name)
+
+    def unload(self, name: str, reason: str = "manual") -> bool:
+        """Drop a loaded model unless a call is using it"""
+        with self._lock:
+            if name not in self._models or self._in_use.get(name, 0) > 0:
+                return False
+            del self._models[name]
+            self._stats[name]["unloads"] += 1
+            resident = self._stats[name]["resident_bytes"]
+            self._stats[name]["resident_bytes"] = 0
+        _release_memory()
+        self._event(name, "unload", reason=reason, released_bytes=resident)
+        return True
+
+    def _memory_low(self) -> bool:
+        if self.min_available_mb <= 0:
+            return False
+        available = available_memory_bytes()
+        return available is not None and available < self.min_available_mb * 1024 * 1024
+
+    def unload_idle(self, now: Optional[float] = None, force: bool = False,
+                    exclude: Optional[str] = None) -> List[str]:
+        """
+        Unload models idle longer than idle_seconds. With force=True (memory
+        pressure) unused models are unloaded least recently used first until
+        available memory recovers.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            candidates = sorted(
+                (name for name in self._models if name != exclude and self._in_use.get(name, 0) == 0),
+                key=lambda name: self._last_used.get(name, 0)
+            )
+        unloaded = []
+        for name in candidates:
+            idle = now - self._last_used.get(name, now)
+            if force:
+                if self.unload(name, reason="memory_pressure"):
+                    unloaded.append(name)
+                if not self._memory_low():
+                    break
+            elif self.idle_seconds > 0 and idle >= self.idle_seconds:
+                if self.unload(name, reason="idle"):
+                    unloaded.append(name)
+        return unloaded
+
+    def _start_reaper(self) -> None:
+        if self._reaper is not None or (self.idle_seconds <= 0 and self.min_available_mb <= 0):
+            return
+        self._reaper = threading.Thread(target=self._reap, name="model-reaper", daemon=True)
+        self._reaper.start()
+
+    def _reap(self) -> None:
+        while True:
+            time.sleep(self.check_interval)
+            self.unload_idle(force=self._memory_low())
+
+    def metrics(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            models = {
+                name: dict(
+                    self._stats[name],
+                    loaded=name in self._models,
+                    in_use=self._in_use.get(name, 0),
+                    idle_seconds=round(now - self._last_used[name], 1) if name in self._last_used else None
+                )
+                for name in self._loaders
+            }
+            events = list(self._events)
+        return {
+            "idle_unload_seconds": self.idle_seconds,
+            "min_available_mb": self.min_available_mb,
+            "process_rss_bytes": process_rss_bytes(),
+            "available_memory_bytes": available_memory_bytes(),
+            "models": models,
+            "events": events
+        }
+
+
+class ManagedModel:
+    """
+    Stand-in for a managed model's module-level singleton: calls load the
+    model on demand and pin it for the duration of the call.
+    """
+
+    def __init__(self, manager: ModelManager, name: str):
+        self._manager = manager
+        self._name = name
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        with self._manager.use(self._name) as model:
+            return model(*args, **kwargs)
+
+    def __getattr__(self, attr: str) -> Any:
+        value = getattr(self._manager.get(self._name), attr)
+        if not inspect.ismethod(value):
+            return value
+        manager, name = self._manager, self._name
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            with manager.use(name) as model:
+                return getattr(model, attr)(*args, **kwargs)
+        return call
+
+
+# Singleton instance
+model_manager = ModelManager()
@@ -0,0 +1,140 @@
+"""
+Response Cache
+Caches /analyze JSON and rendered report PDFs keyed by document content hash
+plus a pipeline version stamp, and derives the ETags served for them
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from classification.classifier_settings import classifier_settings
+from pipeline.artifact_store import ROOT_DIR, fingerprint, source_hash
+
+# Every module whose logic shapes the analysis or the report
+PIPELINE_SOURCES = [
+    "ocr.py",
+    "segmentation/ocr_cleanup.py",
+    "segmentation/headings.py",
+    "segmentation/segmenter.py",
+    "segmentation/language_detector.py",
+    "classification/risk_classifier.py",  # includes the model id and candidate labels
+    "classification/clause_packing.py",
+    "classification/early_exit.py",
+    "classification/abstention.py",
+    "classification/section_context.py",
+    "reasoning/legal_structure_analyzer.py",
+    "insights/entity_extractor.py",
+    "insights/financial_risk_detector.py",
+    "insights/economic_impact_model.py",
+    "scoring/scorer.py",
+    "pipeline/contract_pipeline.py",
+    "pipeline/revision_differ.py",
+    "retrieval/near_duplicate_index.py",
+    "classification/distilled_classifier.py",
+]
+REPORT_SOURCES = ["reporting/intelligence_report_generator.py"]
+
+
+def pipeline_version(scorer=None) -> str:
+    """Version stamp: rule/model source hashes plus the live RiskScorer penalties and policy"""
+    if scorer is None:
+        from scoring.scorer import risk_scorer as scorer
+    return fingerprint(
+        [source_hash(path) for path in PIPELINE_SOURCES],
+        classifier_settings(),
+        scorer.penalties,
+        type(scorer.policy).__name__,
+        vars(scorer.policy)
+    )
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (handles lists, weak validators and '*')"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+class ResponseCache:
+
+    def __init__(self, root: str = os.path.join(ROOT_DIR, "cache"), memory_entries: int = 256):
+        self.root = root
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def cache_key(self, doc_id: str, version: str, **params: Any) -> str:
+        """Key for one analysis variant; request params (e.g. contract_value) are part of it"""
+        return f"{doc_id}-{fingerprint(version, params)}"
+
+    def etag(self, key: str, kind: str = "analysis") -> str:
+        return f'"{kind}-{key}"'
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.{suffix}")
+
+    def _remember(self, memory_key: str, value: Any) -> None:
+        with self._lock:
+            self._memory[memory_key] = value
+            self._memory.move_to_end(memory_key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _recall(self, memory_key: str) -> Optional[Any]:
+        with self._lock:
+            value = self._memory.get(memory_key)
+            if value is not None:
+                self._memory.move_to_end(memory_key)
+            return value
+
+    def _write(self, path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def get_analysis(self, key: str) -> Optional[Dict[str, Any]]:
+        cached = self._recall(f"json:{key}")
+        if cached is not None:
+            return cached
+        path = self._path(key, "json")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            analysis = json.load(f)
+        self._remember(f"json:{key}", analysis)
+        return analysis
+
+    def put_analysis(self, key: str, analysis: Dict[str, Any]) -> None:
+        self._write(self._path(key, "json"), json.dumps(analysis).encode("utf-8"))
+        self._remember(f"json:{key}", analysis)
+
+    def report_key(self, key: str) -> str:
+        """Reports also depend on the report generator version"""
+        return f"{key}-{fingerprint([source_hash(path) for path in REPORT_SOURCES])}"
+
+    def get_report(self, key: str) -> Optional[bytes]:
+        report_key = self.report_key(key)
+        cached = self._recall(f"pdf:{report_key}")
+        if cached is not None:
+            return cached
+        path = self._path(report_key, "pdf")
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            pdf_bytes = f.read()
+        self._remember(f"pdf:{report_key}", pdf_bytes)
+        return pdf_bytes
+
+    def put_report(self, key: str, pdf_bytes: bytes) -> None:
+        report_key = self.report_key(key)
+        self._write(self._path(report_key, "pdf"), pdf_bytes)
+        self._remember(f"pdf:{report_key}", pdf_bytes)
+
+
+# Singleton instance
+response_cache = ResponseCache()
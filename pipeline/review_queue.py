@@ -0,0 +1,116 @@
+"""
+Review Queue
+Clauses the classifier abstained on, waiting for a human label. Items and
+resolutions are appended to JSONL files; resolved labels feed back into
+calibration (classification/abstention.py fit)
+"""
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from pipeline.artifact_store import ROOT_DIR
+
+
+class ReviewQueue:
+
+    def __init__(self, root: str = os.path.join(ROOT_DIR, "review")):
+        self.root = root
+        self.items_path = os.path.join(root, "items.jsonl")
+        self.resolutions_path = os.path.join(root, "resolutions.jsonl")
+        self._lock = threading.Lock()
+        # (documentId, clause_index) of queued items, read from items.jsonl once and kept current by add
+        self._queued: Optional[set] = None
+
+    def _read(self, path: str) -> List[Dict[str, Any]]:
+        if not os.path.exists(path):
+            return []
+        with open(path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def _append(self, path: str, records: List[Dict[str, Any]]) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+
+    @staticmethod
+    def _key(record: Dict[str, Any]) -> tuple:
+        return record["documentId"], record["clause_index"]
+
+    def _queued_ids(self) -> set:
+        if self._queued is None:
+            self._queued = {self._key(item) for item in self._read(self.items_path)}
+        return self._queued
+
+    def add(self, doc_id: str, classifications: List[Dict[str, Any]]) -> int:
+        """Queue a document's `needs_review` clauses; clauses already queued are skipped"""
+        if not any(result.get("needs_review") for result in classifications):
+            return 0
+        with self._lock:
+            queued = self._queued_ids()
+            now = round(time.time(), 3)
+            items = [
+                {
+                    "documentId": doc_id,
+                    "clause_index": index,
+                    "clause": result["clause"],
+                    "category": result["category"],
+                    "confidence": result["confidence"],
+                    "calibrated_probability": result.get("calibrated_probability"),
+                    "queued_at": now
+                }
+                for index, result in enumerate(classifications)
+                if result.get("needs_review") and (doc_id, index) not in queued
+            ]
+            if items:
+                self._append(self.items_path, items)
+                queued.update(self._key(item) for item in items)
+        return len(items)
+
+    def _resolutions(self) -> Dict[tuple, Dict[str, Any]]:
+        # Later resolutions of the same clause win
+        return {self._key(record): record for record in self._read(self.resolutions_path)}
+
+    def pending(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Unresolved items, lowest calibrated probability first"""
+        with self._lock:
+            resolved = self._resolutions()
+            items = [item for item in self._read(self.items_path) if self._key(item) not in resolved]
+        items.sort(key=lambda item: (item.get("calibrated_probability") or 0.0, item["queued_at"]))
+        return items[:limit] if limit else items
+
+    def resolve(self, doc_id: str, clause_index: int, label: str,
+                reviewer: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Record the human label for a queued clause; None if it was never queued"""
+        with self._lock:
+            item = next((i for i in self._read(self.items_path) if self._key(i) == (doc_id, clause_index)), None)
+            if item is None:
+                return None
+            resolution = {
+                "documentId": doc_id,
+                "clause_index": clause_index,
+                "clause": item["clause"],
+                "label": label,
+                "predicted": item["category"],
+                "reviewer": reviewer,
+                "resolved_at": round(time.time(), 3)
+            }
+            self._append(self.resolutions_path, [resolution])
+        return resolution
+
+    def labeled_examples(self) -> List[Dict[str, str]]:
+        """Resolved clauses as {"clause", "label"} records for recalibration"""
+        with self._lock:
+            return [{"clause": r["clause"], "label": r["label"]} for r in self._resolutions().values()]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            items = self._read(self.items_path)
+            resolutions = self._resolutions()
+        return {"queued": len(items), "resolved": len(resolutions), "pending": len(items) - len(resolutions)}
+
+
+# Singleton instance
+review_queue = ReviewQueue()
@@ -0,0 +1,131 @@
+"""
+Revision Differ
+Aligns the clauses of a new contract revision against the previous one so only
+edited clauses are reclassified, and reports the risk delta between versions
+"""
+import hashlib
+import re
+from difflib import SequenceMatcher
+from typing import Any, Callable, Dict, List, Tuple
+
+# Categories that are not risks: safe clauses and clauses no classifier could read
+# (contract_pipeline.UNCLASSIFIED)
+NON_RISK_CATEGORIES = ("Safe Clause", "Unsupported Language")
+
+
+def normalize_clause(clause: str) -> str:
+    """Whitespace/case-insensitive form so OCR reflow does not count as an edit"""
+    return re.sub(r'\s+', ' ', clause).strip().lower()
+
+
+def clause_hash(clause: str) -> str:
+    return hashlib.sha1(normalize_clause(clause).encode("utf-8")).hexdigest()
+
+
+class RevisionDiffer:
+
+    def align(self, old_clauses: List[str], new_clauses: List[str]) -> List[Tuple[str, int, int, int, int]]:
+        """
+        Sequence alignment over clause hashes.
+        Returns difflib opcodes: (tag, old_start, old_end, new_start, new_end)
+        """
+        old_hashes = [clause_hash(c) for c in old_clauses]
+        new_hashes = [clause_hash(c) for c in new_clauses]
+        matcher = SequenceMatcher(None, old_hashes, new_hashes, autojunk=False)
+        return matcher.get_opcodes()
+
+    def reuse_classifications(
+        self,
+        old_clauses: List[str],
+        old_classifications: List[Dict],
+        new_clauses: List[str],
+        classify: Callable[[List[int]], List[Dict]]
+    ) -> Tuple[List[Dict], List[Tuple[str, int, int, int, int]]]:
+        """
+        Copies classifications for unchanged clauses and calls `classify` once
+        with the indices (into `new_clauses`) of the inserted/edited clauses
+        """
+        opcodes = self.align(old_clauses, new_clauses)
+        new_classifications: List[Any] = [None] * len(new_clauses)
+        to_classify: List[int] = []
+
+        for tag, i1, i2, j1, j2 in opcodes:
+            if tag == "equal":
+                for offset in range(j2 - j1):
+                    reused = dict(old_classifications[i1 + offset])
+                    reused["clause"] = new_clauses[j1 + offset]
+                    new_classifications[j1 + offset] = reused
+            elif tag in ("replace", "insert"):
+                to_classify.extend(range(j1, j2))
+
+        if to_classify:
+            results = classify(to_classify)
+            for j, result in zip(to_classify, results):
+                new_classifications[j] = result
+
+        return new_classifications, opcodes
+
+    def risk_delta(
+        self,
+        old_classifications: List[Dict],
+        new_classifications: List[Dict],
+        opcodes: List[Tuple[str, int, int, int, int]],
+        old_score: float = None,
+        new_score: float = None
+    ) -> Dict[str, Any]:
+        """Summarize what changed between revisions from a risk point of view"""
+        added, removed, modified = [], [], []
+        unchanged = 0
+
+        for tag, i1, i2, j1, j2 in opcodes:
+            if tag == "equal":
+                unchanged += i2 - i1
+                continue
+            old_block = old_classifications[i1:i2]
+            new_block = new_classifications[j1:j2]
+            paired = min(len(old_block), len(new_block)) if tag == "replace" else 0
+            for before, after in zip(old_block[:paired], new_block[:paired]):
+                modified.append({
+                    "before": before.get("clause"),
+                    "after": after.get("clause"),
+                    "categoryBefore": before.get("category"),
+                    "categoryAfter": after.get("category"),
+                    "riskLevelBefore": before.get("risk_level"),
+                    "riskLevelAfter": after.get("risk_level")
+                })
+            added.extend(new_block[paired:])
+            removed.extend(old_block[paired:])
+
+        def is_risk(c: Dict) -> bool:
+            return c.get("category") not in NON_RISK_CATEGORIES and not c.get("merged_fragment")
+
+        new_risks = [c for c in added if is_risk(c)]
+        new_risks += [
+            {"clause": m["after"], "category": m["categoryAfter"], "risk_level": m["riskLevelAfter"]}
+            for m in modified
+            if m["categoryAfter"] not in NON_RISK_CATEGORIES and m["categoryAfter"] != m["categoryBefore"]
+        ]
+        resolved_risks = [c for c in removed if is_risk(c)]
+        resolved_risks += [
+            {"clause": m["before"], "category": m["categoryBefore"], "risk_level": m["riskLevelBefore"]}
+            for m in modified
+            if m["categoryBefore"] not in NON_RISK_CATEGORIES and m["categoryAfter"] != m["categoryBefore"]
+        ]
+
+        delta = {
+            "unchangedClauses": unchanged,
+            "addedClauses": [c.get("clause") for c in added],
+            "removedClauses": [c.get("clause") for c in removed],
+            "modifiedClauses": modified,
+            "reclassifiedClauses": len(added) + len(modified),
+            "newRisks": new_risks,
+            "resolvedRisks": resolved_risks
+        }
+        if old_score is not None and new_score is not None:
+            delta["previousScore"] = old_score
+            delta["scoreDelta"] = round(new_score - old_score, 2)
+        return delta
+
+
+# Singleton instance
+revision_differ = RevisionDiffer()
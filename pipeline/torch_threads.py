@@ -0,0 +1,184 @@
+"""
+Torch Threads
+Per-process intra-op / inter-op thread settings for the torch-based stages
+(doctr OCR, bart-large-mnli) so several uvicorn or batch workers share the
+cores instead of each one claiming all of them
+
+Usage:
+    python -m pipeline.torch_threads --benchmark --workers 2 --settings 1:1 2:1 4:1
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Explicit overrides; otherwise threads are derived from cores / workers
+INTRA_OP_ENV = "TORCH_INTRA_OP_THREADS"
+INTER_OP_ENV = "TORCH_INTER_OP_THREADS"
+# Uvicorn (and gunicorn) read their worker count from this variable
+WORKERS_ENV = "WEB_CONCURRENCY"
+
+_applied: Optional[Dict[str, int]] = None
+
+
+def available_cores() -> int:
+    """Cores this process may run on (respects taskset/cgroup cpusets)"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+def _env_int(name: str) -> Optional[int]:
+    value = os.environ.get(name, "").strip()
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+def recommend_threads(workers: Optional[int] = None, cores: Optional[int] = None) -> Dict[str, int]:
+    """
+    Split the cores evenly between worker processes. Inference here is one
+    request at a time per worker, so a single inter-op thread is enough;
+    larger shares get a second one for doctr's detection/recognition graphs.
+    """
+    workers = max(1, workers or _env_int(WORKERS_ENV) or 1)
+    cores = max(1, cores or available_cores())
+    intra_op = max(1, cores // workers)
+    inter_op = 2 if intra_op >= 8 else 1
+    return {"intra_op": intra_op, "inter_op": inter_op, "workers": workers, "cores": cores}
+
+
+def configure_torch_threads(intra_op: Optional[int] = None, inter_op: Optional[int] = None,
+                            workers: Optional[int] = None) -> Dict[str, int]:
+    """
+    Apply thread settings for this process: explicit arguments, then the
+    TORCH_*_THREADS variables, then recommend_threads(). Call before the
+    models load; later calls return the settings already applied.
+    """
+    global _applied
+    if _applied is not None:
+        return _applied
+
+    settings = recommend_threads(workers)
+    settings["intra_op"] = intra_op or _env_int(INTRA_OP_ENV) or settings["intra_op"]
+    settings["inter_op"] = inter_op or _env_int(INTER_OP_ENV) or settings["inter_op"]
+
+    # OpenMP/MKL read these when torch is first imported
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ.setdefault(name, str(settings["intra_op"]))
+
+    try:
+        import torch
+    except ImportError:
+        _applied = settings
+        return settings
+
+    torch.set_num_threads(settings["intra_op"])
+    try:
+        torch.set_num_interop_threads(settings["inter_op"])
+    except RuntimeError:
+        # Inter-op pool already started (parallel work ran before this call); keep torch's value
+        settings["inter_op"] = torch.get_num_interop_threads()
+    _applied = settings
+    return settings
+
+
+def applied_settings() -> Optional[Dict[str, int]]:
+    return _applied
+
+
+# Benchmark: aggregate classifier throughput of N concurrent workers per setting
+
+SAMPLE_CLAUSES = [
+    "The Contractor shall indemnify and hold harmless the Client against all claims, losses and damages.",
+    "Payment shall be made within thirty days of receipt of a valid invoice.",
+    "Either party may terminate this Agreement with sixty days written notice.",
+    "All intellectual property created under this Agreement shall vest in the Client.",
+    "The Receiving Party shall keep all disclosed information secret for five years.",
+    "The total liability of the Supplier shall not exceed the fees paid in the preceding twelve months.",
+    "This Agreement shall be governed by the laws of the State of New York.",
+    "Late payments shall accrue interest at 1.5% per month until paid in full.",
+]
+
+
+def _benchmark_worker(intra_op: int, inter_op: int, clauses: List[str], repeats: int,
+                      barrier, results) -> None:
+    configure_torch_threads(intra_op, inter_op)
+    from classification.risk_classifier import risk_classifier
+    risk_classifier.classify_clauses(clauses[:2])  # warm-up
+    barrier.wait()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        risk_classifier.classify_clauses(clauses)
+    results.put(time.perf_counter() - start)
+
+
+def benchmark(settings: Sequence[Tuple[int, int]], workers: int = 2, repeats: int = 3,
+              clauses: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    For each (intra_op, inter_op) pair, start `workers` fresh processes that
+    classify the same clauses concurrently and report aggregate clauses/sec.
+    """
+    clauses = clauses or SAMPLE_CLAUSES * 4
+    context = multiprocessing.get_context("spawn")  # fresh torch thread pools per setting
+    rows = []
+    for intra_op, inter_op in settings:
+        barrier = context.Barrier(workers)
+        results = context.Queue()
+        processes = [
+            context.Process(target=_benchmark_worker, args=(intra_op, inter_op, clauses, repeats, barrier, results))
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        elapsed = max(results.get() for _ in processes)
+        for process in processes:
+            process.join()
+        total = len(clauses) * repeats * workers
+        rows.append({
+            "intra_op": intra_op,
+            "inter_op": inter_op,
+            "workers": workers,
+            "threads_total": intra_op * workers,
+            "elapsed_seconds": round(elapsed, 2),
+            "clauses_per_second": round(total / elapsed, 2)
+        })
+    return rows
+
+
+def _parse_setting(value: str) -> Tuple[int, int]:
+    intra_op, _, inter_op = value.partition(":")
+    return int(intra_op), int(inter_op or 1)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Torch thread settings for contract analysis workers")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes sharing this node")
+    parser.add_argument("--benchmark", action="store_true", help="Measure classifier throughput per setting")
+    parser.add_argument("--settings", nargs="*", type=_parse_setting, default=None,
+                        help="intra:inter pairs to benchmark (default: 1, recommended and all cores)")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    recommended = recommend_threads(args.workers)
+    print(f"Cores: {recommended['cores']}  Workers: {recommended['workers']}  "
+          f"Recommended: intra_op={recommended['intra_op']} inter_op={recommended['inter_op']}")
+    if not args.benchmark:
+        return 0
+
+    settings = args.settings or sorted({
+        (1, 1),
+        (recommended["intra_op"], recommended["inter_op"]),
+        (recommended["cores"], 1)  # torch default: every worker claims every core
+    })
+    print(f"{'intra':>5} {'inter':>5} {'threads':>8} {'clauses/sec':>12}")
+    for row in benchmark(settings, workers=recommended["workers"], repeats=args.repeats):
+        print(f"{row['intra_op']:>5} {row['inter_op']:>5} {row['threads_total']:>8} {row['clauses_per_second']:>12}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
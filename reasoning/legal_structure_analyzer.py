@@ -3,7 +3,9 @@ Legal Structure Analyzer
 Understands the overall structure and key components of legal contracts
 """
 import re
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+
+from insights.entity_extractor import DocumentEntities
 
 class LegalStructureAnalyzer:
     
@@ -16,24 +18,61 @@ class LegalStructureAnalyzer:
             "Partnership Agreement",
             "License Agreement"
         ]
+        # Keyword packs for non-English text (segmentation/language_detector.py codes);
+        # the English rules below stay the default
+        self.rule_packs = {
+            "hi": {
+                "contract_types": {
+                    "दृष्टिबंधक": "Hypothecation Deed",
+                    "हाइपोथिकेशन": "Hypothecation Deed",
+                    "नियुक्ति पत्र": "Employment Agreement",
+                    "प्रस्ताव पत्र": "Employment Agreement",
+                    "किरायानामा": "Lease Agreement",
+                    "गोपनीयता समझौता": "Non-Disclosure Agreement",
+                    "सेवा अनुबंध": "Service Agreement",
+                    "साझेदारी": "Partnership Agreement"
+                },
+                "sections": {
+                    "भुगतान": "Payment",
+                    "वेतन": "Compensation",
+                    "पारिश्रमिक": "Compensation",
+                    "समाप्ति": "Termination",
+                    "गोपनीयता": "Confidentiality",
+                    "बौद्धिक संपदा": "Intellectual Property",
+                    "क्षतिपूर्ति": "Indemnification",
+                    "दायित्व": "Liability",
+                    "वारंटी": "Warranties",
+                    "लागू कानून": "Governing Law"
+                },
+                "duration": (r'(\d+)\s*(वर्ष|साल|महीने|माह|दिन)',
+                             {"वर्ष": "year", "साल": "year", "महीने": "month", "माह": "month", "दिन": "day"})
+            }
+        }
         
-    def analyze_structure(self, full_text: str, clauses: List[str]) -> Dict[str, Any]:
+    def analyze_structure(self, full_text: str, clauses: List[str],
+                          languages: Optional[List[str]] = None,
+                          entities: Optional[List[Dict]] = None) -> Dict[str, Any]:
         """
         Analyzes the legal structure of the contract
         Returns insights about contract type, key sections, and parties
+        `languages` (detected in the clauses) selects the extra rule packs to
+        apply; by default all packs are tried
+        `entities` (see insights/entity_extractor.py) supply the parties under
+        every defined role and all stated durations
         """
-        
+        packs = [pack for lang, pack in self.rule_packs.items() if languages is None or lang in languages]
+
         # Detect contract type
-        contract_type = self._detect_contract_type(full_text)
+        contract_type = self._detect_contract_type(full_text, packs)
         
         # Extract parties (simplified - looks for common patterns)
-        parties = self._extract_parties(full_text)
+        parties = self._extract_parties(full_text, entities)
         
         # Identify key sections
-        sections = self._identify_sections(full_text, clauses)
+        sections = self._identify_sections(full_text, clauses, packs)
         
         # Analyze contract duration/term
-        term_info = self._analyze_term(full_text)
+        term_info = self._analyze_term(full_text, packs, entities)
         
         return {
             "contract_type": contract_type,
@@ -44,13 +83,18 @@ class LegalStructureAnalyzer:
             "structure_quality": self._assess_structure_quality(sections)
         }
     
-    def _detect_contract_type(self, text: str) -> str:
+    def _detect_contract_type(self, text: str, packs: List[Dict] = ()) -> str:
         """Detect type of contract based on keywords"""
         text_lower = text.lower()
         
         for contract_type in self.contract_types:
             if contract_type.lower() in text_lower:
                 return contract_type
+
+        for pack in packs:
+            for keyword, contract_type in pack["contract_types"].items():
+                if keyword in text:
+                    return contract_type
                 
         # Fallback detection based on keywords
         if "employment" in text_lower or "employee" in text_lower:
@@ -62,9 +106,13 @@ class LegalStructureAnalyzer:
         else:
             return "General Agreement"
     
-    def _extract_parties(self, text: str) -> Dict[str, str]:
+    def _extract_parties(self, text: str, entities: Optional[List[Dict]] = None) -> Dict[str, str]:
         """Extract party information from contract"""
         parties = {}
+
+        if entities is not None:
+            parties = DocumentEntities(entities).parties()
+            return parties or {'party_1': 'First Party', 'party_2': 'Second Party'}
         
         # Look for common party patterns
         company_match = re.search(r'Company[:\s]*([A-Z][a-z\s&]+(?:Inc\.|LLC|Corp\.|Ltd\.)?)', text)
@@ -84,7 +132,7 @@ class LegalStructureAnalyzer:
         
         return parties
     
-    def _identify_sections(self, text: str, clauses: List[str]) -> List[str]:
+    def _identify_sections(self, text: str, clauses: List[str], packs: List[Dict] = ()) -> List[str]:
         """Identify major sections in the contract"""
         sections = []
         
@@ -99,15 +147,43 @@ class LegalStructureAnalyzer:
         for keyword in section_keywords:
             if keyword.lower() in text_lower:
                 sections.append(keyword)
+
+        for pack in packs:
+            for keyword, section in pack["sections"].items():
+                if keyword in text and section not in sections:
+                    sections.append(section)
         
         return sections
     
-    def _analyze_term(self, text: str) -> Dict[str, Any]:
+    def _analyze_term(self, text: str, packs: List[Dict] = (),
+                      entities: Optional[List[Dict]] = None) -> Dict[str, Any]:
         """Analyze contract term/duration"""
+        durations = [e for e in entities or [] if e["type"] == "duration" and not e.get("net_terms")]
+        # A duration stated in a term sentence is the term; other extracted durations
+        # (payment, notice periods) only count when no rule pack finds one
+        term = next((e for e in durations if "term" in e["tags"] and "notice" not in e["tags"]), None)
+
         # Look for duration patterns
-        duration_pattern = r'(\d+)\s*(year|month|day)s?'
-        matches = re.findall(duration_pattern, text.lower())
-        
+        matches = []
+        if entities is None:
+            duration_pattern = r'(\d+)\s*(year|month|day)s?'
+            matches = re.findall(duration_pattern, text.lower())
+        for pack in packs:
+            if matches or term:
+                break
+            pattern, units = pack["duration"]
+            matches = [(num, units[unit]) for num, unit in re.findall(pattern, text)]
+
+        if term is None and not matches and durations:
+            term = durations[0]
+
+        if term is not None:
+            return {
+                "duration": f"{term['value']} {term['unit'].replace('_', ' ')}(s)",
+                "has_fixed_term": True,
+                "days": term["days"],
+                "all_durations": [{"text": e["text"], "days": e["days"], "tags": e["tags"]} for e in durations]
+            }
         if matches:
             # Take the first significant duration found
             num, unit = matches[0]
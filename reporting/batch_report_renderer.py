@@ -0,0 +1,185 @@
+"""
+Batch Report Renderer
+Renders intelligence PDFs for many analyses across a process pool, into a
+directory or a zip stream
+
+Usage:
+    python -m reporting.batch_report_renderer results/portfolio.jsonl --output-dir reports/
+    python -m reporting.batch_report_renderer --benchmark
+"""
+import argparse
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import re
+import sys
+import time
+import zipfile
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+_worker_generator = None
+
+
+def _init_worker() -> None:
+    global _worker_generator
+    # Each worker builds its own generator (styles/table styles) once
+    from reporting.intelligence_report_generator import IntelligenceReportGenerator
+    _worker_generator = IntelligenceReportGenerator()
+
+
+def _render_one(job: Tuple[str, Dict[str, Any], Optional[int]]) -> Tuple[str, bytes, int, Optional[str]]:
+    name, analysis, max_risks = job
+    buffer = io.BytesIO()
+    try:
+        pages = _worker_generator.render(analysis, buffer, max_risks=max_risks)
+        return name, buffer.getvalue(), pages, None
+    except Exception as e:
+        return name, b"", 0, f"{type(e).__name__}: {e}"
+
+
+def _safe_filename(name: str) -> str:
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', name).strip('_') or "report"
+
+
+def render_reports(
+    analyses: Iterable[Tuple[str, Dict[str, Any]]],
+    output_dir: Optional[str] = None,
+    zip_stream=None,
+    workers: int = 2,
+    max_risks: Optional[int] = 15,
+    max_pending: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Render (name, analysis) pairs to `<output_dir>/<name>.pdf` and/or into a
+    zip written to `zip_stream`. Returns counts and pages/sec.
+    The pool is fed `max_pending` analyses at a time (default 8 per worker),
+    so a large results file is never read far ahead of the renderers.
+    """
+    if output_dir is None and zip_stream is None:
+        raise ValueError("Provide output_dir and/or zip_stream")
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    jobs = ((name, analysis, max_risks) for name, analysis in analyses)
+    max_pending = max_pending or workers * 8
+    stats = {"reports": 0, "pages": 0, "bytes": 0, "failed": 0, "errors": {}}
+    start = time.perf_counter()
+
+    archive = zipfile.ZipFile(zip_stream, "w", zipfile.ZIP_STORED) if zip_stream is not None else None
+    try:
+        with multiprocessing.Pool(workers, initializer=_init_worker) as pool:
+            # imap_unordered drains its input eagerly, so hand it one bounded chunk at a time
+            while True:
+                chunk = list(itertools.islice(jobs, max_pending))
+                if not chunk:
+                    break
+                chunksize = max(1, min(4, len(chunk) // workers))
+                for name, pdf_bytes, pages, error in pool.imap_unordered(_render_one, chunk, chunksize=chunksize):
+                    if error is not None:
+                        stats["failed"] += 1
+                        stats["errors"][name] = error
+                        continue
+                    filename = f"{_safe_filename(name)}.pdf"
+                    if output_dir:
+                        with open(os.path.join(output_dir, filename), "wb") as f:
+                            f.write(pdf_bytes)
+                    if archive is not None:
+                        # PDFs are already compressed, so store rather than deflate
+                        archive.writestr(filename, pdf_bytes)
+                    stats["reports"] += 1
+                    stats["pages"] += pages
+                    stats["bytes"] += len(pdf_bytes)
+    finally:
+        if archive is not None:
+            archive.close()
+
+    elapsed = time.perf_counter() - start
+    stats["elapsed_seconds"] = round(elapsed, 2)
+    stats["pages_per_second"] = round(stats["pages"] / elapsed, 2) if elapsed > 0 else 0.0
+    stats["reports_per_second"] = round(stats["reports"] / elapsed, 2) if elapsed > 0 else 0.0
+    return stats
+
+
+def iter_batch_results(jsonl_path: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """(name, analysis) pairs from a pipeline.batch_runner JSONL file"""
+    with open(jsonl_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            name = os.path.splitext(os.path.basename(record["source"]))[0]
+            yield f"{name}-{record['result'].get('documentId', '')[:8]}", record["result"]
+
+
+def synthetic_analysis(risk_count: int, seed: int = 0) -> Dict[str, Any]:
+    """Fake /analyze response with `risk_count` detailed risks, for benchmarking"""
+    rng = random.Random(seed)
+    categories = ["Financial Liability", "Termination and Cancellation", "Payment Terms",
+                  "Intellectual Property Ownership", "Confidentiality", "Indemnification"]
+    return {
+        "riskScore": rng.randint(0, 100),
+        "risks": [
+            {
+                "clause": f"Clause {i}: " + " ".join(rng.choice(["the", "Contractor", "shall", "indemnify",
+                                                                 "Company", "payment", "terminate", "notice"])
+                                                      for _ in range(rng.randint(10, 60))),
+                "category": rng.choice(categories),
+                "confidence": round(rng.uniform(0.5, 1.0), 4)
+            }
+            for i in range(risk_count)
+        ],
+        "legalStructure": {"contractType": "Service Agreement", "structureQuality": "Standard",
+                           "term": {"duration": "12 month(s)"}, "keySections": ["Payment", "Termination"]},
+        "financialRisks": {"totalRiskCount": 1, "estimatedExposure": "Moderate", "severity": "Medium",
+                           "risks": [{"type": "Penalty Clause", "severity": "Medium", "description": "Penalty provisions"}]},
+        "economicImpact": {"contractValue": 10000, "totalRiskCost": 3000.0, "riskAdjustedValue": 7000.0,
+                           "riskPercentage": 30.0, "economicViability": "Caution Advised - Significant Risk Exposure",
+                           "recommendations": ["Request a liability cap or obtain insurance coverage"]}
+    }
+
+
+def benchmark(report_count: int = 200, workers_options=(1, 2, 4), sizes=(5, 50, 500)) -> None:
+    """Render synthetic analyses of varying size and print pages/sec per worker count"""
+    analyses = [(f"synthetic-{i}", synthetic_analysis(sizes[i % len(sizes)], seed=i)) for i in range(report_count)]
+    print(f"{report_count} reports, risk counts cycling through {sizes}, all clauses rendered")
+    for workers in workers_options:
+        stats = render_reports(analyses, zip_stream=io.BytesIO(), workers=workers, max_risks=None)
+        print(f"  workers={workers}: {stats['pages']} pages in {stats['elapsed_seconds']}s "
+              f"-> {stats['pages_per_second']} pages/sec, {stats['reports_per_second']} reports/sec")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Render intelligence reports for many analyses")
+    parser.add_argument("results_jsonl", nargs="?", help="Output of pipeline.batch_runner")
+    parser.add_argument("--output-dir", default=None, help="Directory for PDFs")
+    parser.add_argument("--zip", default=None, help="Write all PDFs into this zip file")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    parser.add_argument("--all-clauses", action="store_true", help="Render every clause instead of the top 15")
+    parser.add_argument("--benchmark", action="store_true", help="Run the synthetic rendering benchmark")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        benchmark()
+        return 0
+    if not args.results_jsonl:
+        parser.error("results_jsonl is required unless --benchmark is given")
+
+    zip_stream = open(args.zip, "wb") if args.zip else None
+    try:
+        stats = render_reports(iter_batch_results(args.results_jsonl), output_dir=args.output_dir,
+                               zip_stream=zip_stream, workers=args.workers,
+                               max_risks=None if args.all_clauses else 15)
+    finally:
+        if zip_stream is not None:
+            zip_stream.close()
+    print(f"Rendered {stats['reports']} reports ({stats['pages']} pages), {stats['failed']} failed")
+    print(f"Throughput: {stats['pages_per_second']} pages/sec")
+    return 0 if stats["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
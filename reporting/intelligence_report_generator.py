@@ -9,14 +9,44 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from datetime import datetime
+from tempfile import SpooledTemporaryFile
+from typing import Iterator, Optional
+from xml.sax.saxutils import escape
 import os
 
+
+class _LazyStory(list):
+    """
+    Story list that pulls flowables from a generator as doc.build consumes
+    them, so only a small window of a 1,000-clause report is alive at once.
+    doc.build only reads/removes/inserts at the front, which this supports.
+    """
+
+    def __init__(self, flowables, window: int = 64):
+        super().__init__()
+        self._source = iter(flowables)
+        self._window = window
+        self._refill()
+
+    def _refill(self):
+        while self._source is not None and super().__len__() < self._window:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+
+    def __len__(self):
+        self._refill()
+        return super().__len__()
+
+
 class IntelligenceReportGenerator:
-    
+
     def __init__(self):
         self.styles = getSampleStyleSheet()
         self._setup_custom_styles()
-    
+        self._setup_table_styles()
+
     def _setup_custom_styles(self):
         """Setup custom paragraph styles for the report"""
         # Title style
@@ -28,7 +58,7 @@ class IntelligenceReportGenerator:
             spaceAfter=30,
             alignment=TA_CENTER
         ))
-        
+
         # Section header
         self.styles.add(ParagraphStyle(
             name='SectionHeader',
@@ -38,7 +68,7 @@ class IntelligenceReportGenerator:
             spaceAfter=12,
             spaceBefore=20
         ))
-        
+
         # Score style
         self.styles.add(ParagraphStyle(
             name='ScoreStyle',
@@ -48,58 +78,122 @@ class IntelligenceReportGenerator:
             alignment=TA_CENTER,
             spaceAfter=10
         ))
-    
-    def generate_report(self, analysis_data: dict, output_path: str = "contract_intelligence_report.pdf"):
+
+        # Detailed risk entry (one paragraph per clause keeps long reports light)
+        self.styles.add(ParagraphStyle(
+            name='RiskEntry',
+            parent=self.styles['Normal'],
+            spaceAfter=0.15*inch
+        ))
+
+    def _setup_table_styles(self):
+        """Build table styles once; they are shared by every report"""
+        self.interpretation_styles = {}
+        for level, risk_color in (("HIGH RISK", colors.red), ("MEDIUM RISK", colors.orange), ("LOW RISK", colors.green)):
+            self.interpretation_styles[level] = TableStyle([
+                ('BACKGROUND', (0, 0), (-1, -1), risk_color),
+                ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, -1), 18),
+                ('PADDING', (0, 0), (-1, -1), 12),
+            ])
+
+        self.legal_table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#e0e7ff')),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('PADDING', (0, 0), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+        ])
+
+        self.financial_table_style = self._summary_table_style('#fef3c7')
+        self.economic_table_style = self._summary_table_style('#dbeafe')
+
+    def _summary_table_style(self, label_color: str) -> TableStyle:
+        return TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor(label_color)),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 11),
+            ('PADDING', (0, 0), (-1, -1), 10),
+            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+        ])
+
+    def generate_report(self, analysis_data: dict, output_path="contract_intelligence_report.pdf",
+                        max_risks: Optional[int] = 15):
         """
         Generate a comprehensive intelligence report PDF
-        
+
         Args:
             analysis_data: Complete analysis data from backend
-            output_path: Path where PDF will be saved
+            output_path: Path where PDF will be saved, or a writable binary stream
+            max_risks: Number of detailed risks to include (None renders every clause)
         """
-        doc = SimpleDocTemplate(output_path, pagesize=letter,
+        self.render(analysis_data, output_path, max_risks=max_risks)
+        return output_path
+
+    def render(self, analysis_data: dict, output, max_risks: Optional[int] = 15) -> int:
+        """Render the report into a path or writable stream and return the page count"""
+        doc = SimpleDocTemplate(output, pagesize=letter,
                                 rightMargin=72, leftMargin=72,
-                                topMargin=72, bottomMargin=18)
-        
-        story = []
-        
+                                topMargin=72, bottomMargin=18,
+                                pageCompression=1)
+
+        # Build PDF
+        doc.build(_LazyStory(self._story(analysis_data, max_risks)))
+        return doc.page
+
+    def stream_report(self, analysis_data: dict, max_risks: Optional[int] = 15,
+                      chunk_size: int = 64 * 1024, spool_max_size: int = 8 * 1024 * 1024) -> Iterator[bytes]:
+        """
+        Render a report and yield it in chunks, e.g. for a FastAPI StreamingResponse.
+        Output is spooled in memory and only spills to a temp file above
+        `spool_max_size`, so nothing is written to a fixed path on disk.
+        """
+        with SpooledTemporaryFile(max_size=spool_max_size) as buffer:
+            self.generate_report(analysis_data, buffer, max_risks=max_risks)
+            buffer.seek(0)
+            while True:
+                chunk = buffer.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def _story(self, analysis_data: dict, max_risks: Optional[int]):
+        """Yields the report flowables section by section"""
         # Title Page
-        story.append(Spacer(1, 2*inch))
-        story.append(Paragraph("CONTRACT INTELLIGENCE REPORT", self.styles['CustomTitle']))
-        story.append(Spacer(1, 0.3*inch))
-        story.append(Paragraph(f"Generated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}", 
-                              self.styles['Normal']))
-        story.append(Spacer(1, 0.5*inch))
-        
+        yield Spacer(1, 2*inch)
+        yield Paragraph("CONTRACT INTELLIGENCE REPORT", self.styles['CustomTitle'])
+        yield Spacer(1, 0.3*inch)
+        yield Paragraph(f"Generated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}",
+                        self.styles['Normal'])
+        yield Spacer(1, 0.5*inch)
+
         # Executive Summary - Risk Score
-        story.append(Paragraph("RISK ASSESSMENT", self.styles['SectionHeader']))
+        yield Paragraph("RISK ASSESSMENT", self.styles['SectionHeader'])
         risk_score = analysis_data.get('riskScore', 0)
-        story.append(Paragraph(f"{risk_score}", self.styles['ScoreStyle']))
-        story.append(Paragraph("Overall Risk Score (0-100)", self.styles['Normal']))
-        story.append(Spacer(1, 0.3*inch))
-        
+        yield Paragraph(f"{risk_score}", self.styles['ScoreStyle'])
+        yield Paragraph("Overall Risk Score (0-100)", self.styles['Normal'])
+        yield Spacer(1, 0.3*inch)
+
         # Risk interpretation
         risk_level = "HIGH RISK" if risk_score >= 70 else "MEDIUM RISK" if risk_score >= 40 else "LOW RISK"
-        risk_color = colors.red if risk_score >= 70 else colors.orange if risk_score >= 40 else colors.green
-        
-        interpretation_data = [[risk_level]]
-        interpretation_table = Table(interpretation_data, colWidths=[6*inch])
-        interpretation_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), risk_color),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 18),
-            ('PADDING', (0, 0), (-1, -1), 12),
-        ]))
-        story.append(interpretation_table)
-        story.append(Spacer(1, 0.5*inch))
-        
+
+        interpretation_table = Table([[risk_level]], colWidths=[6*inch])
+        interpretation_table.setStyle(self.interpretation_styles[risk_level])
+        yield interpretation_table
+        yield Spacer(1, 0.5*inch)
+
         # Legal Structure
         if 'legalStructure' in analysis_data:
-            story.append(PageBreak())
-            story.append(Paragraph("⚖️ LEGAL STRUCTURE ANALYSIS", self.styles['SectionHeader']))
-            
+            yield PageBreak()
+            yield Paragraph("⚖️ LEGAL STRUCTURE ANALYSIS", self.styles['SectionHeader'])
+
             legal = analysis_data['legalStructure']
             legal_data = [
                 ['Contract Type:', legal.get('contractType', 'N/A')],
@@ -107,59 +201,42 @@ class IntelligenceReportGenerator:
                 ['Term:', legal.get('term', {}).get('duration', 'Undefined')],
                 ['Key Sections:', ', '.join(legal.get('keySections', []))[:100]]
             ]
-            
+
             legal_table = Table(legal_data, colWidths=[2*inch, 4.5*inch])
-            legal_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#e0e7ff')),
-                ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-                ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('PADDING', (0, 0), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-            ]))
-            story.append(legal_table)
-            story.append(Spacer(1, 0.3*inch))
-        
+            legal_table.setStyle(self.legal_table_style)
+            yield legal_table
+            yield Spacer(1, 0.3*inch)
+
         # Financial Risks
         if 'financialRisks' in analysis_data and analysis_data['financialRisks'].get('totalRiskCount', 0) > 0:
-            story.append(PageBreak())
-            story.append(Paragraph("💰 FINANCIAL RISK DETECTION", self.styles['SectionHeader']))
-            
+            yield PageBreak()
+            yield Paragraph("💰 FINANCIAL RISK DETECTION", self.styles['SectionHeader'])
+
             fin = analysis_data['financialRisks']
             fin_summary = [
                 ['Total Financial Risks:', str(fin.get('totalRiskCount', 0))],
                 ['Estimated Exposure:', fin.get('estimatedExposure', 'N/A')],
                 ['Severity:', fin.get('severity', 'N/A')]
             ]
-            
+
             fin_table = Table(fin_summary, colWidths=[2.5*inch, 4*inch])
-            fin_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#fef3c7')),
-                ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-                ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 11),
-                ('PADDING', (0, 0), (-1, -1), 10),
-                ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-            ]))
-            story.append(fin_table)
-            story.append(Spacer(1, 0.2*inch))
-            
+            fin_table.setStyle(self.financial_table_style)
+            yield fin_table
+            yield Spacer(1, 0.2*inch)
+
             # Detailed risks
-            story.append(Paragraph("Detected Risks:", self.styles['Heading3']))
+            yield Paragraph("Detected Risks:", self.styles['Heading3'])
             for idx, risk in enumerate(fin.get('risks', [])[:10], 1):  # Limit to top 10
-                risk_text = f"{idx}. <b>{risk.get('type', 'Unknown')}</b> [{risk.get('severity', 'N/A')}]<br/>"
-                risk_text += f"   {risk.get('description', 'No description')}"
-                story.append(Paragraph(risk_text, self.styles['Normal']))
-                story.append(Spacer(1, 0.1*inch))
-        
+                risk_text = f"{idx}. <b>{escape(risk.get('type', 'Unknown'))}</b> [{escape(risk.get('severity', 'N/A'))}]<br/>"
+                risk_text += f"   {escape(risk.get('description', 'No description'))}"
+                yield Paragraph(risk_text, self.styles['Normal'])
+                yield Spacer(1, 0.1*inch)
+
         # Economic Impact
         if 'economicImpact' in analysis_data:
-            story.append(PageBreak())
-            story.append(Paragraph("📊 ECONOMIC IMPACT ANALYSIS", self.styles['SectionHeader']))
-            
+            yield PageBreak()
+            yield Paragraph("📊 ECONOMIC IMPACT ANALYSIS", self.styles['SectionHeader'])
+
             econ = analysis_data['economicImpact']
             econ_data = [
                 ['Contract Value:', f"${econ.get('contractValue', 0):,}"],
@@ -168,44 +245,36 @@ class IntelligenceReportGenerator:
                 ['Risk Percentage:', f"{econ.get('riskPercentage', 0)}%"],
                 ['Economic Viability:', econ.get('economicViability', 'N/A')]
             ]
-            
+            simulation = econ.get('exposureSimulation')
+            if simulation and simulation.get('trials'):
+                econ_data.append(['Exposure P50 / P90 / P99:',
+                                  f"${simulation['p50']:,} / ${simulation['p90']:,} / ${simulation['p99']:,}"])
+
             econ_table = Table(econ_data, colWidths=[2.5*inch, 4*inch])
-            econ_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#dbeafe')),
-                ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-                ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 11),
-                ('PADDING', (0, 0), (-1, -1), 10),
-                ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-            ]))
-            story.append(econ_table)
-            story.append(Spacer(1, 0.3*inch))
-            
+            econ_table.setStyle(self.economic_table_style)
+            yield econ_table
+            yield Spacer(1, 0.3*inch)
+
             # Recommendations
             if econ.get('recommendations'):
-                story.append(Paragraph("💡 RECOMMENDATIONS", self.styles['Heading3']))
+                yield Paragraph("💡 RECOMMENDATIONS", self.styles['Heading3'])
                 for idx, rec in enumerate(econ['recommendations'], 1):
-                    story.append(Paragraph(f"{idx}. {rec}", self.styles['Normal']))
-                    story.append(Spacer(1, 0.1*inch))
-        
+                    yield Paragraph(f"{idx}. {escape(rec)}", self.styles['Normal'])
+                    yield Spacer(1, 0.1*inch)
+
         # Identified Risks (Detailed)
         if 'risks' in analysis_data and len(analysis_data['risks']) > 0:
-            story.append(PageBreak())
-            story.append(Paragraph("⚠️ IDENTIFIED RISKS (DETAILED)", self.styles['SectionHeader']))
-            
-            for idx, risk in enumerate(analysis_data['risks'][:15], 1):  # Top 15 risks
-                risk_header = f"{idx}. {risk.get('category', 'Unknown Category')} - Confidence: {risk.get('confidence', 0)*100:.1f}%"
-                story.append(Paragraph(f"<b>{risk_header}</b>", self.styles['Normal']))
-                
-                clause_text = risk.get('clause', 'No clause text available')[:200] + "..."
-                story.append(Paragraph(f"<i>Clause: {clause_text}</i>", self.styles['Normal']))
-                story.append(Paragraph(risk.get('explanation', ''), self.styles['Normal']))
-                story.append(Spacer(1, 0.15*inch))
-        
-        # Build PDF
-        doc.build(story)
-        return output_path
+            yield PageBreak()
+            yield Paragraph("⚠️ IDENTIFIED RISKS (DETAILED)", self.styles['SectionHeader'])
+
+            risks = analysis_data['risks'] if max_risks is None else analysis_data['risks'][:max_risks]
+            for idx, risk in enumerate(risks, 1):
+                risk_header = f"{idx}. {escape(str(risk.get('category', 'Unknown Category')))} - Confidence: {risk.get('confidence', 0)*100:.1f}%"
+                clause_text = escape(risk.get('clause', 'No clause text available')[:200]) + "..."
+                entry = f"<b>{risk_header}</b><br/><i>Clause: {clause_text}</i>"
+                if risk.get('explanation'):
+                    entry += f"<br/>{escape(risk['explanation'])}"
+                yield Paragraph(entry, self.styles['RiskEntry'])
 
 # Singleton instance
 intelligence_report_generator = IntelligenceReportGenerator()
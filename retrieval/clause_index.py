@@ -0,0 +1,261 @@
+"""
+Clause Index
+Append-only float16 memory-mapped matrix of clause embeddings with an
+inverted-file (IVF) approximate nearest-neighbor index for similar-clause search
+"""
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process servers only
+    fcntl = None
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ClauseIndex:
+    """
+    Files under `root`:
+        meta.json      dim, row count, IVF list count
+        vectors.f16    (rows, dim) float16, L2-normalized embeddings
+        rows.jsonl     one {"doc_id", "clause_index", "clause"} record per row
+        offsets.i64    byte offset of each row in rows.jsonl (top-k lookups seek directly)
+        assign.i32     IVF list of each row
+        centroids.npy  IVF centroids (float32)
+        documents.txt  indexed document ids
+        .lock          held while writing, so several server workers can append
+    """
+
+    def __init__(self, root: str = os.path.join(ROOT_DIR, "index"), exact_search_below: int = 20000):
+        self.root = root
+        self.exact_search_below = exact_search_below
+        self._lock = threading.Lock()
+        # meta.json mtime when the state was read; another process writing it triggers a reload
+        self._loaded: Optional[int] = None
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    @contextmanager
+    def _write_lock(self):
+        """Thread lock plus an exclusive file lock shared by every process using this root"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            os.makedirs(self.root, exist_ok=True)
+            with open(self._file(".lock"), "a") as handle:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _meta_mtime(self) -> int:
+        try:
+            return os.stat(self._file("meta.json")).st_mtime_ns
+        except OSError:
+            return 0
+
+    def _load(self, force: bool = False) -> None:
+        mtime = self._meta_mtime()
+        if self._loaded == mtime and not force:
+            return
+        self.dim: Optional[int] = None
+        self.count = 0
+        self.centroids: Optional[np.ndarray] = None
+        self.documents = set()
+        if os.path.exists(self._file("meta.json")):
+            with open(self._file("meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            self.dim, self.count = meta["dim"], meta["count"]
+        if os.path.exists(self._file("centroids.npy")):
+            self.centroids = np.load(self._file("centroids.npy"))
+        if os.path.exists(self._file("documents.txt")):
+            with open(self._file("documents.txt"), "r", encoding="utf-8") as f:
+                self.documents = {line.strip() for line in f if line.strip()}
+        self._loaded = mtime
+
+    def _vectors(self) -> np.ndarray:
+        return np.memmap(self._file("vectors.f16"), dtype=np.float16, mode="r", shape=(self.count, self.dim))
+
+    def _int_file(self, name: str, dtype) -> np.ndarray:
+        path = self._file(name)
+        if self.count == 0 or not os.path.exists(path):
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", shape=(self.count,))
+
+    def _write_meta(self) -> None:
+        tmp_path = self._file("meta.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "count": self.count,
+                       "lists": 0 if self.centroids is None else len(self.centroids)}, f)
+        os.replace(tmp_path, self._file("meta.json"))
+
+    def _truncate_to_count(self) -> None:
+        """Drop bytes past the committed row count (an append that died before meta.json was written)"""
+        sizes = {"vectors.f16": self.count * (self.dim or 0) * 2, "offsets.i64": self.count * 8, "assign.i32": self.count * 4}
+        rows_end = 0
+        if self.count:
+            with open(self._file("rows.jsonl"), "rb") as f:
+                f.seek(int(self._int_file("offsets.i64", np.int64)[self.count - 1]))
+                rows_end = f.tell() + len(f.readline())
+        sizes["rows.jsonl"] = rows_end
+        for name, size in sizes.items():
+            path = self._file(name)
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                os.truncate(path, size)
+
+    def __len__(self) -> int:
+        self._load()
+        return self.count
+
+    def has_document(self, doc_id: str) -> bool:
+        self._load()
+        return doc_id in self.documents
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        if self.centroids is None:
+            return np.zeros(len(vectors), dtype=np.int32)
+        return np.argmax(vectors.astype(np.float32) @ self.centroids.T, axis=1).astype(np.int32)
+
+    def add(self, doc_id: str, clauses: List[str], embeddings: np.ndarray,
+            clause_indices: Optional[List[int]] = None) -> int:
+        """Append one document's clause embeddings; returns rows added"""
+        if len(clauses) == 0:
+            return 0
+        # Copy: the caller's array is not normalized in place
+        embeddings = np.array(embeddings, dtype=np.float32)
+        embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        clause_indices = clause_indices if clause_indices is not None else list(range(len(clauses)))
+
+        with self._write_lock():
+            # Another worker may have appended since this process last looked
+            self._load(force=True)
+            if doc_id in self.documents:
+                return 0
+            if self.dim is None:
+                self.dim = embeddings.shape[1]
+            if embeddings.shape[1] != self.dim:
+                raise ValueError(f"Embedding dim {embeddings.shape[1]} does not match index dim {self.dim}")
+            os.makedirs(self.root, exist_ok=True)
+            self._truncate_to_count()
+
+            offsets = []
+            with open(self._file("rows.jsonl"), "ab") as f:
+                position = f.tell()
+                for clause, index in zip(clauses, clause_indices):
+                    line = (json.dumps({"doc_id": doc_id, "clause_index": index, "clause": clause}) + "\n").encode("utf-8")
+                    offsets.append(position)
+                    f.write(line)
+                    position += len(line)
+            with open(self._file("offsets.i64"), "ab") as f:
+                f.write(np.asarray(offsets, dtype=np.int64).tobytes())
+            with open(self._file("assign.i32"), "ab") as f:
+                f.write(self._assign(embeddings).tobytes())
+            with open(self._file("vectors.f16"), "ab") as f:
+                f.write(embeddings.astype(np.float16).tobytes())
+            with open(self._file("documents.txt"), "a", encoding="utf-8") as f:
+                f.write(doc_id + "\n")
+
+            self.documents.add(doc_id)
+            self.count += len(clauses)
+            self._write_meta()
+            return len(clauses)
+
+    def build(self, n_lists: Optional[int] = None, sample_size: int = 100000,
+              iterations: int = 10, seed: int = 0, chunk_rows: int = 65536) -> int:
+        """
+        (Re)train the IVF coarse quantizer with spherical k-means on a sample and
+        reassign every row. Run after bulk loads; later adds use the trained centroids.
+        """
+        with self._write_lock():
+            self._load(force=True)
+            if self.count == 0:
+                return 0
+            n_lists = n_lists or max(1, int(np.sqrt(self.count)))
+            vectors = self._vectors()
+            rng = np.random.default_rng(seed)
+            sample_ids = np.sort(rng.choice(self.count, size=min(sample_size, self.count), replace=False))
+            sample = np.asarray(vectors[sample_ids], dtype=np.float32)
+            n_lists = min(n_lists, len(sample))
+
+            centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+            for _ in range(iterations):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, labels, sample)
+                counts = np.bincount(labels, minlength=n_lists)
+                empty = counts == 0
+                # Re-seed empty lists from random sample points
+                sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+                centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+
+            self.centroids = centroids.astype(np.float32)
+            np.save(self._file("centroids.npy"), self.centroids)
+
+            tmp_path = self._file("assign.i32.tmp")
+            with open(tmp_path, "wb") as f:
+                for start in range(0, self.count, chunk_rows):
+                    f.write(self._assign(np.asarray(vectors[start:start + chunk_rows])).tobytes())
+            os.replace(tmp_path, self._file("assign.i32"))
+            self._write_meta()
+            return n_lists
+
+    def _rows(self, row_ids: List[int]) -> List[Dict[str, Any]]:
+        offsets = self._int_file("offsets.i64", np.int64)
+        rows = []
+        with open(self._file("rows.jsonl"), "rb") as f:
+            for row_id in row_ids:
+                f.seek(int(offsets[row_id]))
+                rows.append(json.loads(f.readline()))
+        return rows
+
+    def search(self, query: np.ndarray, k: int = 10, n_probe: int = 8,
+               exclude_doc: Optional[str] = None, chunk_rows: int = 262144) -> List[Dict[str, Any]]:
+        """
+        Top-k clauses by cosine similarity. Uses the IVF lists once the index
+        is built and large; small or unbuilt indexes are scanned exactly.
+        """
+        self._load()
+        if self.count == 0:
+            return []
+        query = np.array(query, dtype=np.float32).reshape(-1)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+        vectors = self._vectors()
+        fetch = k * 4 if exclude_doc else k
+
+        if self.centroids is not None and self.count >= self.exact_search_below:
+            probes = np.argsort(self.centroids @ query)[::-1][:n_probe]
+            candidates = np.flatnonzero(np.isin(self._int_file("assign.i32", np.int32), probes))
+            scores = np.asarray(vectors[candidates], dtype=np.float32) @ query
+        else:
+            candidates = np.arange(self.count)
+            scores = np.concatenate([
+                np.asarray(vectors[start:start + chunk_rows], dtype=np.float32) @ query
+                for start in range(0, self.count, chunk_rows)
+            ])
+
+        top = np.argsort(scores)[::-1][:fetch] if len(scores) <= fetch else \
+            np.argpartition(scores, -fetch)[-fetch:]
+        top = top[np.argsort(scores[top])[::-1]]
+
+        results = []
+        for row, score in zip(self._rows([int(candidates[i]) for i in top]), scores[top]):
+            if exclude_doc and row["doc_id"] == exclude_doc:
+                continue
+            row["score"] = round(float(score), 4)
+            results.append(row)
+            if len(results) == k:
+                break
+        return results
+
+
+# Singleton instance
+clause_index = ClauseIndex()
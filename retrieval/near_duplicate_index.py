@@ -0,0 +1,141 @@
+"""
+Near-Duplicate Index
+MinHash signatures over clause shingles with locality-sensitive hashing, so
+templated contracts are matched at ingestion and their prior clause
+classifications can be reused
+"""
+import json
+import os
+import re
+import threading
+import zlib
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from pipeline.revision_differ import clause_hash
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def shingles(clauses: List[str], size: int = 3) -> set:
+    """Word n-gram shingles over the normalized clause text"""
+    words = re.findall(r'[a-z0-9]+', " ".join(clauses).lower())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class NearDuplicateIndex:
+
+    def __init__(self, root: str = os.path.join(ROOT_DIR, "index", "minhash"),
+                 num_perm: int = 128, bands: int = 16, threshold: float = 0.8, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.root = root
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, (1 << 32) - 1, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, (1 << 32) - 1, size=num_perm, dtype=np.uint64)
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def signature(self, clauses: List[str]) -> np.ndarray:
+        """MinHash signature (num_perm uint32 values), vectorized over all shingles"""
+        items = shingles(clauses)
+        if not items:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in items), dtype=np.uint64, count=len(items))
+        permuted = (hashes[:, None] * self._a + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+    def _band_keys(self, signature: np.ndarray) -> List[str]:
+        return [
+            f"{band}:{zlib.crc32(signature[band * self.rows:(band + 1) * self.rows].tobytes()):08x}"
+            for band in range(self.bands)
+        ]
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._buckets: Dict[str, List[str]] = defaultdict(list)
+        path = os.path.join(self.root, "signatures.jsonl")
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    self._insert(record["doc_id"], np.asarray(record["signature"], dtype=np.uint64))
+        self._loaded = True
+
+    def _insert(self, doc_id: str, signature: np.ndarray) -> None:
+        self._signatures[doc_id] = signature
+        for key in self._band_keys(signature):
+            self._buckets[key].append(doc_id)
+
+    def add(self, doc_id: str, clauses: List[str], signature: Optional[np.ndarray] = None) -> None:
+        signature = self.signature(clauses) if signature is None else signature
+        with self._lock:
+            self._load()
+            if doc_id in self._signatures:
+                return
+            os.makedirs(self.root, exist_ok=True)
+            with open(os.path.join(self.root, "signatures.jsonl"), "a", encoding="utf-8") as f:
+                f.write(json.dumps({"doc_id": doc_id, "signature": signature.tolist()}) + "\n")
+            self._insert(doc_id, signature)
+
+    def query(self, clauses: List[str], exclude: Optional[str] = None,
+              signature: Optional[np.ndarray] = None) -> List[Tuple[str, float]]:
+        """Indexed documents whose estimated Jaccard similarity is >= threshold, best first"""
+        signature = self.signature(clauses) if signature is None else signature
+        with self._lock:
+            self._load()
+            candidates = set()
+            for key in self._band_keys(signature):
+                candidates.update(self._buckets.get(key, ()))
+            candidates.discard(exclude)
+            matches = []
+            for doc_id in candidates:
+                similarity = float(np.mean(self._signatures[doc_id] == signature))
+                if similarity >= self.threshold:
+                    matches.append((doc_id, round(similarity, 4)))
+        return sorted(matches, key=lambda match: match[1], reverse=True)
+
+
+def reuse_matching_clauses(
+    template_clauses: List[str],
+    template_classifications: List[Dict],
+    clauses: List[str],
+    classify: Callable[[List[int]], List[Dict]]
+) -> Tuple[List[Dict], int]:
+    """
+    Copy classifications for clauses whose normalized text appears in the
+    template (order-independent); classify the rest in one call, passing their
+    indices into `clauses`. Returns (classifications, reused_count).
+    """
+    known = {clause_hash(c): r for c, r in zip(template_clauses, template_classifications)}
+    results: List[Any] = [None] * len(clauses)
+    missing = []
+    for i, clause in enumerate(clauses):
+        match = known.get(clause_hash(clause))
+        if match is not None:
+            results[i] = dict(match, clause=clause)
+        else:
+            missing.append(i)
+    if missing:
+        for i, result in zip(missing, classify(missing)):
+            results[i] = result
+    return results, len(clauses) - len(missing)
+
+
+# Singleton instance
+near_duplicate_index = NearDuplicateIndex()
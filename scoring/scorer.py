@@ -1,9 +1,86 @@
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class FlatPolicy:
+    """
+    Original scoring behaviour: a fixed penalty per category for every risk
+    at or above the confidence threshold.
+    """
+    name = "flat"
+
+    def __init__(self, threshold: float = 0.5):
+        self.threshold = threshold
+
+    def penalty_for(self, base_penalty: float, category: str, confidence: float) -> Optional[float]:
+        if confidence < self.threshold:
+            return None
+        return base_penalty
+
+
+class ConfidenceWeightedPolicy:
+    """
+    Scales each penalty by the classifier confidence instead of applying a
+    hard cutoff. Risks below `floor` are still ignored.
+    """
+    name = "confidence_weighted"
+
+    def __init__(self, floor: float = 0.0):
+        self.floor = floor
+
+    def penalty_for(self, base_penalty: float, category: str, confidence: float) -> Optional[float]:
+        if confidence < self.floor:
+            return None
+        return base_penalty * confidence
+
+
+class CalibratedProbabilityPolicy:
+    """
+    Maps raw zero-shot scores to calibrated probabilities and applies the
+    expected penalty (probability * penalty).
+
+    `calibration` is a sorted list of (raw_score, probability) points, either
+    global or per category; values in between are linearly interpolated.
+    """
+    name = "calibrated"
+
+    def __init__(
+        self,
+        calibration: List[Tuple[float, float]],
+        category_calibration: Optional[Dict[str, List[Tuple[float, float]]]] = None,
+        min_probability: float = 0.0
+    ):
+        self.calibration = sorted(calibration)
+        self.category_calibration = {
+            category: sorted(points) for category, points in (category_calibration or {}).items()
+        }
+        self.min_probability = min_probability
+
+    def probability(self, category: str, confidence: float) -> float:
+        points = self.category_calibration.get(category, self.calibration)
+        if not points:
+            return confidence
+        if confidence <= points[0][0]:
+            return points[0][1]
+        for (x0, y0), (x1, y1) in zip(points, points[1:]):
+            if confidence <= x1:
+                if x1 == x0:
+                    return y1
+                return y0 + (y1 - y0) * (confidence - x0) / (x1 - x0)
+        return points[-1][1]
+
+    def penalty_for(self, base_penalty: float, category: str, confidence: float) -> Optional[float]:
+        probability = self.probability(category, confidence)
+        if probability < self.min_probability:
+            return None
+        return base_penalty * probability
+
 
 class RiskScorer:
-    def __init__(self):
+    def __init__(self, policy=None, penalties: Optional[Dict[str, float]] = None):
         self.base_score = 100
         # Define penalties for each risk category
-        self.penalties = {
+        self.penalties = penalties or {
             "Financial Liability": 15,
             "Termination and Cancellation": 20, # High risk
             "Intellectual Property Ownership": 15,
@@ -11,27 +88,39 @@ class RiskScorer:
             "Confidentiality": 5,
             "Payment Terms": 5
         }
+        self.default_penalty = 5
+        self.policy = policy or FlatPolicy()
 
-    def calculate_score(self, risks: list) -> dict:
+    def calculate_score(self, risks: list, policy=None, penalties: Optional[Dict[str, float]] = None) -> dict:
         """
         Calculates the final score based on a list of identified risks.
         Returns the score and a breakdown of deductions.
+
+        `policy` and `penalties` override the scorer defaults for this call
+        only, which is what what-if sweeps over cached classifications use.
         """
+        policy = policy or self.policy
+        penalties = penalties if penalties is not None else self.penalties
         current_score = self.base_score
         breakdown = []
 
         for risk in risks:
+            # Fragments scored together with a neighbouring clause repeat that clause's label
+            if risk.get("merged_fragment"):
+                continue
             category = risk.get("category")
             confidence = risk.get("confidence", 0.0)
-            
-            # Skip low confidence risks (threshold customizable)
-            if confidence < 0.5:
+
+            base_penalty = penalties.get(category, self.default_penalty) # Default 5 if unknown
+            penalty = policy.penalty_for(base_penalty, category, confidence)
+
+            # Policy decided this risk does not count (e.g. low confidence)
+            if penalty is None:
                 continue
 
-            penalty = self.penalties.get(category, 5) # Default 5 if unknown
-            
-            # Adjust penalty by confidence? Optional. For now, flat penalty.
-            
+            if isinstance(penalty, float):
+                penalty = round(penalty, 2)
+
             current_score -= penalty
             breakdown.append({
                 "category": category,
@@ -42,10 +131,48 @@ class RiskScorer:
 
         # Cap score between 0 and 100
         final_score = max(0, min(current_score, 100))
+        if isinstance(final_score, float):
+            final_score = round(final_score, 2)
 
         return {
             "total_score": final_score,
             "breakdown": breakdown
         }
 
+    def rescore_corpus(self, documents: Iterable[dict], policy=None, penalties: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+        """
+        Rescores stored classification outputs without re-running OCR or the
+        classifier. Each document is a dict with `doc_id` and `risks` (the
+        `classify_clause` outputs). Returns {doc_id: total_score}.
+        """
+        scores = {}
+        for document in documents:
+            result = self.calculate_score(document.get("risks", []), policy=policy, penalties=penalties)
+            scores[document.get("doc_id")] = result["total_score"]
+        return scores
+
+    def sweep(self, documents: Iterable[dict], scenarios: Dict[str, dict]) -> Dict[str, Dict[str, float]]:
+        """
+        Runs several what-if scenarios over the same cached corpus.
+        `scenarios` maps a name to {"policy": ..., "penalties": ...}
+        (both optional). Returns {scenario_name: {doc_id: total_score}}.
+        """
+        documents = list(documents)
+        return {
+            name: self.rescore_corpus(documents, policy=scenario.get("policy"), penalties=scenario.get("penalties"))
+            for name, scenario in scenarios.items()
+        }
+
+
+def load_cached_classifications(path: str) -> List[dict]:
+    """Loads a JSONL corpus of {"doc_id": ..., "risks": [...]} records."""
+    documents = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                documents.append(json.loads(line))
+    return documents
+
+
 risk_scorer = RiskScorer()
@@ -0,0 +1,28 @@
+"""
+Headings
+Recognises section heading lines ("4. Payment", "ARTICLE IV", "Confidential
+Information"), used by OCR cleanup to keep headings on their own line and by
+section context to find the section a clause sits under
+"""
+import re
+
+_NUMBERED = re.compile(r"^(?:(?:section|article|clause|schedule)\s+)?[\dIVXivx]+(?:\.\d+)*[.):]?\s+\S", re.IGNORECASE)
+_KEYWORD = re.compile(r"^(?:section|article|clause|schedule)\s+\S+", re.IGNORECASE)
+
+
+def is_heading(line: str, max_words: int = 8) -> bool:
+    """
+    Short line that reads as a heading: numbered ("4. Payment", "Article IV"),
+    ALL CAPS or Title Case, without sentence-ending punctuation
+    """
+    line = line.strip()
+    words = line.split()
+    if not words or len(words) > max_words or len(line) > 80 or line[-1] in ".;,":
+        return False
+    if _NUMBERED.match(line) or _KEYWORD.match(line):
+        return True
+    letters = [c for c in line if c.isalpha()]
+    if letters and all(c.isupper() for c in letters):
+        return True
+    significant = [w for w in words if len(w) > 3]
+    return bool(significant) and all(w[0].isupper() for w in significant)
@@ -0,0 +1,126 @@
+"""
+Language Detector
+Fast per-clause language identification from Unicode script and function-word
+profiles, plus per-language throughput stats for the routes clauses take
+(English model, multilingual model, skipped)
+"""
+import bisect
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Sequence, Tuple
+
+# (first code point, last code point, language) for scripts of Indian contracts; sorted by start
+SCRIPT_RANGES = [
+    (0x0600, 0x06FF, "ur"),   # Arabic script
+    (0x0900, 0x097F, "hi"),   # Devanagari (Hindi, Marathi)
+    (0x0980, 0x09FF, "bn"),
+    (0x0A00, 0x0A7F, "pa"),   # Gurmukhi
+    (0x0A80, 0x0AFF, "gu"),
+    (0x0B00, 0x0B7F, "or"),
+    (0x0B80, 0x0BFF, "ta"),
+    (0x0C00, 0x0C7F, "te"),
+    (0x0C80, 0x0CFF, "kn"),
+    (0x0D00, 0x0D7F, "ml"),
+]
+_STARTS = [start for start, _, _ in SCRIPT_RANGES]
+
+# Frequent function words; legal English is dense with them, OCR garbage has almost none
+FUNCTION_WORDS = {
+    "en": {
+        "the", "of", "and", "to", "a", "an", "in", "on", "by", "or", "for", "with", "is", "are", "be",
+        "this", "that", "as", "at", "any", "all", "such", "shall", "will", "may", "not", "from", "its",
+        "which", "party", "parties", "agreement", "under", "per", "date", "within", "no", "if", "has", "have",
+    },
+    # Romanized Hindi (Hinglish) as typed in offer letters and messages
+    "hi-Latn": {"ke", "ka", "ki", "hai", "hain", "aur", "mein", "se", "ko", "par", "yah", "ye", "jo", "kiya", "tha"},
+}
+_WORD = re.compile(r"[A-Za-z]+")
+
+
+class LanguageDetector:
+
+    def __init__(self, min_script_share: float = 0.5, min_function_share: float = 0.08, min_words: int = 5):
+        # Share of letters a non-Latin script needs for the clause to count as that language
+        self.min_script_share = min_script_share
+        # Share of Latin words that must be function words of a language to call it
+        self.min_function_share = min_function_share
+        # Shorter Latin clauses (headings, amounts) carry too little signal: "und"
+        self.min_words = min_words
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], Dict[str, float]] = defaultdict(
+            lambda: {"clauses": 0, "chars": 0, "seconds": 0.0}
+        )
+
+    def _script_counts(self, text: str) -> Tuple[int, Counter]:
+        letters, scripts = 0, Counter()
+        for ch in text:
+            if not ch.isalpha():
+                continue
+            letters += 1
+            code = ord(ch)
+            if code < 0x0250:
+                scripts["latin"] += 1
+                continue
+            i = bisect.bisect_right(_STARTS, code) - 1
+            if i >= 0 and code <= SCRIPT_RANGES[i][1]:
+                scripts[SCRIPT_RANGES[i][2]] += 1
+            else:
+                scripts["other"] += 1
+        return letters, scripts
+
+    def detect(self, text: str) -> str:
+        """
+        ISO-style code: "en", "hi", "hi-Latn", other Indian scripts, "und"
+        (too short to tell), "unknown" (Latin text matching no profile: terse
+        English, or OCR noise) or "other" (a script with no profile)
+        """
+        letters, scripts = self._script_counts(text)
+        if not letters:
+            return "und"
+        script, count = max(((s, n) for s, n in scripts.items() if s != "latin"), key=lambda x: x[1],
+                            default=(None, 0))
+        if script is not None and script != "other" and count / letters >= self.min_script_share:
+            return script
+        if scripts["latin"] / letters < self.min_script_share:
+            return "other"
+
+        words = [w.lower() for w in _WORD.findall(text)]
+        if len(words) < self.min_words:
+            return "und"
+        shares = {lang: sum(w in vocab for w in words) / len(words) for lang, vocab in FUNCTION_WORDS.items()}
+        lang = max(shares, key=shares.get)
+        return lang if shares[lang] >= self.min_function_share else "unknown"
+
+    def detect_clauses(self, clauses: Sequence[str]) -> List[str]:
+        return [self.detect(clause) for clause in clauses]
+
+    def profile(self, languages: Sequence[str]) -> Dict[str, int]:
+        """Clause count per language, most frequent first"""
+        return dict(Counter(languages).most_common())
+
+    def record(self, language: str, route: str, clauses: Sequence[str], seconds: float) -> None:
+        """Account classification work (or a skip) for per-language throughput"""
+        with self._lock:
+            stats = self._stats[(language, route)]
+            stats["clauses"] += len(clauses)
+            stats["chars"] += sum(len(c) for c in clauses)
+            stats["seconds"] += seconds
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = {key: dict(stats) for key, stats in self._stats.items()}
+        languages: Dict[str, Dict[str, Any]] = {}
+        for (language, route), stats in sorted(rows.items()):
+            seconds = stats["seconds"]
+            languages.setdefault(language, {})[route] = {
+                "clauses": stats["clauses"],
+                "chars": stats["chars"],
+                "seconds": round(seconds, 3),
+                "clauses_per_second": round(stats["clauses"] / seconds, 2) if seconds > 0 else None
+            }
+        return {"languages": languages}
+
+
+# Singleton instance
+language_detector = LanguageDetector()
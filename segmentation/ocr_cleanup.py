@@ -0,0 +1,180 @@
+"""
+OCR Cleanup
+Turns per-page OCR lines (text plus box geometry) into clean running text:
+strips headers/footers repeated across pages and page numbers, joins words
+hyphenated across line breaks and merges wrapped lines into paragraphs, so
+layout debris never reaches segmentation or the classifier
+"""
+import bisect
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from segmentation.headings import is_heading
+
+# On normalized text ("Page 3 of 12" -> "page # of #"); roman numerals only after "page"
+_PAGE_NUMBER = re.compile(r"^[\s\-–—]*(?:(?:page|pg\.?|p\.)\s*(?:#|[ivxlc]+)|#)(?:\s*(?:of|/)\s*#)?[\s\-–—]*$")
+_LIST_MARKER = re.compile(r"^(?:\(?[a-zA-Z0-9]{1,3}[.)]|[•▪◦\-–*])\s")
+_SENTENCE_END = (".", ":", ";", "!", "?", "।")
+# Prefixes whose hyphen is part of the word ("third-party"), kept when rejoining a broken line
+_COMPOUND_PREFIXES = {
+    "non", "self", "third", "co", "cross", "well", "long", "short", "sub", "ex", "pre", "post",
+    "multi", "anti", "semi", "quasi", "inter", "intra", "over", "under", "year", "month", "day"
+}
+
+
+def _normalize(text: str) -> str:
+    """Header/footer identity: case, spacing and digits (page numbers, dates) ignored"""
+    return re.sub(r"\d+", "#", " ".join(text.lower().split()))
+
+
+# Line geometry is ((x_min, y_min), (x_max, y_max)) in page fractions, as doctr reports it
+def _top(line: Dict[str, Any]) -> Optional[float]:
+    return line["geometry"][0][1] if line.get("geometry") else None
+
+
+def _bottom(line: Dict[str, Any]) -> Optional[float]:
+    return line["geometry"][1][1] if line.get("geometry") else None
+
+
+class OCRCleanup:
+
+    def __init__(self, margin_band: float = 0.1, edge_lines: int = 2, repeat_share: float = 0.5,
+                 gap_factor: float = 0.8, short_line: float = 0.12):
+        # Top/bottom fraction of the page where running headers and footers live
+        self.margin_band = margin_band
+        # Without geometry, the first/last lines of each page are the header/footer candidates
+        self.edge_lines = edge_lines
+        # Share of pages a margin line must repeat on to count as a header/footer
+        self.repeat_share = repeat_share
+        # Vertical gap (in line heights) that starts a new paragraph
+        self.gap_factor = gap_factor
+        # A line ending this far (page width fraction) before the right edge ends its paragraph
+        self.short_line = short_line
+
+    def _margin_lines(self, page: List[Dict[str, Any]]) -> List[int]:
+        """Indexes of a page's lines that may be header/footer"""
+        if page and all(line.get("geometry") for line in page):
+            return [i for i, line in enumerate(page)
+                    if _bottom(line) <= self.margin_band or _top(line) >= 1 - self.margin_band]
+        edge = min(self.edge_lines, len(page))
+        return sorted(set(range(edge)) | set(range(len(page) - edge, len(page))))
+
+    def strip_margins(self, pages: List[List[Dict[str, Any]]]) -> Tuple[List[List[Dict[str, Any]]], Dict[str, int]]:
+        """Drop page numbers and margin lines repeated across pages"""
+        candidates = [self._margin_lines(page) for page in pages]
+        seen = Counter()
+        for page, indexes in zip(pages, candidates):
+            seen.update({_normalize(page[i]["text"]) for i in indexes})
+        min_pages = max(2, int(self.repeat_share * len(pages) + 0.5))
+        repeated = {text for text, count in seen.items() if count >= min_pages}
+
+        stats = {"headers_footers": 0, "page_numbers": 0}
+        cleaned = []
+        for page, indexes in zip(pages, candidates):
+            drop = set()
+            for i in indexes:
+                normalized = _normalize(page[i]["text"])
+                if _PAGE_NUMBER.match(normalized):
+                    drop.add(i)
+                    stats["page_numbers"] += 1
+                elif len(pages) > 1 and normalized in repeated:
+                    drop.add(i)
+                    stats["headers_footers"] += 1
+            cleaned.append([line for i, line in enumerate(page) if i not in drop])
+        return cleaned, stats
+
+    def _continues(self, paragraph: List[Dict[str, Any]], line: Dict[str, Any], right_edge: Optional[float]) -> bool:
+        """Whether `line` wraps on from the paragraph's last line"""
+        previous = paragraph[-1]
+        text, prev_text = line["text"].strip(), previous["text"].strip()
+        if not text or not prev_text or _LIST_MARKER.match(text):
+            return False
+        # Headings stay on their own line (section context reads them from there)
+        if len(paragraph) == 1 and is_heading(prev_text) and not prev_text.endswith("-"):
+            return False
+        if previous.get("geometry") and line.get("geometry"):
+            height = _bottom(previous) - _top(previous)
+            if _top(line) - _bottom(previous) > self.gap_factor * max(height, 1e-3):
+                return False
+            ends_short = right_edge is not None and previous["geometry"][1][0] < right_edge - self.short_line
+            if ends_short and prev_text.endswith(_SENTENCE_END):
+                return False
+            return True
+        # No geometry: a sentence end closes the paragraph
+        return not prev_text.endswith(_SENTENCE_END)
+
+    def _join(self, text: str, continuation: str, stats: Dict[str, int]) -> str:
+        match = re.search(r"(\w+)-$", text)
+        if match and continuation[:1].islower():
+            stats["dehyphenated"] += 1
+            if match.group(1).lower() in _COMPOUND_PREFIXES:
+                return text + continuation
+            return text[:-1] + continuation
+        return text + " " + continuation
+
+    def merge_lines(self, page: List[Dict[str, Any]], stats: Dict[str, int]) -> List[str]:
+        """A page's lines as paragraphs"""
+        right_edges = sorted(line["geometry"][1][0] for line in page if line.get("geometry"))
+        right_edge = right_edges[int(0.9 * (len(right_edges) - 1))] if right_edges else None
+        paragraphs: List[List[Dict[str, Any]]] = []
+        for line in page:
+            if not line["text"].strip():
+                continue
+            if paragraphs and self._continues(paragraphs[-1], line, right_edge):
+                paragraphs[-1].append(line)
+            else:
+                paragraphs.append([line])
+
+        texts = []
+        for paragraph in paragraphs:
+            text = paragraph[0]["text"].strip()
+            for line in paragraph[1:]:
+                text = self._join(text, line["text"].strip(), stats)
+                stats["merged_lines"] += 1
+            texts.append(text)
+        return texts
+
+    def clean(self, pages: List[List[Dict[str, Any]]]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Pages of {"text", "geometry"} lines in reading order -> (text, stats).
+        Paragraphs are separated by newlines; a paragraph cut by a page break
+        is rejoined with the next page's first line. stats["page_offsets"]
+        holds where each page's own text starts in the result.
+        """
+        pages, stats = self.strip_margins(pages)
+        stats.update({"dehyphenated": 0, "merged_lines": 0, "lines": sum(len(p) for p in pages)})
+        paragraphs: List[str] = []
+        offsets: List[int] = []
+        length = 0
+        for page in pages:
+            page_paragraphs = self.merge_lines(page, stats)
+            if paragraphs and page_paragraphs and not paragraphs[-1].endswith(_SENTENCE_END) \
+                    and page_paragraphs[0][:1].islower():
+                merged = self._join(paragraphs[-1], page_paragraphs.pop(0), stats)
+                length += len(merged) - len(paragraphs[-1])
+                paragraphs[-1] = merged
+                stats["merged_lines"] += 1
+            offsets.append(length + (1 if paragraphs and page_paragraphs else 0))
+            for paragraph in page_paragraphs:
+                length += len(paragraph) + (1 if paragraphs else 0)
+                paragraphs.append(paragraph)
+        stats["page_offsets"] = offsets
+        return "\n".join(paragraphs), stats
+
+
+def clause_pages(text: str, clauses: List[str], page_offsets: List[int]) -> List[int]:
+    """Index of the page each clause starts on, from the cleaned text's page offsets"""
+    pages, cursor = [], 0
+    for clause in clauses:
+        position = text.find(clause, cursor)
+        if position < 0:
+            position = cursor
+        else:
+            cursor = position + len(clause)
+        pages.append(max(0, bisect.bisect_right(page_offsets, position) - 1))
+    return pages
+
+
+# Singleton instance
+ocr_cleanup = OCRCleanup()
@@ -71,7 +71,8 @@ def segment_text(text: str) -> list[str]:
     # Note: We want to keep the delimiter? usually not strictly necessary for analysis, 
     # but nice to have. split removes it.
     
-    sentences = re.split(r'(?<=[.!?])\s+', protected_text)
+    # '।' (danda) ends sentences in Hindi and other Devanagari text
+    sentences = re.split(r'(?<=[.!?।])\s+', protected_text)
     
     final_clauses = []
     for s in sentences:
@@ -81,3 +82,18 @@ def segment_text(text: str) -> list[str]:
             final_clauses.append(cleaned)
             
     return final_clauses
+
+
+def clause_offsets(text: str, clauses: list[str]) -> list[int]:
+    """
+    Character offset of each clause in `text`, searching forward from the
+    previous clause so repeated clauses map to successive occurrences;
+    -1 where a clause is not found verbatim.
+    """
+    offsets, cursor = [], 0
+    for clause in clauses:
+        offset = text.find(clause, cursor)
+        if offset >= 0:
+            cursor = offset + len(clause)
+        offsets.append(offset)
+    return offsets
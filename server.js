@@ -1,6 +1,8 @@
 const app=require("./app");
+const { startUploadCleanup } = require("./services/uploadCleanup");
 const PORT=process.env.PORT || 5000;
 
 app.listen(PORT,() => {
     console.log(`Server Started on Port ${PORT}`);
-})
\ No newline at end of file
+    startUploadCleanup();
+})
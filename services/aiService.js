@@ -1,17 +1,30 @@
 const axios = require("axios");
-const FormData = require("form-data");
 const fs = require("fs");
+const path = require("path");
+
+const AI_SERVICE_URL = process.env.AI_SERVICE_URL || "http://127.0.0.1:8000";
+// The Python service reads uploads/ in place when it shares this disk (same host or mounted volume);
+// set AI_SHARED_UPLOADS=false when it runs elsewhere and the file has to be streamed
+const SHARED_UPLOADS = process.env.AI_SHARED_UPLOADS !== "false";
 
 async function analyzeContractWithAI(filePath){
-    const formData = new FormData();
-  formData.append("file", fs.createReadStream(filePath));
+  if (SHARED_UPLOADS) {
+    const response = await axios.post(
+      `${AI_SERVICE_URL}/analyze/path`,
+      { path: path.resolve(filePath) },
+      { timeout: 30000 }
+    );
+    return response.data;
+  }
 
+  // Raw body instead of multipart: streamed from disk, spooled once on the Python side
+  const { size } = await fs.promises.stat(filePath);
   const response = await axios.post(
-    
-    "http://127.0.0.1:8000/analyze",
-    formData,
+    `${AI_SERVICE_URL}/analyze/stream`,
+    fs.createReadStream(filePath),
     {
-      headers: formData.getHeaders(),
+      headers: { "Content-Type": "application/pdf", "Content-Length": size },
+      maxBodyLength: Infinity,
       timeout: 30000
     }
   );
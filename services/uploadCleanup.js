@@ -0,0 +1,47 @@
+const fs = require("fs");
+const path = require("path");
+
+const UPLOAD_DIR = path.resolve(process.env.UPLOAD_DIR || "uploads");
+// multer names uploads with 32 hex characters and no extension; anything else in uploads/ is left alone
+const MULTER_NAME = /^[0-9a-f]{32}$/;
+
+async function sweepUploads(maxAgeMs) {
+  let removed = 0;
+  let entries;
+  try {
+    entries = await fs.promises.readdir(UPLOAD_DIR, { withFileTypes: true });
+  } catch (err) {
+    if (err.code === "ENOENT") return removed;
+    throw err;
+  }
+
+  const cutoff = Date.now() - maxAgeMs;
+  for (const entry of entries) {
+    if (!entry.isFile() || !MULTER_NAME.test(entry.name)) continue;
+    const filePath = path.join(UPLOAD_DIR, entry.name);
+    try {
+      const { mtimeMs } = await fs.promises.stat(filePath);
+      if (mtimeMs < cutoff) {
+        await fs.promises.unlink(filePath);
+        removed += 1;
+      }
+    } catch (err) {
+      if (err.code !== "ENOENT") console.error("Upload cleanup failed:", filePath, err);
+    }
+  }
+  return removed;
+}
+
+// Removes uploads orphaned by crashed or timed-out requests
+function startUploadCleanup({
+  intervalMs = Number(process.env.UPLOAD_SWEEP_INTERVAL_MS) || 10 * 60 * 1000,
+  maxAgeMs = Number(process.env.UPLOAD_MAX_AGE_MS) || 60 * 60 * 1000
+} = {}) {
+  const sweep = () => sweepUploads(maxAgeMs)
+    .then((removed) => { if (removed) console.log(`Removed ${removed} orphaned upload(s)`); })
+    .catch((err) => console.error("Upload sweep failed:", err));
+  sweep();
+  return setInterval(sweep, intervalMs).unref();
+}
+
+module.exports = { sweepUploads, startUploadCleanup };
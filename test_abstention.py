@@ -0,0 +1,106 @@
+"""
+Test calibrated abstention: isotonic calibration fit, second-pass routing of
+uncertain clauses and the human-review queue (no models needed)
+"""
+import os
+import random
+import sys
+import tempfile
+sys.path.insert(0, '.')
+
+from classification.abstention import Abstention, fit_calibration, fit_isotonic, save_calibration, with_context
+from pipeline.review_queue import ReviewQueue
+
+
+def result(clause, category, confidence, margin):
+    return {"clause": clause, "category": category, "confidence": confidence, "margin": margin, "risk_level": "Low"}
+
+
+def test_abstention():
+    # Overconfident model: the raw confidence overstates accuracy
+    rng = random.Random(3)
+    confidences = [rng.uniform(0.3, 1.0) for _ in range(500)]
+    correct = [rng.random() < (c - 0.3) for c in confidences]
+    points = fit_isotonic(confidences, correct)
+    probabilities = [p for _, p in points]
+    print(f"Isotonic points: {len(points)}, range {probabilities[0]} -> {probabilities[-1]}")
+    assert probabilities == sorted(probabilities), "calibration map must be monotonic"
+    assert probabilities[0] < 0.2 and probabilities[-1] > 0.6
+
+    results = [result(f"c{i}", "Payment Terms", c, 0.5) for i, c in enumerate(confidences)]
+    truth = ["Payment Terms" if ok else "Safe Clause" for ok in correct]
+    calibration = fit_calibration(results, truth, min_category_examples=100)
+    assert "Payment Terms" in calibration["category_calibration"]
+
+    abstention = Abstention(calibration, accept_probability=0.5, min_margin=0.1)
+    print(f"P(correct | confidence 0.9) = {abstention.probability(result('x', 'Payment Terms', 0.9, 0.5))}")
+    assert abstention.probability(result("x", "Payment Terms", 0.9, 0.5)) < 0.9
+
+    # Routing: confident clauses pass, uncertain ones get one contextual second pass
+    clauses = ["The fee is due monthly.", "Either party may end this.", "Payment within 30 days.", "Notices by email."]
+    first = [
+        result(clauses[0], "Payment Terms", 0.99, 0.9),
+        result(clauses[1], "Payment Terms", 0.45, 0.05),
+        result(clauses[2], "Payment Terms", 0.97, 0.02),
+        result(clauses[3], "Safe Clause", 0.40, 0.2),
+    ]
+    seen = []
+
+    def second_pass(texts):
+        seen.extend(texts)
+        return [result(t, "Termination and Cancellation", 0.99, 0.8) if "end this" in t
+                else result(t, "Safe Clause", 0.41, 0.05) for t in texts]
+
+    counts = abstention.route(clauses, first, second_pass)
+    print(f"Routing: {counts}")
+    assert counts == {"uncertain": 3, "second_pass": 3, "needs_review": 2}
+    assert seen[0] == with_context(clauses, 1) == " ".join(clauses[0:3])
+    assert first[1]["category"] == "Termination and Cancellation" and first[1]["second_pass"]
+    assert first[1]["clause"] == clauses[1] and "needs_review" not in first[1]
+    assert first[2]["needs_review"] and first[3]["needs_review"]
+    assert "needs_review" not in first[0] and "calibrated_probability" in first[0]
+
+    # Already-routed (reused) results are left alone
+    assert abstention.route(clauses, first, second_pass)["uncertain"] == 0
+
+    # Without a fitted calibration nothing is routed or flagged
+    raw = [result(clauses[1], "Payment Terms", 0.45, 0.05)]
+    assert not Abstention(None).calibrated
+    assert Abstention(None).route(clauses[1:2], raw, second_pass) == {"uncertain": 0, "second_pass": 0, "needs_review": 0}
+    assert "needs_review" not in raw[0] and "calibrated_probability" not in raw[0]
+
+    # A calibration file fitted (or removed) while the server runs is picked up on refresh
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "calibration.json")
+        watched = Abstention.from_file(path)
+        assert not watched.calibrated and watched.refresh() is None
+        save_calibration(calibration, path)
+        assert watched.refresh()["examples"] == calibration["examples"] and watched.calibrated
+        assert watched.probability(result("x", "Payment Terms", 0.9, 0.5)) == abstention.probability(
+            result("x", "Payment Terms", 0.9, 0.5))
+        os.remove(path)
+        assert watched.refresh() is None and not watched.calibrated
+
+    # Review queue: idempotent per document, resolutions feed recalibration
+    with tempfile.TemporaryDirectory() as root:
+        queue = ReviewQueue(root)
+        assert queue.add("doc1", first) == 2
+        assert queue.add("doc1", first) == 0
+        # A fresh queue over the same files still knows what is queued
+        assert ReviewQueue(root).add("doc1", first) == 0
+        pending = queue.pending()
+        print(f"Pending: {[(p['clause_index'], p['calibrated_probability']) for p in pending]}")
+        assert sorted(p["clause_index"] for p in pending) == [2, 3]
+        assert pending[0]["calibrated_probability"] <= pending[1]["calibrated_probability"]
+
+        assert queue.resolve("doc1", 9, "Safe Clause") is None
+        queue.resolve("doc1", 3, "Safe Clause", reviewer="ops")
+        assert [p["clause_index"] for p in queue.pending()] == [2]
+        assert queue.labeled_examples() == [{"clause": clauses[3], "label": "Safe Clause"}]
+        assert queue.stats() == {"queued": 2, "resolved": 1, "pending": 1}
+
+    print("Status: OK")
+
+
+if __name__ == "__main__":
+    test_abstention()
@@ -0,0 +1,42 @@
+"""
+Test batch report rendering into a directory and a zip, fed to the process
+pool in bounded chunks (requires reportlab)
+"""
+import io
+import os
+import sys
+import tempfile
+import zipfile
+sys.path.insert(0, '.')
+
+from reporting.batch_report_renderer import render_reports, synthetic_analysis
+
+
+def test_batch_report_renderer():
+    with tempfile.TemporaryDirectory() as output_dir:
+        # Files already rendered each time the next analysis is pulled from the input
+        rendered_before = []
+
+        def analyses():
+            for i, risk_count in enumerate((3, 40)):
+                rendered_before.append(len(os.listdir(output_dir)))
+                yield f"contract {i}", synthetic_analysis(risk_count, seed=i)
+
+        zip_stream = io.BytesIO()
+        stats = render_reports(analyses(), output_dir=output_dir, zip_stream=zip_stream,
+                               workers=2, max_pending=1)
+        print(f"Rendered: {stats}")
+        assert stats["reports"] == 2 and stats["failed"] == 0 and stats["pages"] >= 2
+        # With one analysis in flight the second is read only after the first is written
+        assert rendered_before == [0, 1]
+
+        assert sorted(os.listdir(output_dir)) == ["contract_0.pdf", "contract_1.pdf"]
+        with zipfile.ZipFile(io.BytesIO(zip_stream.getvalue())) as archive:
+            assert sorted(archive.namelist()) == ["contract_0.pdf", "contract_1.pdf"]
+            assert all(archive.read(name).startswith(b"%PDF") for name in archive.namelist())
+
+    print("Status: OK")
+
+
+if __name__ == "__main__":
+    test_batch_report_renderer()
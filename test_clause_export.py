@@ -0,0 +1,97 @@
+"""
+Test clause-level Parquet export and portfolio queries (requires pyarrow)
+"""
+import sys
+import tempfile
+sys.path.insert(0, '.')
+
+from analytics.clause_export import ClauseExporter, ClauseQuery
+
+
+def make_result(doc_id, contract_type, risks):
+    return {
+        "documentId": doc_id,
+        "legalStructure": {"contractType": contract_type, "parties": {"contractor": "Acme"}},
+        "risks": risks
+    }
+
+
+records = [
+    {
+        "source": "uploads/vendor_2025.pdf",
+        "metadata": {"year": 2025, "portfolio": "vendor", "counterparty": "Acme Supplies"},
+        "result": make_result("doc-1", "Service Agreement", [
+            {"clause": "Vendor accepts unlimited liability for any and all damages.", "category": "Financial Liability",
+             "confidence": 0.91, "risk_level": "High", "clause_index": 3, "clause_offset": 120},
+            {"clause": "Either party may terminate at any time.", "category": "Termination and Cancellation",
+             "confidence": 0.8, "risk_level": "High", "clause_index": 7},
+        ])
+    },
+    {
+        "source": "uploads/vendor_2024.pdf",
+        "metadata": {"year": 2024, "portfolio": "vendor", "counterparty": "Globex"},
+        "result": make_result("doc-2", "Service Agreement", [
+            {"clause": "Supplier has unlimited liability for breaches.", "category": "Financial Liability",
+             "confidence": 0.7, "risk_level": "High", "clause_index": 1},
+        ])
+    },
+    {
+        "source": "uploads/employment_2025.pdf",
+        "metadata": {"portfolio": "employment"},
+        "result": dict(make_result("doc-3", "Employment Agreement", [
+            {"clause": "All payments are subject to approval by the Company.", "category": "Payment Terms",
+             "confidence": 0.66, "risk_level": "Low", "clause_index": 2},
+        ]), legalStructure={"contractType": "Employment Agreement",
+                            "parties": {"employer": "Initech", "employee": "Peter Gibbons"}})
+    },
+    {
+        "source": "uploads/unnamed.pdf",
+        "metadata": {"portfolio": "vendor"},
+        "result": dict(make_result("doc-4", "General Agreement", [
+            {"clause": "Fees are payable quarterly.", "category": "Payment Terms",
+             "confidence": 0.6, "risk_level": "Low", "clause_index": 0},
+        ]), legalStructure={"contractType": "General Agreement",
+                            "parties": {"party_1": "First Party", "party_2": "Second Party"}})
+    },
+]
+
+
+def test_clause_export():
+    with tempfile.TemporaryDirectory() as tmp:
+        written = ClauseExporter(tmp).export_results(records)
+        print(f"Wrote {len(written)} part file(s)")
+
+        query = ClauseQuery(tmp)
+        hits = query.find(financial_flag="unlimited_liability", year=2025, portfolio="vendor")
+        print(f"Unlimited liability in 2025 vendor contracts: {hits.to_pylist()}")
+        assert hits.num_rows == 1
+        assert hits["doc_id"][0].as_py() == "doc-1"
+        assert hits["clause_index"][0].as_py() == 3
+
+        # Offsets from the pipeline's risks survive the export
+        offsets = query.find(portfolio="vendor", columns=["clause_index", "clause_offset"]).to_pylist()
+        assert {"clause_index": 3, "clause_offset": 120} in offsets
+        assert {"clause_index": 7, "clause_offset": -1} in offsets
+
+        # No year in the metadata: null, not the year of the export
+        undated = query.find(portfolio="employment", columns=["doc_id", "year"]).to_pylist()
+        print(f"Undated contract: {undated}")
+        assert undated == [{"doc_id": "doc-3", "year": None}]
+
+        by_category = query.count_by("category", portfolio="vendor")
+        print(f"Vendor risks by category: {by_category}")
+        assert by_category == {"Financial Liability": 2, "Termination and Cancellation": 1, "Payment Terms": 1}
+
+        # Counterparty from metadata, else the non-own party under any role, else null (never a placeholder)
+        by_counterparty = query.count_by("counterparty")
+        print(f"Risks by counterparty: {by_counterparty}")
+        assert by_counterparty == {"Acme Supplies": 2, "Globex": 1, "Peter Gibbons": 1, None: 1}
+
+        withheld = query.find(financial_flag="payment_conditions")
+        assert withheld["doc_id"].to_pylist() == ["doc-3"]
+
+    print("Status: OK")
+
+
+if __name__ == "__main__":
+    test_clause_export()
@@ -0,0 +1,75 @@
+"""
+Test the clause embedding index: exact and IVF search return the planted
+nearest clause, and several processes appending at once keep rows and
+vectors aligned (random vectors, no model needed)
+"""
+import multiprocessing
+import sys
+import tempfile
+sys.path.insert(0, '.')
+
+import numpy as np
+
+from retrieval.clause_index import ClauseIndex
+
+
+def vector(doc: int, clause: int) -> np.ndarray:
+    return np.random.default_rng(doc * 1000 + clause).standard_normal(16)
+
+
+def add_documents(root: str, worker: int) -> None:
+    index = ClauseIndex(root)
+    for d in range(worker * 25, worker * 25 + 25):
+        index.add(f"doc-{d}", [f"{d}:{i}" for i in range(5)], np.stack([vector(d, i) for i in range(5)]))
+
+
+def test_clause_index():
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        index = ClauseIndex(tmp, exact_search_below=500)
+        for d in range(100):
+            index.add(f"doc-{d}", [f"clause {d}-{i}" for i in range(20)], rng.standard_normal((20, 32)))
+
+        target = rng.standard_normal(32)
+        index.add("doc-target", ["Contractor shall indemnify the Company."], target[None, :])
+        assert index.add("doc-target", ["duplicate"], target[None, :]) == 0
+
+        exact = index.search(target, k=3)
+        print(f"Exact top hit: {exact[0]}")
+        assert exact[0]["doc_id"] == "doc-target"
+
+        lists = index.build(n_lists=16)
+        approx = ClauseIndex(tmp, exact_search_below=500).search(target, k=3, n_probe=4)
+        print(f"IVF ({lists} lists) top hit: {approx[0]}")
+        assert approx[0]["doc_id"] == "doc-target"
+        assert approx[0]["score"] > 0.99
+        assert len(index) == 2001
+
+        # The caller's arrays are not normalized in place
+        raw = rng.standard_normal((2, 32)).astype(np.float32)
+        before = raw.copy()
+        index.add("doc-raw", ["a", "b"], raw)
+        index.search(raw[0], k=1)
+        assert np.array_equal(raw, before)
+
+    # Worker processes appending to one index (several uvicorn workers)
+    with tempfile.TemporaryDirectory() as tmp:
+        workers = [multiprocessing.Process(target=add_documents, args=(tmp, w)) for w in range(4)]
+        for p in workers:
+            p.start()
+        for p in workers:
+            p.join()
+        index = ClauseIndex(tmp)
+        assert len(index) == 500
+        vectors = np.asarray(index._vectors(), dtype=np.float32)
+        rows = index._rows(list(range(len(index))))
+        expected = np.stack([vector(*map(int, row["clause"].split(":"))) for row in rows])
+        expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+        print(f"Concurrent appends: {len(rows)} rows, max misalignment {np.abs(vectors - expected).max():.4f}")
+        assert np.abs(vectors - expected).max() < 1e-2
+
+    print("Status: OK")
+
+
+if __name__ == "__main__":
+    test_clause_index()
@@ -0,0 +1,75 @@
+"""
+Test the distilled clause classifier: teacher labels from stored artifacts,
+training, save/load and selection as the classifier backend (no transformer needed)
+"""
+import os
+import sys
+import tempfile
+sys.path.insert(0, '.')
+
+from classification.distilled_classifier import (
+    DistilledClassifier, RISK_LABELS, label_corpus, load_teacher_labels, train
+)
+from classification.early_exit import load_labeled_clauses
+from pipeline.artifact_store import ArtifactStore
+
+
+def test_distilled_classifier():
+    labeled = load_labeled_clauses("classification/labeled_clauses.jsonl")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Teacher labels come straight from stored classify-stage artifacts
+        store = ArtifactStore(os.path.join(tmp, "artifacts"))
+        zero_shot = {"backend": "zero_shot"}
+        store.put("doc-a", "classify", "fp", [
+            {"clause": row["clause"], "category": row["label"], "confidence": 0.9, "risk_level": "Low"}
+            for row in labeled
+        ], meta=zero_shot)
+        store.put("doc-b", "classify", "fp", [
+            {"clause": labeled[0]["clause"], "category": labeled[0]["label"], "confidence": 0.8, "risk_level": "High"},
+            {"clause": "Le fournisseur garantit la conformite.", "category": "Unsupported Language",
+             "confidence": 0.0, "risk_level": "Unknown"}
+        ], meta=zero_shot)
+        # The student's own outputs are not teacher labels
+        store.put("doc-c", "classify", "fp", [
+            {"clause": "Distilled output that must not be collected.", "category": "Safe Clause",
+             "confidence": 0.6, "risk_level": "Safe"}
+        ], meta={"backend": "distilled"})
+        labels_path = os.path.join(tmp, "teacher_labels.jsonl")
+        written = label_corpus(labels_path, store=store)
+        print(f"Teacher labels collected: {written}")
+        # Duplicate clause across documents written once; unsupported-language and distilled results skipped
+        assert written == len(labeled)
+
+        records = load_teacher_labels(labels_path)
+        student = train([r["clause"] for r in records], [r["label"] for r in records], RISK_LABELS,
+                        [r["confidence"] for r in records], n_features=1 << 16, epochs=30)
+        results = student.classify_clauses([r["clause"] for r in records])
+        agreement = sum(r["category"] == t["label"] for r, t in zip(results, records)) / len(records)
+        print(f"Training agreement with teacher: {agreement:.3f}")
+        assert agreement >= 0.95
+        assert set(results[0]) == {"clause", "category", "confidence", "margin", "risk_level"}
+
+        model_path = os.path.join(tmp, "distilled_model.npz")
+        student.save(model_path)
+        os.environ["CLASSIFIER_BACKEND"] = "distilled"
+        os.environ["CLASSIFIER_DISTILLED_MODEL"] = model_path
+        try:
+            from classification.risk_classifier import load_classifier
+            from classification.classifier_settings import classifier_settings
+            backend = load_classifier()
+            assert isinstance(backend, DistilledClassifier)
+            assert backend.inference_mode == "distilled" and backend.hypothesis_template
+            assert classifier_settings()["model"] is not None
+            unseen = backend.classify_clause("The Vendor shall indemnify and hold harmless the Buyer against all third-party claims.")
+            print(f"Unseen clause: {unseen['category']} ({unseen['confidence']})")
+            assert unseen["category"] == "Indemnification"
+        finally:
+            del os.environ["CLASSIFIER_BACKEND"]
+            del os.environ["CLASSIFIER_DISTILLED_MODEL"]
+
+    print("Status: OK")
+
+
+if __name__ == "__main__":
+    test_distilled_classifier()
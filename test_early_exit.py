@@ -0,0 +1,55 @@
+"""
+Test early-exit label scoring decisions: certainty against fitted ceilings,
+score estimates for unscored labels and bound fitting (no model needed)
+"""
+import random
+import sys
+sys.path.insert(0, '.')
+
+from classification.early_exit import RISK_PRIORITY, estimate_scores, fit_bounds, top_k_certain
+
+
+def synthetic_logits(rng, top_label):
+    row = {label: rng.gauss(-2.0, 1.0) for label in RISK_PRIORITY}
+    row[top_label] = rng.gauss(4.0, 0.5)
+    return row
+
+
+def test_early_exit():
+    rng = random.Random(7)
+    corpus = [synthetic_logits(rng, rng.choice(RISK_PRIORITY)) for _ in range(400)]
+    bounds = fit_bounds(corpus, quantile=0.9)
+    print(f"Ceilings: { {k: round(v, 2) for k, v in bounds['ceilings'].items()} }")
+
+    # Replay risk-ordered scoring on fresh clauses and compare with full scoring
+    agree, scored_total = 0, 0
+    evaluation = [synthetic_logits(rng, rng.choice(RISK_PRIORITY)) for _ in range(200)]
+    for row in evaluation:
+        scored = {}
+        for position, label in enumerate(RISK_PRIORITY):
+            scored[label] = row[label]
+            if top_k_certain(scored, RISK_PRIORITY[position + 1:], bounds["ceilings"], margin=0.5):
+                break
+        scored_total += len(scored)
+        estimate = estimate_scores(scored, [l for l in RISK_PRIORITY if l not in scored], bounds["priors"])
+        agree += max(estimate, key=estimate.get) == max(row, key=row.get)
+        assert abs(sum(estimate.values()) - 1.0) < 1e-9
+
+    mean_scored = scored_total / len(evaluation)
+    print(f"Agreement with full scoring: {agree / len(evaluation):.3f}, labels scored: {mean_scored:.2f} of 7")
+    assert agree / len(evaluation) >= 0.95
+    assert mean_scored < 6.5
+
+    # No fitted bounds: never certain until every label is scored
+    assert not top_k_certain({"Financial Liability": 9.0}, ["Safe Clause"], {}, margin=0.0)
+    assert top_k_certain({"Financial Liability": 9.0}, [], {}, margin=0.0)
+    # Top-2 needs two labels above the ceilings
+    ceilings = {"Safe Clause": 1.0}
+    assert not top_k_certain({"Payment Terms": 3.0, "Indemnification": 0.5}, ["Safe Clause"], ceilings, k=2)
+    assert top_k_certain({"Payment Terms": 3.0, "Indemnification": 2.0}, ["Safe Clause"], ceilings, k=2)
+
+    print("Status: OK")
+
+
+if __name__ == "__main__":
+    test_early_exit()
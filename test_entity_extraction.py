@@ -0,0 +1,105 @@
+"""
+Test entity extraction: amounts, percentages, dates, durations and parties are
+found in one pass with their offsets, the structure and financial stages read
+them and the economic model prices penalties at their stated amounts
+(the classifier is replaced by a stand-in, no models needed)
+"""
+import sys
+import tempfile
+sys.path.insert(0, '.')
+
+import classification.risk_classifier as risk_classifier_module
+from insights.economic_impact_model import economic_impact_model
+from insights.entity_extractor import DocumentEntities, EntityExtractor
+from insights.financial_risk_detector import financial_risk_detector
+from insights.portfolio_exposure_model import portfolio_exposure_model, risks_from_results
+from pipeline.artifact_store import ArtifactStore
+from pipeline.contract_pipeline import ContractPipeline
+
+contract_text = (
+    "SERVICE AGREEMENT. This Agreement is made on 12/05/2025 between Acme Technologies Pvt. Ltd. "
+    "(the \"Company\") and Globex Consulting LLP (hereinafter referred to as the \"Service Provider\"). "
+    "The term of this Agreement shall be twelve (12) months from January 5, 2025. "
+    "The Company shall pay each invoice within 90 days of receipt of the invoice. "
+    "Late payment attracts interest at 1.5% per month. "
+    "A penalty of $5,000 applies for each missed milestone. "
+    "Late delivery incurs a penalty of $500 per day. "
+    "Liquidated damages of Rs. 2 lakh may be levied for breach of confidentiality. "
+    "Either party may terminate this Agreement on 60 days notice of payment default."
+)
+
+
+class KeywordClassifier:
+
+    def classify_clauses(self, clauses, **_):
+        return [{"clause": c, "category": "Financial Liability" if "penalty" in c else "Safe Clause",
+                 "confidence": 0.9, "margin": 0.8, "risk_level": "High"} for c in clauses]
+
+
+def test_entity_extraction():
+    entities = EntityExtractor().extract(contract_text)
+    for e in entities:
+        print(f"{e['type']:<10} {e['text'][:40]!r:<44} {e['value']} {e['tags']}")
+    assert all(contract_text[e["start"]:e["end"]] == e["text"] for e in entities)
+
+    index = DocumentEntities(entities)
+    assert index.parties() == {"company": "Acme Technologies Pvt. Ltd.", "service provider": "Globex Consulting LLP"}
+    assert [e["value"] for e in index.of_type("date")] == ["2025-05-12", "2025-01-05"]
+    assert [(e["value"], e["currency"], e["per"]) for e in index.of_type("money", "penalty")] == [
+        (5000.0, "USD", None), (500.0, "USD", "day"), (200000.0, "INR", None)]
+    assert [e["value"] for e in index.of_type("percentage", "late_payment")] == [1.5]
+    assert [e["days"] for e in index.of_type("duration") if e["payment_terms"]] == [90]
+    assert [e["days"] for e in index.of_type("duration", "notice")] == [60]
+
+    financial = financial_risk_detector.detect_financial_risks([], contract_text, entities)
+    risks = {r["type"]: r for r in financial["financial_risks"]}
+    print(f"Financial risks: {risks}")
+    # The 60-day notice period is not a payment term; the 90-day payment period is
+    assert risks["Extended Payment Terms"]["days"] == 90 and risks["Extended Payment Terms"]["severity"] == "High"
+    # Only the one-off USD amount adds up; the daily rate and the rupee amount are listed, not summed
+    assert risks["Penalty Clause"]["amount"] == 5000.0 and risks["Penalty Clause"]["currency"] == "USD"
+    assert len(risks["Penalty Clause"]["amounts"]) == 3
+    # The stated amount is the cost, not scaled by severity
+    assert economic_impact_model._risk_direct_cost(risks["Penalty Clause"]) == 5000.0
+    assert economic_impact_model._risk_direct_cost(risks["Extended Payment Terms"]) == 1000 * 2.0
+    # Without an amount, or with one in another currency, the fixed estimate still applies
+    assert economic_impact_model._risk_direct_cost({"type": "Penalty Clause", "severity": "Medium"}) == 1500 * 1.5
+    assert economic_impact_model._risk_direct_cost(
+        {"type": "Penalty Clause", "severity": "Medium", "amount": 500000.0, "currency": "INR"}) == 1500 * 1.5
+
+    notice = financial_risk_detector.detect_financial_risks(
+        [], "Either party may terminate on 90 days notice of payment default.",
+        EntityExtractor().extract("Either party may terminate on 90 days notice of payment default."))
+    assert all(r["type"] != "Extended Payment Terms" for r in notice["financial_risks"])
+
+    original = risk_classifier_module.classifier_for_language
+    risk_classifier_module.classifier_for_language = lambda language: ("classifier", KeywordClassifier())
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            pipeline = ContractPipeline(store=ArtifactStore(tmp))
+            response = pipeline.analyze_text(contract_text)
+            again = pipeline.analyze_text(contract_text)
+            stored = pipeline.store.load(response["documentId"], "entities")
+    finally:
+        risk_classifier_module.classifier_for_language = original
+
+    structure = response["legalStructure"]
+    print(f"Parties: {structure['parties']}, term: {structure['term']['duration']}")
+    print(f"Entity counts: {response['entities']['counts']}")
+    assert structure["parties"]["company"] == "Acme Technologies Pvt. Ltd."
+    assert structure["term"]["duration"] == "12 month(s)"
+    assert response["entities"]["counts"]["money"] == 3 and stored["data"] == entities
+    assert response["economicImpact"]["estimatedDirectCosts"] >= 5000.0
+    assert again["entities"] == response["entities"]
+
+    # Portfolio totals price the same stated amounts and periods as the contract itself
+    portfolio = portfolio_exposure_model.aggregate(risks_from_results([{"source": "a.txt", "result": response}]),
+                                                   simulate=False)
+    print(f"Portfolio total: {portfolio['total_risk_cost']}, contract: {response['economicImpact']['totalRiskCost']}")
+    assert portfolio["total_risk_cost"] == response["economicImpact"]["totalRiskCost"]
+
+    print("Status: OK")
+
+
+if __name__ == "__main__":
+    test_entity_extraction()
@@ -0,0 +1,58 @@
+"""
+Test on-demand loading, idle unloading and metrics of the model manager
+"""
+import sys
+sys.path.insert(0, '.')
+
+from pipeline.model_manager import ModelManager, ManagedModel
+
+
+class FakeModel:
+    def __init__(self):
+        self.weights = bytearray(8 * 1024 * 1024)
+
+    def __call__(self, text):
+        return text.upper()
+
+    def classify(self, text):
+        return {"clause": text, "category": "Safe Clause"}
+
+
+def test_model_manager():
+    manager = ModelManager(idle_seconds=60, min_available_mb=0)
+    manager.register("classifier", FakeModel)
+    proxy = ManagedModel(manager, "classifier")
+
+    assert not manager.is_loaded("classifier")
+    assert proxy("payment terms") == "PAYMENT TERMS"
+    assert proxy.classify("x")["category"] == "Safe Clause"
+    assert manager.is_loaded("classifier")
+    print(f"Loaded after first call: {manager.metrics()['models']['classifier']}")
+
+    # Pinned models are never unloaded
+    with manager.use("classifier"):
+        assert manager.unload("classifier") is False
+
+    # Recently used: stays warm
+    assert manager.unload_idle() == []
+    # Idle past the limit: unloaded
+    far_future = manager._last_used["classifier"] + 61
+    assert manager.unload_idle(now=far_future) == ["classifier"]
+    assert not manager.is_loaded("classifier")
+
+    # Reloads on demand
+    proxy("again")
+    metrics = manager.metrics()
+    stats = metrics["models"]["classifier"]
+    print(f"Metrics: {stats}")
+    print(f"Events: {[e['event'] for e in metrics['events']]}")
+    assert stats["loads"] == 2 and stats["unloads"] == 1
+    assert [e["event"] for e in metrics["events"]] == ["load", "unload", "load"]
+    assert metrics["events"][1]["reason"] == "idle"
+    assert metrics["process_rss_bytes"] > 0
+
+    print("Status: OK")
+
+
+if __name__ == "__main__":
+    test_model_manager()
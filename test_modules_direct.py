@@ -78,6 +78,19 @@ print("   ✅ Recommendations:")
 for i, rec in enumerate(economic_impact['recommendations'], 1):
     print(f"      {i}. {rec}")
 
+# 5. Exposure Simulation
+print("\n5️⃣  EXPOSURE SIMULATION (MONTE CARLO)")
+simulation = economic_impact_model.simulate_exposure(
+    financial_analysis['financial_risks'],
+    contract_value=10000,
+    trials=100000,
+    seed=42
+)
+print(f"   ✅ P50 Exposure: ${simulation['p50']:,.2f}")
+print(f"   ✅ P90 Exposure: ${simulation['p90']:,.2f}")
+print(f"   ✅ P99 Exposure: ${simulation['p99']:,.2f}")
+print(f"   ✅ P(cost > contract value): {simulation['probability_exceeds_contract_value']*100:.1f}%")
+
 print(f"\n{'='*70}")
 print("✅ ALL MODULES WORKING SUCCESSFULLY!")
 print(f"{'='*70}\n")
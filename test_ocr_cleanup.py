@@ -0,0 +1,78 @@
+"""
+Test OCR post-processing on synthetic page lines: repeated headers/footers
+and page numbers are stripped, hyphenated breaks rejoined and wrapped lines
+merged by geometry, so segmentation sees only real clauses (no models needed)
+"""
+import sys
+sys.path.insert(0, '.')
+
+from segmentation.ocr_cleanup import OCRCleanup
+from segmentation.segmenter import segment_text
+
+LINE_HEIGHT = 0.02
+
+
+def page(body, number):
+    """Lines laid out top to bottom; (text, right edge, gap before in line heights)"""
+    lines = [{"text": "ACME SUPPLY AGREEMENT - CONFIDENTIAL", "geometry": ((0.1, 0.03), (0.6, 0.05))}]
+    y = 0.12
+    for text, right, gap in body:
+        y += gap * LINE_HEIGHT
+        lines.append({"text": text, "geometry": ((0.1, y), (right, y + LINE_HEIGHT))})
+        y += LINE_HEIGHT + 0.005
+    lines.append({"text": f"Page {number} of 2", "geometry": ((0.45, 0.95), (0.55, 0.97))})
+    return lines
+
+
+def test_ocr_cleanup():
+    pages = [
+        page([
+            ("4. PAYMENT TERMS", 0.35, 0),
+            ("The Buyer shall pay all invoices within thirty days of re-", 0.9, 1.5),
+            ("ceipt. Late amounts accrue interest at two percent per", 0.9, 0),
+            ("month on the third-", 0.4, 0),
+            ("party balance.", 0.3, 0),
+            ("5. TERMINATION", 0.3, 1.5),
+            ("Either party may terminate this agreement on sixty days", 0.9, 1.5),
+        ], 1),
+        page([
+            ("notice to the other party.", 0.5, 0),
+            ("(a) Notices must be in writing.", 0.6, 1.5),
+        ], 2),
+    ]
+    cleanup = OCRCleanup()
+    text, stats = cleanup.clean(pages)
+    print(text)
+    print(f"Stats: {stats}")
+
+    assert "CONFIDENTIAL" not in text and "Page" not in text
+    assert stats["headers_footers"] == 2 and stats["page_numbers"] == 2
+    assert "within thirty days of receipt." in text
+    assert "on the third-party balance." in text
+    # Paragraph split across the page break is rejoined
+    assert "on sixty days notice to the other party." in text
+    assert text.splitlines()[0] == "4. PAYMENT TERMS" and "5. TERMINATION" in text.splitlines()
+    assert text.splitlines()[-1] == "(a) Notices must be in writing."
+
+    clauses = segment_text(text)
+    for clause in clauses:
+        print(f"  {clause!r}")
+    assert not any("Page" in c or "ACME" in c for c in clauses)
+    assert clauses[0].startswith("PAYMENT TERMS\nThe Buyer shall pay")
+
+    # Lines without geometry (plain OCR text) fall back to edge lines and punctuation
+    plain = [[{"text": t} for t in ["Header Text", "Body starts here and", "continues here.", "- 1 -"]],
+             [{"text": t} for t in ["Header Text", "Second page body.", "- 2 -"]]]
+    plain_text, plain_stats = cleanup.clean(plain)
+    print(f"Plain: {plain_text!r} {plain_stats}")
+    assert plain_text == "Body starts here and continues here.\nSecond page body."
+
+    # A single page keeps its margin text unless it is a page number
+    single, _ = cleanup.clean([pages[0]])
+    assert "CONFIDENTIAL" in single and "Page 1" not in single
+
+    print("Status: OK")
+
+
+if __name__ == "__main__":
+    test_ocr_cleanup()
@@ -0,0 +1,108 @@
+"""
+Test confidence-aware OCR: only low-confidence words are re-read, page quality
+scores are computed and risks carry the quality of the page they came from
+(doctr and the classifier are replaced by stand-ins, no models needed)
+"""
+import os
+import sys
+import tempfile
+sys.path.insert(0, '.')
+
+import numpy as np
+
+import classification.risk_classifier as risk_classifier_module
+import ocr
+from pipeline.artifact_store import ArtifactStore
+from pipeline.contract_pipeline import ContractPipeline
+
+
+def line(words, y):
+    """A line of (value, confidence) words laid out left to right"""
+    records, x = [], 0.1
+    for value, confidence in words:
+        width = 0.015 * len(value)
+        records.append({"value": value, "confidence": confidence, "geometry": ((x, y), (x + width, y + 0.02))})
+        x += width + 0.01
+    return ocr._line_record(records, ((0.1, y), (x, y + 0.02)))
+
+
+def fake_pages():
+    return [
+        [line([("The", 0.99), ("Contractor", 0.98), ("accepts", 0.97), ("unlimited", 0.95), ("liability.", 0.96)], 0.2)],
+        [line([("Late", 0.9), ("paymcnt", 0.31), ("incurs", 0.4), ("a", 0.95), ("penalty.", 0.92)], 0.2)],
+    ]
+
+
+class KeywordClassifier:
+
+    def classify_clauses(self, clauses, **_):
+        return [{"clause": c, "category": "Financial Liability" if "liability" in c or "penalty" in c else "Safe Clause",
+                 "confidence": 0.9, "margin": 0.8, "risk_level": "High"} for c in clauses]
+
+
+def test_ocr_quality():
+    reread = []
+
+    def strong(crops):
+        reread.extend(crop.shape for crop in crops)
+        # Confident fix for the misread word, a less confident reading for the other
+        return [("payment", 0.93), ("incurs", 0.35)][:len(crops)]
+
+    rendered = []
+
+    def render(path, indices, scale=ocr.HIRES_SCALE):
+        rendered.append((path, indices))
+        return {index: np.zeros((2000, 1600, 3), dtype=np.uint8) for index in indices}
+
+    originals = (ocr.strong_recognizer, ocr.load_pages, ocr.ocr_page_lines, ocr.render_pages,
+                 risk_classifier_module.classifier_for_language)
+    images = [np.zeros((1000, 800, 3), dtype=np.uint8) for _ in range(2)]
+    ocr.strong_recognizer = strong
+    ocr.load_pages = lambda path: images
+    ocr.ocr_page_lines = lambda pages: fake_pages()[:len(pages)]
+    ocr.render_pages = render
+    risk_classifier_module.classifier_for_language = lambda language: ("classifier", KeywordClassifier())
+    try:
+        pages = fake_pages()
+        count = ocr.rerecognize("scan.png", images, pages)
+        print(f"Re-read {count} words, crops {reread}")
+        assert count == 2 and all(h > 0 and w > 0 for h, w, _ in reread)
+        assert pages[1][0]["text"] == "Late payment incurs a penalty."
+        assert pages[1][0]["words"][2]["value"] == "incurs" and pages[1][0]["words"][2]["confidence"] == 0.4
+        quality = [ocr.page_quality(p) for p in pages]
+        print(f"Page quality: {quality}")
+        assert quality[0]["quality"] > 0.95 and quality[1]["low_confidence_words"] == 1
+        assert quality[1]["rerecognized_words"] == 2
+        assert rendered == []
+
+        # Uploads stored without a suffix are PDFs like in load_pages: low-confidence pages are re-rendered
+        assert ocr.rerecognize(os.path.join("uploads", "contract"), images, fake_pages(), first_page=4) == 2
+        print(f"Re-rendered: {rendered}")
+        assert rendered == [(os.path.join("uploads", "contract"), [5])]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "scan.png")
+            with open(path, "wb") as f:
+                f.write(b"not really an image")
+            pipeline = ContractPipeline(store=ArtifactStore(os.path.join(tmp, "store")))
+            response = pipeline.analyze_file(path)
+            cached = pipeline.reanalyze(response["documentId"])
+    finally:
+        (ocr.strong_recognizer, ocr.load_pages, ocr.ocr_page_lines, ocr.render_pages,
+         risk_classifier_module.classifier_for_language) = originals
+
+    summary = response["ocrQuality"]
+    print(f"OCR quality: overall {summary['overall']}, re-read {summary['rerecognizedWords']}")
+    assert [p["page"] for p in summary["pages"]] == [1, 2]
+    assert summary["pages"][1]["quality"] < summary["pages"][0]["quality"]
+    risks = {r["clause"]: r["ocr_quality"] for r in response["risks"]}
+    print(f"Risks: {risks}")
+    assert risks["The Contractor accepts unlimited liability."] == summary["pages"][0]["quality"]
+    assert risks["Late payment incurs a penalty."] == summary["pages"][1]["quality"]
+    assert cached["ocrQuality"] == summary
+
+    print("Status: OK")
+
+
+if __name__ == "__main__":
+    test_ocr_quality()
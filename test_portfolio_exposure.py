@@ -0,0 +1,127 @@
+"""
+Test portfolio exposure aggregation on a seeded small portfolio: bincount
+group-bys against a plain loop, the counterparty-correlated simulation at
+rho=0 vs rho=1 and counterparty resolution from batch results (no models needed)
+"""
+import sys
+from collections import defaultdict
+sys.path.insert(0, '.')
+
+import numpy as np
+
+from insights.economic_impact_model import economic_impact_model
+from insights.portfolio_exposure_model import PortfolioExposureModel, risks_from_results
+
+TYPES = ["Unlimited Liability", "Penalty Clause", "Extended Payment Terms", "Termination Risk", "Non-Compete"]
+SEVERITIES = ["Critical", "High", "Medium", "Low"]
+
+
+def seeded_portfolio(seed=11, contracts=12, rows=60):
+    rng = np.random.default_rng(seed)
+    contract_ids = rng.integers(0, contracts, rows)
+    return {
+        "contract_id": [f"c{i:02d}" for i in contract_ids],
+        # Every contract has a single counterparty (three contracts each)
+        "counterparty": [f"cp{i % 4}" for i in contract_ids],
+        "type": list(rng.choice(TYPES, rows)),
+        "severity": list(rng.choice(SEVERITIES, rows)),
+        "contract_value": [float(10000 + 1000 * i) for i in contract_ids],
+    }
+
+
+def row_cost(risk_type, severity):
+    risk = {"type": risk_type, "severity": severity}
+    return economic_impact_model._risk_direct_cost(risk) + economic_impact_model._risk_opportunity_cost(risk)
+
+
+def test_portfolio_exposure():
+    portfolio = seeded_portfolio()
+    result = PortfolioExposureModel().aggregate(portfolio, simulate=False, top_counterparties=3)
+
+    # Group-bys against a plain loop over the rows
+    per_contract, per_counterparty = defaultdict(float), defaultdict(float)
+    contracts_of = defaultdict(set)
+    for contract, counterparty, risk_type, severity in zip(
+            portfolio["contract_id"], portfolio["counterparty"], portfolio["type"], portfolio["severity"]):
+        cost = row_cost(risk_type, severity)
+        per_contract[contract] += cost
+        per_counterparty[counterparty] += cost
+        contracts_of[counterparty].add(contract)
+    print(f"Contracts: {result['contracts']}, total {result['total_risk_cost']}")
+    assert result["contracts"] == len(per_contract) and result["risk_rows"] == 60
+    assert result["total_risk_cost"] == round(sum(per_contract.values()), 2)
+    assert result["mean_risk_cost_per_contract"] == round(sum(per_contract.values()) / len(per_contract), 2)
+
+    top = sorted(per_counterparty, key=per_counterparty.get, reverse=True)[:3]
+    print(f"Top counterparties: {result['counterparties']}")
+    assert list(result["counterparties"]) == top
+    for counterparty in top:
+        assert result["counterparties"][counterparty] == {
+            "risk_cost": round(per_counterparty[counterparty], 2), "contracts": len(contracts_of[counterparty])
+        }
+
+    contract_values = dict(zip(portfolio["contract_id"], portfolio["contract_value"]))
+    assert result["total_contract_value"] == round(sum(contract_values.values()), 2)
+
+    # Same seed and marginals; only the counterparty factor's share of the variance differs
+    independent = PortfolioExposureModel(counterparty_correlation=0.0).aggregate(
+        portfolio, trials=40000, seed=5, top_counterparties=4)["simulation"]
+    correlated = PortfolioExposureModel(counterparty_correlation=1.0).aggregate(
+        portfolio, trials=40000, seed=5, top_counterparties=4)["simulation"]
+    print(f"rho=0: {independent}")
+    print(f"rho=1: {correlated}")
+
+    # Lognormal mean: sum of median * exp(sigma^2 / 2), whatever the correlation
+    expected_mean = sum(
+        row_cost(t, s) * np.exp(economic_impact_model.severity_volatility[s] ** 2 / 2)
+        for t, s in zip(portfolio["type"], portfolio["severity"])
+    )
+    for simulation in (independent, correlated):
+        assert abs(simulation["mean"] / expected_mean - 1) < 0.03
+    # Correlated risks do not diversify: fatter tail, and the body sits lower
+    assert correlated["p99"] > independent["p99"] * 1.2
+    assert correlated["p50"] < independent["p50"]
+    for counterparty in independent["counterparty_p99"]:
+        assert correlated["counterparty_p99"][counterparty] > independent["counterparty_p99"][counterparty]
+
+    # Same seed, same draws
+    again = PortfolioExposureModel(counterparty_correlation=0.0).aggregate(
+        portfolio, trials=40000, seed=5, top_counterparties=4)["simulation"]
+    assert again == independent
+
+    # Counterparty from metadata, else the non-own party under any role, else one group per contract
+    placeholders = {"party_1": "First Party", "party_2": "Second Party"}
+
+    def record(doc_id, parties, metadata=None):
+        return {"source": f"{doc_id}.pdf", "metadata": metadata,
+                "result": {"documentId": doc_id, "legalStructure": {"parties": parties},
+                           "financialRisks": {"risks": [{"type": "Unlimited Liability", "severity": "Critical"}]}}}
+
+    rows = risks_from_results([
+        record("doc-1", {"company": "Buyer Co", "vendor": "Acme Supplies"}),
+        record("doc-2", {"lessor": "Harbor Estates", "lessee": "Buyer Co"}),
+        record("doc-3", placeholders, {"counterparty": "Globex"}),
+        record("doc-4", placeholders),
+        record("doc-5", {}),
+    ])
+    print(f"Counterparties: {rows['counterparty']}")
+    assert rows["counterparty"] == ["Acme Supplies", "Harbor Estates", "Globex", "unknown:doc-4", "unknown:doc-5"]
+
+    # Two unrelated contracts without parties are neither grouped nor correlated
+    unrelated = risks_from_results([record("doc-4", placeholders), record("doc-5", {})])
+    grouped = dict(unrelated, counterparty=["Unknown"] * 2)
+    separate = PortfolioExposureModel(counterparty_correlation=1.0).aggregate(unrelated, trials=40000, seed=3)
+    assert {cp: v["contracts"] for cp, v in separate["counterparties"].items()} == {"unknown:doc-4": 1, "unknown:doc-5": 1}
+    baseline = PortfolioExposureModel(counterparty_correlation=0.0).aggregate(unrelated, trials=40000, seed=3)
+    shared = PortfolioExposureModel(counterparty_correlation=1.0).aggregate(grouped, trials=40000, seed=3)
+    p99 = {name: r["simulation"]["p99"] for name, r in
+           (("separate", separate), ("independent", baseline), ("shared factor", shared))}
+    print(f"Unrelated contracts P99: {p99}")
+    assert abs(p99["separate"] / p99["independent"] - 1) < 0.05
+    assert p99["shared factor"] > p99["separate"] * 1.2
+
+    print("Status: OK")
+
+
+if __name__ == "__main__":
+    test_portfolio_exposure()
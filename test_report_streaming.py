@@ -0,0 +1,30 @@
+"""
+Test streaming report generation for a 1,000-clause contract (requires reportlab)
+"""
+import sys
+sys.path.insert(0, '.')
+
+from reporting.intelligence_report_generator import intelligence_report_generator
+
+
+def test_report_streaming():
+    risks = [
+        {"category": "Indemnification", "confidence": 0.82,
+         "clause": f"Clause {i}: Contractor & Affiliates shall indemnify the <Company> against all claims."}
+        for i in range(1000)
+    ]
+    analysis = {"riskScore": 45, "risks": risks}
+
+    chunks = list(intelligence_report_generator.stream_report(analysis, max_risks=None, chunk_size=16 * 1024))
+    pdf = b"".join(chunks)
+    print(f"Streamed {len(pdf)} bytes in {len(chunks)} chunks")
+
+    assert pdf.startswith(b"%PDF")
+    assert pdf.rstrip().endswith(b"%%EOF")
+    assert len(chunks) > 1
+
+    print("Status: OK")
+
+
+if __name__ == "__main__":
+    test_report_streaming()
@@ -0,0 +1,65 @@
+"""
+Test pluggable scoring policies on cached classification outputs (no model needed)
+"""
+import sys
+sys.path.insert(0, '.')
+
+from scoring.scorer import (
+    RiskScorer, FlatPolicy, ConfidenceWeightedPolicy, CalibratedProbabilityPolicy
+)
+
+cached_corpus = [
+    {
+        "doc_id": "contract-a",
+        "risks": [
+            {"clause": "The company may terminate the agreement at any time.", "category": "Termination and Cancellation", "confidence": 0.9},
+            {"clause": "Contractor shall indemnify the Company.", "category": "Indemnification", "confidence": 0.4},
+        ]
+    },
+    {
+        "doc_id": "contract-b",
+        "risks": [
+            {"clause": "Payment shall be made within 60 days.", "category": "Payment Terms", "confidence": 0.8},
+        ]
+    }
+]
+
+
+def test_scoring_policies():
+    scorer = RiskScorer()
+
+    print("Testing flat policy (original behaviour)...")
+    flat = scorer.calculate_score(cached_corpus[0]["risks"])
+    print(f"  -> {flat['total_score']}")
+    assert flat["total_score"] == 80  # Indemnification skipped under 0.5
+
+    print("Testing merged fragments count once...")
+    fragment = {"clause": "1.", "category": "Termination and Cancellation", "confidence": 0.9, "merged_fragment": True}
+    assert scorer.calculate_score(cached_corpus[0]["risks"] + [fragment]) == flat
+
+    print("Testing confidence-weighted policy...")
+    weighted = scorer.calculate_score(cached_corpus[0]["risks"], policy=ConfidenceWeightedPolicy())
+    print(f"  -> {weighted['total_score']}")
+    assert weighted["total_score"] == 100 - 18 - 4
+
+    print("Testing calibrated-probability policy...")
+    calibrated = CalibratedProbabilityPolicy([(0.0, 0.0), (0.5, 0.2), (1.0, 1.0)])
+    assert abs(calibrated.probability("Payment Terms", 0.75) - 0.6) < 1e-9
+
+    print("Testing what-if sweep over cached corpus...")
+    results = scorer.sweep(cached_corpus, {
+        "baseline": {},
+        "strict": {"policy": FlatPolicy(threshold=0.3)},
+        "harsh_payments": {"penalties": {**scorer.penalties, "Payment Terms": 25}},
+    })
+    for name, scores in results.items():
+        print(f"  {name}: {scores}")
+    assert results["baseline"] == {"contract-a": 80, "contract-b": 95}
+    assert results["strict"]["contract-a"] == 70
+    assert results["harsh_payments"]["contract-b"] == 75
+
+    print("Status: OK")
+
+
+if __name__ == "__main__":
+    test_scoring_policies()
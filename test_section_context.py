@@ -0,0 +1,86 @@
+"""
+Test document-level context for clause classification: heading detection on
+segmented text, heading/previous-clause priors and the shared context cache
+(no models needed)
+"""
+import sys
+sys.path.insert(0, '.')
+
+from classification.section_context import ContextCache, apply_context, clause_contexts, combine_scores
+from segmentation.headings import is_heading
+from segmentation.segmenter import segment_text
+
+LABELS = ["Payment Terms", "Termination and Cancellation", "Safe Clause"]
+
+
+def keyword_scores(text):
+    """Stand-in classifier: confident only when the text names its topic"""
+    lowered = text.lower()
+    if "payment" in lowered and "shall pay" in lowered:
+        return {"Payment Terms": 0.8, "Termination and Cancellation": 0.1, "Safe Clause": 0.1}
+    if "payment" in lowered:
+        return {"Payment Terms": 0.7, "Termination and Cancellation": 0.1, "Safe Clause": 0.2}
+    if "terminat" in lowered or "end this" in lowered:
+        return {"Payment Terms": 0.1, "Termination and Cancellation": 0.8, "Safe Clause": 0.1}
+    return {"Payment Terms": 0.3, "Termination and Cancellation": 0.3, "Safe Clause": 0.4}
+
+
+def test_section_context():
+    text = (
+        "4. PAYMENT TERMS\n"
+        "The Buyer shall pay the fees within thirty days of invoice. "
+        "Amounts may be withheld if the goods are defective. "
+        "Interest accrues on late amounts.\n"
+        "5. Termination\n"
+        "Either party may end this agreement on notice. The notice must be given in writing."
+    )
+    clauses = segment_text(text)
+    contexts = clause_contexts(clauses)
+    for clause, context in zip(clauses, contexts):
+        print(f"{context['heading']!s:<14} | {clause.splitlines()[-1][:50]}")
+    assert [c["heading"] for c in contexts] == ["PAYMENT TERMS"] * 3 + ["Termination"] * 2
+    assert contexts[0]["previous"] is None and contexts[3]["previous"] is None
+    assert contexts[1]["previous"] == clauses[0]
+    assert is_heading("Article IV") and is_heading("CONFIDENTIAL INFORMATION")
+    assert not is_heading("The Buyer shall pay the fees.") and not is_heading("Either party may end this")
+
+    # Heading prior turns the ambiguous clause into a payment term
+    calls = []
+
+    def score(texts):
+        calls.append(list(texts))
+        return [keyword_scores(t) for t in texts]
+
+    cache = ContextCache()
+    plain = score(clauses)
+    calls.clear()
+    contextual = apply_context(clauses, plain, contexts, cache, score, heading_weight=0.5, previous_weight=0.3)
+    plain_top = max(plain[1], key=plain[1].get)
+    context_top = max(contextual[1], key=contextual[1].get)
+    print(f"'Amounts may be withheld...': {plain_top} -> {context_top}")
+    assert plain_top == "Safe Clause" and context_top == "Payment Terms"
+    assert abs(sum(contextual[1].values()) - 1.0) < 1e-9
+    # Clear clauses keep their label
+    assert max(contextual[3], key=contextual[3].get) == "Termination and Cancellation"
+
+    # Only the two headings needed scoring; previous clauses came from the batch itself
+    print(f"Context scoring calls: {calls}")
+    assert calls == [["PAYMENT TERMS", "Termination"]]
+
+    # A later chunk of the same document reuses the cached heading and previous clause
+    calls.clear()
+    apply_context(clauses[4:], score(clauses[4:]), contexts[4:], cache, score)
+    assert calls == [[clauses[4]]]
+    calls.clear()
+    apply_context(clauses[4:], plain[4:], contexts[4:], cache, score)
+    assert calls == [] and cache.hits > 0
+
+    # Without priors the scores are unchanged
+    unchanged = combine_scores(plain[0], [], [])
+    assert all(abs(unchanged[k] - v) < 1e-9 for k, v in plain[0].items())
+
+    print("Status: OK")
+
+
+if __name__ == "__main__":
+    test_section_context()
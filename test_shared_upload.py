@@ -0,0 +1,90 @@
+"""
+Test that the API analyzes gateway uploads in place (shared path) and raw
+streamed bodies, refuses paths outside the shared upload directory and
+diffs against a previous revision when one is named
+"""
+import os
+import sys
+import tempfile
+sys.path.insert(0, '.')
+
+from fastapi.testclient import TestClient
+
+import main
+from pipeline.artifact_store import ArtifactStore
+from pipeline.contract_pipeline import ContractPipeline
+from pipeline.response_cache import ResponseCache
+
+contract_text = "Contractor accepts unlimited liability for all damages. Payment is due within thirty days."
+
+
+class TextFilePipeline(ContractPipeline):
+    """Reads the 'scan' as plain text and classifies by keyword, so no models are needed"""
+    ocr_paths = []
+
+    def _ocr(self, file_path):
+        TextFilePipeline.ocr_paths.append(file_path)
+        with open(file_path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def _classify(self, clauses):
+        return [{"clause": c, "category": "Financial Liability" if "liability" in c.lower() else "Safe Clause",
+                 "confidence": 0.9, "risk_level": "High"} for c in clauses]
+
+
+def test_shared_upload():
+    with tempfile.TemporaryDirectory() as tmp:
+        uploads = os.path.join(tmp, "uploads")
+        os.makedirs(uploads)
+        main.SHARED_UPLOAD_DIR = os.path.realpath(uploads)
+        main.contract_pipeline = TextFilePipeline(store=ArtifactStore(os.path.join(tmp, "artifacts")))
+        main.response_cache = ResponseCache(os.path.join(tmp, "cache"))
+        client = TestClient(main.app)
+
+        upload_path = os.path.join(uploads, "3f2a9c")
+        with open(upload_path, "w", encoding="utf-8") as f:
+            f.write(contract_text)
+
+        response = client.post("/analyze/path", json={"path": upload_path})
+        print(f"Shared path: {response.status_code} riskScore={response.json().get('riskScore')}")
+        assert response.status_code == 200
+        # OCR read the gateway's file directly, no temp copy
+        assert TextFilePipeline.ocr_paths == [os.path.realpath(upload_path)]
+
+        etag = response.headers["ETag"]
+        assert client.post("/analyze/path", json={"path": upload_path},
+                           headers={"If-None-Match": etag}).status_code == 304
+
+        outside = client.post("/analyze/path", json={"path": os.path.join(uploads, "..", "secret.pdf")})
+        print(f"Outside shared dir: {outside.status_code}")
+        assert outside.status_code == 403
+        assert client.post("/analyze/path", json={"path": os.path.join(uploads, "missing")}).status_code == 404
+
+        streamed = client.post("/analyze/stream", content=contract_text.encode("utf-8"),
+                               headers={"Content-Type": "application/pdf"})
+        print(f"Streamed body: {streamed.status_code} documentId={streamed.json()['documentId'][:12]}")
+        assert streamed.status_code == 200
+        # Same bytes, same document: served from the cache without a second OCR pass
+        assert streamed.json()["documentId"] == response.json()["documentId"]
+        assert len(TextFilePipeline.ocr_paths) == 1
+
+        # A revision names its predecessor and gets a revision delta (cached separately)
+        revised_path = os.path.join(uploads, "3f2a9d")
+        with open(revised_path, "w", encoding="utf-8") as f:
+            f.write(contract_text + " The Vendor accepts liability for lost profits.")
+        previous_id = response.json()["documentId"]
+        revised = client.post("/analyze/path", json={"path": revised_path, "previous_doc_id": previous_id})
+        delta = revised.json()["revisionDelta"]
+        print(f"Revision delta: {len(delta['newRisks'])} new risk(s), unchanged {delta['unchangedClauses']}")
+        assert delta["previousDocumentId"] == previous_id and delta["unchangedClauses"] == 2
+        assert "revisionDelta" not in client.post("/analyze/path", json={"path": revised_path}).json()
+
+        pasted = client.post("/analyze", data={"text": contract_text + " Fees are non-refundable.",
+                                               "previous_doc_id": previous_id})
+        assert pasted.json()["revisionDelta"]["previousDocumentId"] == previous_id
+
+    print("Status: OK")
+
+
+if __name__ == "__main__":
+    test_shared_upload()
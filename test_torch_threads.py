@@ -0,0 +1,51 @@
+"""
+Test torch thread recommendations and per-process configuration
+(environment and the applied settings are restored after the test)
+"""
+import os
+import sys
+sys.path.insert(0, '.')
+
+import pytest
+
+import pipeline.torch_threads as torch_threads
+
+
+@pytest.fixture
+def fresh_process(monkeypatch):
+    """No thread settings applied yet and no thread variables set; both restored afterwards"""
+    monkeypatch.setattr(torch_threads, "_applied", None)
+    for name in (torch_threads.WORKERS_ENV, torch_threads.INTRA_OP_ENV, torch_threads.INTER_OP_ENV,
+                 "OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        monkeypatch.delenv(name, raising=False)
+    return monkeypatch
+
+
+def test_torch_threads(fresh_process):
+    print(f"Available cores: {torch_threads.available_cores()}")
+
+    settings = torch_threads.recommend_threads(workers=4, cores=16)
+    print(f"16 cores / 4 workers: {settings}")
+    assert settings["intra_op"] == 4 and settings["inter_op"] == 1
+
+    assert torch_threads.recommend_threads(workers=1, cores=16)["inter_op"] == 2
+    assert torch_threads.recommend_threads(workers=8, cores=4)["intra_op"] == 1
+
+    fresh_process.setenv(torch_threads.WORKERS_ENV, "2")
+    assert torch_threads.recommend_threads(cores=8)["intra_op"] == 4
+    fresh_process.delenv(torch_threads.WORKERS_ENV)
+
+    fresh_process.setenv(torch_threads.INTRA_OP_ENV, "3")
+    applied = torch_threads.configure_torch_threads(workers=1)
+    print(f"Applied: {applied}")
+    assert applied["intra_op"] == 3
+    assert os.environ.get("OMP_NUM_THREADS") == "3"
+    # Settings are applied once per process
+    assert torch_threads.configure_torch_threads(intra_op=7) is applied
+    assert torch_threads.applied_settings() == applied
+
+    print("Status: OK")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-q", "-s", __file__]))